@@ -0,0 +1,36 @@
+# En: apps/analytics/admin.py
+
+from django.contrib import admin
+from .models import DailyMarketplaceSales, DailyProductSales, DailyVendorSales
+
+
+class DailySalesAdmin(admin.ModelAdmin):
+    """
+    SOLO LECTURA: los acumulados se mantienen solos
+    (o con 'python manage.py rebuild_sales_rollups').
+    """
+    date_hierarchy = 'date'
+    list_display = ('date', 'orders', 'units', 'revenue', 'delivered_orders', 'delivered_revenue')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyMarketplaceSales)
+class DailyMarketplaceSalesAdmin(DailySalesAdmin):
+    pass
+
+
+@admin.register(DailyVendorSales)
+class DailyVendorSalesAdmin(DailySalesAdmin):
+    list_display = ('date', 'vendor', 'orders', 'units', 'revenue', 'delivered_orders', 'delivered_revenue')
+    list_select_related = ('vendor__user',)
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(DailySalesAdmin):
+    list_display = ('date', 'product', 'vendor', 'orders', 'units', 'revenue')
+    list_select_related = ('product', 'vendor__user')
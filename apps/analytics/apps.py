@@ -0,0 +1,12 @@
+# En: apps/analytics/apps.py
+
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.analytics'
+
+    def ready(self):
+        # Signals que mantienen los acumulados diarios al cambiar un pedido
+        import apps.analytics.signals
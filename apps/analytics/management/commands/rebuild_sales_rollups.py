@@ -0,0 +1,60 @@
+# En: apps/analytics/management/commands/rebuild_sales_rollups.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.analytics.rollups import date_range, rebuild
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los acumulados diarios de ventas de un rango de fechas a partir de los pedidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='Desde (AAAA-MM-DD, inclusive). Default: el día del primer pedido.'
+        )
+        parser.add_argument(
+            '--end',
+            help='Hasta (AAAA-MM-DD, inclusive). Default: hoy.'
+        )
+        parser.add_argument(
+            '--chunk-days', type=int, default=31,
+            help='Días por transacción (default: 31).'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias de la base de datos (default: "default").'
+        )
+
+    def parse(self, options, name, default):
+        if not options[name]:
+            return default
+        try:
+            value = parse_date(options[name])
+        except ValueError:  # Bien formada pero imposible (2025-02-30)
+            value = None
+        if value is None:
+            raise CommandError(f'--{name}: fecha inválida, usa AAAA-MM-DD.')
+        return value
+
+    def handle(self, *args, **options):
+        using = options['database']
+        first = Order.objects.using(using).order_by('created_at').values_list('created_at', flat=True).first()
+        today = timezone.localdate()
+
+        start = self.parse(options, 'start', timezone.localdate(first) if first else today)
+        end = self.parse(options, 'end', today)
+        if start > end:
+            raise CommandError('--start no puede ser posterior a --end.')
+
+        rows = 0
+        for chunk_start, chunk_end in date_range(start, end, max(options['chunk_days'], 1)):
+            with transaction.atomic(using=using):
+                rows += rebuild(chunk_start, chunk_end, using=using)
+            self.stdout.write(f'  {chunk_start} a {chunk_end}: listo.')
+
+        self.stdout.write(self.style.SUCCESS(f'Acumulados recalculados del {start} al {end} ({rows} renglones).'))
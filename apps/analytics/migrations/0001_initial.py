@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0006_product_sku'),
+        ('users', '0005_profile_ban_reason'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMarketplaceSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('units', models.IntegerField(default=0, verbose_name='Piezas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+                ('delivered_orders', models.IntegerField(default=0, verbose_name='Pedidos Entregados')),
+                ('delivered_units', models.IntegerField(default=0, verbose_name='Piezas Entregadas')),
+                ('delivered_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos Entregados')),
+            ],
+            options={
+                'verbose_name': 'Ventas Diarias (Marketplace)',
+                'verbose_name_plural': 'Ventas Diarias (Marketplace)',
+                'constraints': [models.UniqueConstraint(fields=('date',), name='analytics_market_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('units', models.IntegerField(default=0, verbose_name='Piezas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+                ('delivered_orders', models.IntegerField(default=0, verbose_name='Pedidos Entregados')),
+                ('delivered_units', models.IntegerField(default=0, verbose_name='Piezas Entregadas')),
+                ('delivered_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos Entregados')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product', verbose_name='Producto')),
+                ('vendor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_product_sales', to='users.profile', verbose_name='Vendedor')),
+            ],
+            options={
+                'verbose_name': 'Ventas Diarias (Producto)',
+                'verbose_name_plural': 'Ventas Diarias (Producto)',
+                'indexes': [models.Index(fields=['vendor', 'date'], name='analytics_product_vendor_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'date'), name='analytics_product_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyVendorSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('orders', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('units', models.IntegerField(default=0, verbose_name='Piezas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos')),
+                ('delivered_orders', models.IntegerField(default=0, verbose_name='Pedidos Entregados')),
+                ('delivered_units', models.IntegerField(default=0, verbose_name='Piezas Entregadas')),
+                ('delivered_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ingresos Entregados')),
+                ('vendor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='users.profile', verbose_name='Vendedor')),
+            ],
+            options={
+                'verbose_name': 'Ventas Diarias (Vendedor)',
+                'verbose_name_plural': 'Ventas Diarias (Vendedor)',
+                'constraints': [models.UniqueConstraint(fields=('vendor', 'date'), name='analytics_vendor_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# En: apps/analytics/models.py
+
+from django.db import models
+from apps.users.models import Profile
+from apps.products.models import Product
+
+
+class DailySales(models.Model):
+    """
+    Acumulados de ventas de UN día (fecha del pedido, hora de México).
+    Se mantienen incrementalmente (ver analytics/rollups.py) para que las
+    gráficas no recorran Order/OrderItem.
+
+    - orders/units/revenue: pedidos no cancelados.
+    - delivered_*: la parte de esos pedidos que ya se entregó.
+
+    Si algo se desfasa: python manage.py rebuild_sales_rollups --start ... --end ...
+    """
+    date = models.DateField(verbose_name='Fecha')
+
+    orders = models.IntegerField(default=0, verbose_name='Pedidos')
+    units = models.IntegerField(default=0, verbose_name='Piezas')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos')
+
+    delivered_orders = models.IntegerField(default=0, verbose_name='Pedidos Entregados')
+    delivered_units = models.IntegerField(default=0, verbose_name='Piezas Entregadas')
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Ingresos Entregados')
+
+    class Meta:
+        abstract = True
+
+
+class DailyMarketplaceSales(DailySales):
+    """ Totales de todo el marketplace por día. """
+
+    class Meta:
+        verbose_name = 'Ventas Diarias (Marketplace)'
+        verbose_name_plural = 'Ventas Diarias (Marketplace)'
+        constraints = [
+            models.UniqueConstraint(fields=['date'], name='analytics_market_day_uniq'),
+        ]
+
+
+class DailyVendorSales(DailySales):
+    """ Totales de un vendedor por día. """
+    vendor = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        db_index=False, # Lo cubre la restricción (vendor, date)
+        related_name='daily_sales',
+        verbose_name='Vendedor'
+    )
+
+    class Meta:
+        verbose_name = 'Ventas Diarias (Vendedor)'
+        verbose_name_plural = 'Ventas Diarias (Vendedor)'
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'date'], name='analytics_vendor_day_uniq'),
+        ]
+
+
+class DailyProductSales(DailySales):
+    """ Totales de un producto por día (con su vendedor, para el ranking). """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_index=False, # Lo cubre la restricción (product, date)
+        related_name='daily_sales',
+        verbose_name='Producto'
+    )
+    vendor = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        db_index=False, # Lo cubre el índice (vendor, date)
+        related_name='daily_product_sales',
+        verbose_name='Vendedor'
+    )
+
+    class Meta:
+        verbose_name = 'Ventas Diarias (Producto)'
+        verbose_name_plural = 'Ventas Diarias (Producto)'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='analytics_product_day_uniq'),
+        ]
+        indexes = [
+            # "Mis productos más vendidos" en un rango de fechas
+            models.Index(fields=['vendor', 'date'], name='analytics_product_vendor_idx'),
+        ]
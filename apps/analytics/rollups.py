@@ -0,0 +1,216 @@
+# En: apps/analytics/rollups.py
+
+"""
+Mantenimiento de los acumulados diarios de ventas (analytics/models.py).
+
+Cada pedido aporta a tres tablas: marketplace, vendedor y producto, en el
+día de su fecha de creación. Lo que aporta depende SOLO de su estatus:
+
+    cancelado            -> nada
+    entregado            -> cuenta como venta y como entregado
+    cualquier otro       -> cuenta como venta
+
+- apply_transition(): al pasar de un estatus a otro se suma la diferencia
+  con UN INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x por tabla.
+  Se escribe al confirmarse la transacción del pedido, en una transacción
+  propia, para no tener bloqueada la fila del día mientras se arma el pedido.
+- rebuild(): recalcula un rango de fechas desde Order/OrderItem (reparar
+  desfases o cargar el historial).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import OrderItem
+from .models import DailyMarketplaceSales, DailyProductSales, DailyVendorSales
+
+logger = logging.getLogger(__name__)
+
+GROSS_FIELDS = ['orders', 'units', 'revenue']
+DELIVERED_FIELDS = ['delivered_orders', 'delivered_units', 'delivered_revenue']
+METRIC_FIELDS = GROSS_FIELDS + DELIVERED_FIELDS
+REBUILD_BATCH_SIZE = 1000
+
+# Llave única de cada tabla (el ON CONFLICT)
+UNIQUE_FIELDS = {
+    DailyMarketplaceSales: ['date'],
+    DailyVendorSales: ['vendor', 'date'],
+    DailyProductSales: ['product', 'date'],
+}
+
+
+def contribution(status):
+    """ (cuenta como venta, cuenta como entregado) para un estatus. None = el pedido no existe. """
+    if status is None or status == 'canceled':
+        return 0, 0
+    return 1, int(status == 'delivered')
+
+
+# --- Incremental ---
+
+def apply_transition(order, old_status, new_status, using=DEFAULT_DB_ALIAS):
+    """
+    Suma a los acumulados la diferencia entre el estatus anterior y el nuevo.
+    old_status=None al crear el pedido; new_status=None al borrarlo.
+    Los artículos se leen AHORA (al borrar ya no existirán); se escribe al commit.
+    """
+    old, new = contribution(old_status), contribution(new_status)
+    gross, delivered = new[0] - old[0], new[1] - old[1]
+    if not gross and not delivered:
+        return
+
+    items = OrderItem.objects.using(using).filter(order_id=order.pk).values_list(
+        'product_id', 'vendor_id', 'quantity', 'price_at_purchase'
+    )
+    day = timezone.localdate(order.created_at)
+    deltas = order_deltas(day, items, gross, delivered)
+    transaction.on_commit(lambda: _write_deltas(deltas, using, day=day, order_id=order.pk), using=using)
+
+
+def order_deltas(day, items, gross, delivered):
+    """ Renglones a sumar en cada tabla: {modelo: [(llaves, métricas), ...]}. """
+    def empty():
+        return {'units': 0, 'revenue': Decimal('0')}
+
+    by_product, by_vendor, market = defaultdict(empty), defaultdict(empty), empty()
+    for product_id, vendor_id, quantity, price in items:
+        targets = [market]
+        if vendor_id is not None:
+            targets.append(by_vendor[vendor_id])
+            if product_id is not None:
+                targets.append(by_product[(product_id, vendor_id)])
+        for totals in targets:
+            totals['units'] += quantity
+            totals['revenue'] += quantity * price
+
+    def metrics(totals):
+        # Un pedido cuenta UNA vez en cada renglón, traiga las piezas que traiga
+        return {
+            'orders': gross, 'units': gross * totals['units'], 'revenue': gross * totals['revenue'],
+            'delivered_orders': delivered, 'delivered_units': delivered * totals['units'],
+            'delivered_revenue': delivered * totals['revenue'],
+        }
+
+    return {
+        DailyMarketplaceSales: [({'date': day}, metrics(market))],
+        DailyVendorSales: [({'date': day, 'vendor_id': vendor_id}, metrics(totals))
+                           for vendor_id, totals in by_vendor.items()],
+        DailyProductSales: [({'date': day, 'product_id': product_id, 'vendor_id': vendor_id}, metrics(totals))
+                            for (product_id, vendor_id), totals in by_product.items()],
+    }
+
+
+def _write_deltas(deltas, using, day=None, order_id=None):
+    try:
+        with transaction.atomic(using=using):
+            for model, rows in deltas.items():
+                upsert_increment(model, rows, using)
+    except Exception:
+        # El pedido ya se guardó; el día queda desfasado hasta repararlo con rebuild_sales_rollups
+        logger.exception(
+            'No se pudieron actualizar los acumulados de ventas del %s (pedido #%s). '
+            'Repara con: manage.py rebuild_sales_rollups --start %s --end %s',
+            day, order_id, day, day,
+        )
+
+
+def upsert_increment(model, rows, using=DEFAULT_DB_ALIAS):
+    """
+    INSERT ... ON CONFLICT (<llave única>) DO UPDATE SET m = tabla.m + excluded.m
+
+    Una sola sentencia por tabla; dos pedidos del mismo día no se pisan
+    porque la suma la hace la BD sobre el valor que tenga la fila.
+    (SQLite >= 3.24 y PostgreSQL entienden la misma sintaxis.)
+    """
+    if not rows:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    conflict = [model._meta.get_field(name).column for name in UNIQUE_FIELDS[model]]
+
+    key_columns = list(rows[0][0])
+    columns = key_columns + METRIC_FIELDS
+    fields = [model._meta.get_field(column) for column in columns]
+    placeholders = '(%s)' % ', '.join(['%s'] * len(columns))
+    params = []
+    for keys, metrics in rows:
+        values = {**keys, **metrics}
+        params.extend(
+            field.get_db_prep_value(values[column], connection) for field, column in zip(fields, columns)
+        )
+
+    sql = 'INSERT INTO {table} ({columns}) VALUES {values} ON CONFLICT ({conflict}) DO UPDATE SET {updates}'.format(
+        table=table,
+        columns=', '.join(quote(column) for column in columns),
+        values=', '.join([placeholders] * len(rows)),
+        conflict=', '.join(quote(column) for column in conflict),
+        updates=', '.join(f'{quote(field)} = {table}.{quote(field)} + excluded.{quote(field)}' for field in METRIC_FIELDS),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+# --- Reconstrucción ---
+
+def rebuild(start, end, using=DEFAULT_DB_ALIAS):
+    """
+    Borra y recalcula los acumulados de start a end (fechas, inclusive) desde
+    los pedidos. Llamar dentro de transaction.atomic(). Regresa cuántos
+    renglones (de las tres tablas) quedaron.
+    """
+    for model in (DailyMarketplaceSales, DailyVendorSales, DailyProductSales):
+        model.objects.using(using).filter(date__range=(start, end)).delete()
+
+    items = OrderItem.objects.using(using).filter(
+        order__created_at__date__range=(start, end)
+    ).exclude(order__status='canceled').annotate(
+        day=TruncDate('order__created_at')
+    ).order_by()
+
+    line_total = F('quantity') * F('price_at_purchase')
+    delivered = Q(order__status='delivered')
+    aggregates = {
+        'orders': Count('order_id', distinct=True),
+        'units': Sum('quantity'),
+        'revenue': Sum(line_total, output_field=DecimalField(max_digits=14, decimal_places=2)),
+        'delivered_orders': Count('order_id', distinct=True, filter=delivered),
+        'delivered_units': Sum('quantity', filter=delivered),
+        'delivered_revenue': Sum(line_total, filter=delivered, output_field=DecimalField(max_digits=14, decimal_places=2)),
+    }
+
+    groups = [
+        (DailyMarketplaceSales, items.values('day')),
+        (DailyVendorSales, items.filter(vendor__isnull=False).values('day', 'vendor_id')),
+        (DailyProductSales, items.filter(vendor__isnull=False, product__isnull=False).values(
+            'day', 'product_id', 'vendor_id')),
+    ]
+
+    total = 0
+    for model, queryset in groups:
+        batch = []
+        for row in queryset.annotate(**aggregates).iterator(chunk_size=REBUILD_BATCH_SIZE):
+            day = row.pop('day')
+            batch.append(model(date=day, **{key: value or 0 for key, value in row.items()}))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                model.objects.using(using).bulk_create(batch)
+                total += len(batch)
+                batch = []
+        model.objects.using(using).bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def date_range(start, end, step_days):
+    """ Parte [start, end] en tramos de step_days días: [(inicio, fin), ...] """
+    while start <= end:
+        stop = min(start + timedelta(days=step_days - 1), end)
+        yield start, stop
+        start = stop + timedelta(days=1)
@@ -0,0 +1,20 @@
+# En: apps/analytics/serializers.py
+
+from rest_framework import serializers
+
+
+class SalesPointSerializer(serializers.Serializer):
+    """ Métricas de un día (o de un rango, en 'totals'). """
+    date = serializers.DateField(required=False)
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    delivered_orders = serializers.IntegerField()
+    delivered_units = serializers.IntegerField()
+    delivered_revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ProductSalesSerializer(SalesPointSerializer):
+    """ Totales de un producto en el rango. """
+    product_id = serializers.IntegerField()
+    name = serializers.CharField(source='product__name')
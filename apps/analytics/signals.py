@@ -0,0 +1,45 @@
+# En: apps/analytics/signals.py
+
+"""
+Cambios de estatus hechos con order.save() (el admin, scripts).
+
+Los caminos que NO pasan por save() llaman a apply_transition() directo:
+- OrderSerializer.create (los artículos se crean después del pedido).
+- cancel_order y mark_delivered (son UPDATE condicionales).
+"""
+
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.orders.models import Order
+from .rollups import apply_transition
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_status(sender, instance, raw=False, using=None, **kwargs):
+    instance._previous_status = None
+    if raw or not instance.pk:
+        return
+    # Leído de la BD: el estatus que traía (Order.from_db), sin consultar otra vez
+    instance._previous_status = getattr(instance, '_loaded_status', None)
+    if instance._previous_status is None:
+        # Armado a mano con pk, o con 'status' diferido
+        instance._previous_status = Order.objects.using(using).filter(
+            pk=instance.pk
+        ).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def update_rollups_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw or created:
+        return  # Al crear aún no hay artículos (ver OrderSerializer.create)
+    previous = getattr(instance, '_previous_status', None)
+    instance._loaded_status = instance.status  # Un segundo save() parte de aquí
+    if previous is not None and previous != instance.status:
+        apply_transition(instance, previous, instance.status, using=using)
+
+
+@receiver(pre_delete, sender=Order)
+def update_rollups_on_delete(sender, instance, using=None, **kwargs):
+    # pre_delete: los artículos todavía existen (se borran en cascada después)
+    apply_transition(instance, instance.status, None, using=using)
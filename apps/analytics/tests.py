@@ -0,0 +1,143 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.orders.models import Order
+from apps.products.models import Product
+from . import rollups
+from .models import DailyMarketplaceSales, DailyProductSales, DailyVendorSales
+
+
+class SalesRollupTests(TestCase):
+
+    def setUp(self):
+        self.vendor = User.objects.create_user('vendedor', password='x').profile
+        self.other = User.objects.create_user('otro', password='x').profile
+        self.pen = Product.objects.create(name='Pluma', description='...', price='10.00', inventory=50, vendor=self.vendor)
+        self.book = Product.objects.create(name='Libro', description='...', price='100.00', inventory=50, vendor=self.other)
+        self.buyer = self.api_for(User.objects.create_user('cliente', password='x'))
+        self.today = str(timezone.localdate())
+
+    def api_for(self, user):
+        api = APIClient()
+        api.force_authenticate(user)
+        return api
+
+    def buy(self, *lines):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.buyer.post('/api/orders/', {'items_to_create': [
+                {'product_id': product.id, 'quantity': quantity} for product, quantity in lines
+            ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def snapshot(self):
+        return {
+            model.__name__: sorted(model.objects.values_list(*key, 'orders', 'units', 'revenue', 'delivered_orders'))
+            for model, key in [(DailyMarketplaceSales, ['date']), (DailyVendorSales, ['vendor_id', 'date']),
+                               (DailyProductSales, ['product_id', 'date'])]
+        }
+
+    def test_create_cancel_and_deliver_update_rollups_incrementally(self):
+        first = self.buy((self.pen, 3), (self.book, 1))
+        self.buy((self.pen, 1))
+        canceled = self.buy((self.book, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.buyer.post(f'/api/orders/{canceled}/cancel_order/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api_for(self.vendor.user).post(f'/api/orders/{first}/mark-delivered/')
+        self.assertEqual(response.status_code, 200)
+
+        market = DailyMarketplaceSales.objects.get()
+        self.assertEqual((market.orders, market.units, str(market.revenue)), (2, 5, '140.00'))
+        self.assertEqual((market.delivered_orders, str(market.delivered_revenue)), (1, '130.00'))
+
+        data = self.api_for(self.vendor.user).get('/api/analytics/sales/', {'start': self.today, 'end': self.today}).data
+        self.assertEqual(data['scope'], 'vendor')
+        self.assertEqual(data['series'][0]['date'], self.today)
+        self.assertEqual((data['totals']['orders'], data['totals']['units'], data['totals']['revenue']), (2, 4, '40.00'))
+
+        ranking = self.api_for(self.other.user).get('/api/analytics/sales/by-product/').data
+        self.assertEqual([(row['name'], row['units']) for row in ranking], [('Libro', 1)])
+
+    def test_canceled_orders_cannot_be_delivered(self):
+        canceled = self.buy((self.pen, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.buyer.post(f'/api/orders/{canceled}/cancel_order/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api_for(self.vendor.user).post(f'/api/orders/{canceled}/mark-delivered/')
+        self.assertEqual(response.status_code, 400)
+
+        order = Order.objects.get(pk=canceled)
+        self.assertEqual(order.status, 'canceled')
+        market = DailyMarketplaceSales.objects.get()
+        self.assertEqual((market.orders, market.delivered_orders), (0, 0))
+
+        order.status = 'delivered'  # El admin tampoco (formulario -> full_clean)
+        with self.assertRaises(ValidationError):
+            order.full_clean()
+
+    def test_saving_a_loaded_order_does_not_reread_its_status(self):
+        order = Order.objects.get(pk=self.buy((self.pen, 2)))
+        order.status = 'delivered'
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            order.save()
+
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT "orders_order"."status"')])
+        self.assertEqual(DailyMarketplaceSales.objects.get().delivered_orders, 1)
+
+        order.status = 'canceled'  # Un segundo save() del mismo objeto parte de 'delivered'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        market = DailyMarketplaceSales.objects.get()
+        self.assertEqual((market.orders, market.delivered_orders), (0, 0))
+
+    def test_failed_increment_logs_the_day_and_the_order(self):
+        with mock.patch.object(rollups, 'upsert_increment', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('apps.analytics.rollups', 'ERROR') as logs:
+            order_id = self.buy((self.pen, 1))
+
+        self.assertIn(f'del {self.today} (pedido #{order_id})', logs.output[0])
+        self.assertIn(f'--start {self.today} --end {self.today}', logs.output[0])
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.buy((self.pen, 2), (self.book, 1))
+        order_id = self.buy((self.book, 3))
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.get(pk=order_id)
+            order.status = 'delivered'
+            order.save()
+        incremental = self.snapshot()
+
+        DailyVendorSales.objects.update(orders=99)
+        call_command('rebuild_sales_rollups', stdout=io.StringIO())
+
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_vendors_only_see_their_own_sales(self):
+        vendor_api = self.api_for(self.vendor.user)
+        self.assertEqual(vendor_api.get('/api/analytics/sales/', {'vendor': self.other.id}).status_code, 403)
+        self.assertEqual(vendor_api.get('/api/analytics/sales/', {'product': self.book.id}).status_code, 403)
+        self.assertEqual(vendor_api.get('/api/analytics/sales/', {'start': '2025-01-01', 'end': '2026-12-31'}).status_code, 400)
+        self.assertEqual(vendor_api.get('/api/analytics/sales/', {'start': '2025-02-30'}).status_code, 400)
+
+        no_profile = User.objects.create_user('sin_perfil', password='x')
+        no_profile.profile.delete()
+        response = self.api_for(User.objects.get(pk=no_profile.pk)).get('/api/analytics/sales/')
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create_user('admin', password='x')
+        admin.profile.role = 'admin'
+        admin.profile.save()
+        data = self.api_for(admin).get('/api/analytics/sales/').data
+        self.assertEqual((data['scope'], len(data['series'])), ('marketplace', 30))
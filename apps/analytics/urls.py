@@ -0,0 +1,8 @@
+# En: apps/analytics/urls.py
+from rest_framework.routers import DefaultRouter
+from .views import SalesAnalyticsViewSet
+
+router = DefaultRouter()
+router.register(r'analytics/sales', SalesAnalyticsViewSet, basename='sales-analytics')
+
+urlpatterns = router.urls
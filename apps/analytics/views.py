@@ -0,0 +1,169 @@
+# En: apps/analytics/views.py
+
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+from apps.products.models import Product
+from apps.users.permissions import user_role
+from markettec.params import parse_day
+from .models import DailyMarketplaceSales, DailyProductSales, DailyVendorSales
+from .rollups import METRIC_FIELDS
+from .serializers import ProductSalesSerializer, SalesPointSerializer
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+MAX_PRODUCTS = 200
+
+
+def int_param(params, name):
+    try:
+        return int(params[name]) if params.get(name) else None
+    except ValueError:
+        raise ValidationError({name: 'Debe ser un número.'})
+
+
+def date_param(params, name, default):
+    if not params.get(name):
+        return default
+    return parse_day(name, params[name])
+
+
+def parse_range(params):
+    """ start/end inclusive; por default los últimos 30 días. """
+    end = date_param(params, 'end', timezone.localdate())
+    start = date_param(params, 'start', end - timedelta(days=DEFAULT_DAYS - 1))
+    if start > end:
+        raise ValidationError({'start': "'start' no puede ser posterior a 'end'."})
+    if (end - start).days + 1 > MAX_DAYS:
+        raise ValidationError({'start': f'El rango máximo es de {MAX_DAYS} días.'})
+    return start, end
+
+
+def empty_point():
+    return {field: 0 for field in METRIC_FIELDS}
+
+
+RANGE_PARAMETERS = [
+    OpenApiParameter(name='start', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
+                     description=f'Desde (AAAA-MM-DD). Default: hace {DEFAULT_DAYS} días.'),
+    OpenApiParameter(name='end', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
+                     description=f'Hasta, inclusive (AAAA-MM-DD). Default: hoy. Máximo {MAX_DAYS} días.'),
+    OpenApiParameter(name='vendor', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                     description='ID del perfil del vendedor (solo Admin; los vendedores ven lo suyo).'),
+]
+
+
+@extend_schema(tags=['10. Estadísticas de Ventas'])
+class SalesAnalyticsViewSet(viewsets.ViewSet):
+    """
+    Series de ventas por día, leídas de los acumulados (analytics/models.py):
+    cada consulta recorre a lo más un renglón por día del rango, sin importar
+    cuántos pedidos haya en el historial.
+
+    - Vendedores: sus propias ventas (y las de sus productos).
+    - Admins: todo el marketplace, o un vendedor/producto con ?vendor= / ?product=.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def resolve_vendor(self, request):
+        """ ID del vendedor a consultar, o None = todo el marketplace (solo Admin). """
+        requested = int_param(request.query_params, 'vendor')
+        if user_role(request.user) == 'admin':
+            return requested
+        if not hasattr(request.user, 'profile'):
+            raise PermissionDenied('Tu usuario no tiene perfil de vendedor.')
+        own = request.user.profile.id
+        if requested not in (None, own):
+            raise PermissionDenied('Solo puedes ver tus propias ventas.')
+        return own
+
+    @extend_schema(
+        summary="Ventas por Día (Serie de Tiempo)",
+        parameters=RANGE_PARAMETERS + [
+            OpenApiParameter(name='product', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='ID de un producto (tuyo, o cualquiera si eres Admin).'),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def list(self, request):
+        """
+        GET /api/analytics/sales/?start=2025-11-01&end=2025-11-30&product=7
+        Un punto por día del rango (los días sin ventas vienen en cero).
+        """
+        start, end = parse_range(request.query_params)
+        vendor_id = self.resolve_vendor(request)
+        product_id = int_param(request.query_params, 'product')
+
+        if product_id is not None:
+            product = Product.objects.filter(pk=product_id).values('vendor_id').first()
+            if product is None:
+                raise ValidationError({'product': 'El producto no existe.'})
+            if vendor_id is not None and product['vendor_id'] != vendor_id:
+                raise PermissionDenied('Solo puedes ver las ventas de tus productos.')
+            scope, rows = 'product', DailyProductSales.objects.filter(product_id=product_id)
+        elif vendor_id is not None:
+            scope, rows = 'vendor', DailyVendorSales.objects.filter(vendor_id=vendor_id)
+        else:
+            scope, rows = 'marketplace', DailyMarketplaceSales.objects.all()
+
+        by_day = {
+            row['date']: row for row in rows.filter(date__range=(start, end)).values('date', *METRIC_FIELDS)
+        }
+        series, totals = [], empty_point()
+        day = start
+        while day <= end:
+            point = by_day.get(day) or {'date': day, **empty_point()}
+            for field in METRIC_FIELDS:
+                totals[field] += point[field]
+            series.append(point)
+            day += timedelta(days=1)
+
+        return Response({
+            'scope': scope,
+            'vendor': vendor_id,
+            'product': product_id,
+            'start': start,
+            'end': end,
+            'totals': SalesPointSerializer(totals).data,
+            'series': SalesPointSerializer(series, many=True).data,
+        })
+
+    @extend_schema(
+        summary="Ventas por Producto (Ranking del Rango)",
+        parameters=RANGE_PARAMETERS + [
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description=f'Cuántos productos (default 50, máximo {MAX_PRODUCTS}).'),
+        ],
+        responses={200: ProductSalesSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'], url_path='by-product')
+    def by_product(self, request):
+        """
+        GET /api/analytics/sales/by-product/?start=2025-11-01&end=2025-11-30
+        Productos del vendedor (o de todo el marketplace, Admin) ordenados por ingresos.
+        """
+        start, end = parse_range(request.query_params)
+        vendor_id = self.resolve_vendor(request)
+        limit = min(int_param(request.query_params, 'limit') or 50, MAX_PRODUCTS)
+
+        rows = DailyProductSales.objects.filter(date__range=(start, end))
+        if vendor_id is not None:
+            rows = rows.filter(vendor_id=vendor_id)
+        # (Los alias no pueden llamarse igual que los campos del modelo)
+        ranking = rows.values('product_id', 'product__name').annotate(
+            **{f'sum_{field}': Sum(field) for field in METRIC_FIELDS}
+        ).order_by('-sum_revenue', 'product_id')[:max(limit, 1)]
+
+        products = [
+            {'product_id': row['product_id'], 'product__name': row['product__name'],
+             **{field: row[f'sum_{field}'] for field in METRIC_FIELDS}}
+            for row in ranking
+        ]
+        return Response(ProductSalesSerializer(products, many=True).data)
@@ -1,6 +1,7 @@
 # En: apps/audits/models.py
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class AuditLog(models.Model):
@@ -35,6 +36,7 @@ class AuditLog(models.Model):
         on_delete=models.SET_NULL, 
         null=True, 
         blank=True,
+        db_index=False, # Cubierto por 'audit_user_time_idx'
         verbose_name='Usuario'
     )
     
@@ -50,7 +52,8 @@ class AuditLog(models.Model):
     details = models.TextField(blank=True, null=True, verbose_name='Detalles')
     
     # CUÁNDO: La fecha y hora de la acción.
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name='Fecha y Hora')
+    # (default y no auto_now_add: el escritor por lotes guarda la hora del evento, no la del INSERT)
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name='Fecha y Hora')
 
     def __str__(self):
         user_str = self.user.username if self.user else 'Sistema'
@@ -59,4 +62,11 @@ class AuditLog(models.Model):
     class Meta:
         verbose_name = 'Registro de Auditoría'
         verbose_name_plural = 'Registros de Auditoría'
-        ordering = ['-timestamp'] # Mostrar los más recientes primero
\ No newline at end of file
+        ordering = ['-timestamp', '-id'] # Mostrar los más recientes primero
+        indexes = [
+            # Sirven a la paginación por cursor (timestamp, id) con y sin filtros.
+            # El índice por usuario reemplaza al que Django crea solo para la FK.
+            models.Index(fields=['timestamp', 'id'], name='audit_time_idx'),
+            models.Index(fields=['action', 'timestamp', 'id'], name='audit_action_time_idx'),
+            models.Index(fields=['user', 'timestamp', 'id'], name='audit_user_time_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,17 @@
+# En: apps/audits/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class AuditLogCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para la bitácora (los más recientes primero).
+
+    Con OFFSET la página 10,000 obliga a la BD a recorrer 10,000 páginas;
+    con cursor cada página es un 'WHERE timestamp < ...' sobre el índice.
+    El 'id' desempata registros con la misma fecha (llegan por lotes).
+    """
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
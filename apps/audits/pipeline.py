@@ -0,0 +1,226 @@
+# En: apps/audits/pipeline.py
+
+"""
+Escritura asíncrona y por lotes de la bitácora de auditoría.
+
+Antes cada endpoint hacía 'AuditLog.objects.create(...)' dentro del request:
+una escritura más (y una posible espera de lock) en cada petición. Ahora:
+
+    from apps.audits.pipeline import log_action
+    log_action(request.user, 'ORDER_CREATED', f"Nuevo pedido #{order.id}")
+
+1. El evento se arma al momento (la fecha es la de la acción, no la del guardado).
+2. Si estamos dentro de una transacción, entra al búfer cuando ésta se
+   confirma (on_commit); si se revierte, el evento se descarta.
+3. Un hilo en segundo plano vacía el búfer con UN bulk_create cuando se
+   juntan AUDIT_LOG['BATCH_SIZE'] eventos o pasan AUDIT_LOG['FLUSH_INTERVAL'] segundos.
+4. Si la BD está bloqueada (OperationalError) se reintenta con espera; si
+   sigue sin responder, el lote vuelve al frente del búfer para el siguiente
+   vaciado (no se pierde mientras quepa en MAX_PENDING). Si un renglón trae
+   datos inválidos, el lote se guarda uno por uno y solo ése se descarta.
+5. Al apagar el worker (hook worker_exit de gunicorn.conf.py, o atexit) se
+   escribe lo que quede pendiente.
+
+Con AUDIT_LOG['ASYNC'] = False (pruebas, scripts) se escribe en línea,
+igual que antes, pero por la misma API.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ASYNC': True,
+    'BATCH_SIZE': 100,       # Eventos por bulk_create
+    'FLUSH_INTERVAL': 2.0,   # Segundos máximos que un evento espera en memoria
+    'MAX_PENDING': 10000,    # Tope del búfer si la BD no responde (se tiran los más viejos)
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'AUDIT_LOG', {})}
+
+
+# Esperas entre reintentos cuando la BD está bloqueada ("database is locked")
+RETRY_DELAYS = (0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+
+def _insert(entries):
+    """ bulk_create reintentando mientras la BD esté bloqueada. False si nunca se pudo. """
+    for delay in (*RETRY_DELAYS, None):
+        try:
+            AuditLog.objects.bulk_create(entries)
+            return True
+        except OperationalError:
+            if delay is None:
+                logger.exception('La BD no aceptó %d registros de auditoría tras varios intentos.', len(entries))
+                return False
+            time.sleep(delay)
+
+
+def write_entries(entries):
+    """
+    Guarda una lista de AuditLog en una sola consulta, reintentando si la BD
+    está bloqueada. Si el lote trae un renglón inválido (ej. su usuario se
+    borró antes del vaciado) se guardan uno por uno y solo ése se descarta.
+
+    Regresa los registros que siguen pendientes por BD bloqueada (lista
+    vacía si no queda nada por reintentar). Nunca rompe al llamador.
+    """
+    if not entries:
+        return []
+    try:
+        return [] if _insert(entries) else list(entries)
+    except Exception:
+        # IntegrityError / DataError: el INSERT completo se revirtió
+        logger.warning('Un lote de %d registros de auditoría trae datos inválidos: se guarda uno por uno.', len(entries))
+
+    for index, entry in enumerate(entries):
+        try:
+            if not _insert([entry]):
+                return list(entries[index:])
+        except Exception:
+            logger.exception('Se descartó el registro de auditoría %s (usuario %s): %s',
+                             entry.action, entry.user_id, entry.details)
+    return []
+
+
+class AuditBuffer:
+    """ Búfer del proceso + hilo que lo vacía. """
+
+    def __init__(self, batch_size, flush_interval, max_pending):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._pid = None
+
+    def add(self, entry):
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                logger.warning('Búfer de auditoría lleno: se descartó el evento más viejo.')
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Escribe TODO lo pendiente (en lotes de batch_size). Si la BD no dejó
+        guardar un lote, lo que faltó de él y los que siguen regresan al
+        frente del búfer.
+        Regresa True si quedó vacío.
+        """
+        with self._lock:
+            entries = list(self._pending)
+            self._pending.clear()
+        for start in range(0, len(entries), self.batch_size):
+            end = start + self.batch_size
+            unsaved = write_entries(entries[start:end])
+            if unsaved:
+                self._requeue(unsaved + entries[end:])
+                return False
+        return True
+
+    def _requeue(self, entries):
+        with self._lock:
+            self._pending.extendleft(reversed(entries))
+            dropped = 0
+            while len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                dropped += 1
+        if dropped:
+            logger.warning('Búfer de auditoría lleno: se descartaron %d eventos viejos.', dropped)
+
+    def stop(self):
+        """ Apagado del worker: despierta al hilo y escribe lo que quede. """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        if not self.flush():
+            logger.error('Se perdieron %d registros de auditoría al apagar el worker.', len(self._pending))
+
+    def _ensure_thread(self):
+        # Tras un fork (gunicorn --preload) el hilo del padre no existe en el hijo
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+        close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = get_config()
+                _buffer = AuditBuffer(config['BATCH_SIZE'], config['FLUSH_INTERVAL'], config['MAX_PENDING'])
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def flush():
+    """ Fuerza la escritura de lo pendiente (útil en comandos y pruebas). """
+    if _buffer is not None:
+        _buffer.flush()
+
+
+def shutdown():
+    """ Apagado del proceso (hook worker_exit de gunicorn): escribe lo pendiente. """
+    if _buffer is not None:
+        _buffer.stop()
+
+
+def log_action(user, action, details=''):
+    """
+    Registra una acción en la bitácora.
+    'user' puede ser un User, su id, o None (acción del sistema).
+    """
+    entry = AuditLog(
+        user_id=getattr(user, 'pk', user),
+        action=action,
+        details=details,
+        timestamp=timezone.now(),
+    )
+
+    if get_config()['ASYNC']:
+        enqueue = lambda: get_buffer().add(entry)
+    else:
+        enqueue = lambda: write_entries([entry])
+
+    # Fuera de un atomic se ejecuta al instante
+    transaction.on_commit(enqueue)
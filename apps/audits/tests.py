@@ -1,3 +1,232 @@
-from django.test import TestCase
+import json
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import pipeline
+from .models import AuditLog
+
+
+class LogActionTests(TestCase):
+
+    def test_written_on_commit_and_dropped_on_rollback(self):
+        user = User.objects.create_user('ana', password='x')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                pipeline.log_action(user, 'ORDER_CREATED', 'Pedido #1')
+                self.assertFalse(AuditLog.objects.exists())  # Todavía no se confirma
+
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    pipeline.log_action(user, 'ORDER_CREATED', 'Pedido #2')
+                    raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(list(AuditLog.objects.values_list('user', 'details')), [(user.id, 'Pedido #1')])
+
+    def test_registration_writes_a_single_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/api/register/', {
+                'username': 'nuevo', 'email': 'nuevo@example.com', 'first_name': 'Nuevo',
+                'password': 'Secreta123!', 'password2': 'Secreta123!',
+                'control_number': '20201234', 'career': 'Sistemas',
+                'phone_number': '5512345678', 'date_of_birth': '2000-01-01',
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(AuditLog.objects.filter(action='USER_REGISTERED').count(), 1)
+
+
+class AuditBufferTests(TestCase):
+
+    def test_flush_writes_pending_events_in_batches(self):
+        buffer = pipeline.AuditBuffer(batch_size=3, flush_interval=60, max_pending=100)
+        buffer._ensure_thread = lambda: None  # Sin hilo: vaciamos a mano
+        for n in range(5):
+            buffer.add(AuditLog(action='ORDER_CREATED', details=str(n)))
+
+        with CaptureQueriesContext(connection) as queries:
+            buffer.flush()
+
+        self.assertEqual(len(queries), 2)  # 3 + 2
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+    def test_full_buffer_drops_oldest(self):
+        buffer = pipeline.AuditBuffer(batch_size=100, flush_interval=60, max_pending=2)
+        buffer._ensure_thread = lambda: None
+        with self.assertLogs('apps.audits.pipeline', 'WARNING'):
+            for n in range(3):
+                buffer.add(AuditLog(action='ORDER_CREATED', details=str(n)))
+        buffer.flush()
+
+        self.assertEqual(sorted(AuditLog.objects.values_list('details', flat=True)), ['1', '2'])
+
+    def test_locked_database_is_retried(self):
+        original = AuditLog.objects.bulk_create
+        attempts = []
+
+        def locked_twice(entries):
+            attempts.append(len(entries))
+            if len(attempts) <= 2:
+                raise OperationalError('database is locked')
+            return original(entries)
+
+        with mock.patch.object(pipeline, 'RETRY_DELAYS', (0, 0, 0)), \
+                mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=locked_twice):
+            self.assertEqual(pipeline.write_entries([AuditLog(action='USER_LOGIN')]), [])
+
+        self.assertEqual(attempts, [1, 1, 1])
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_failed_batches_go_back_to_the_buffer_in_order(self):
+        buffer = pipeline.AuditBuffer(batch_size=2, flush_interval=60, max_pending=100)
+        buffer._ensure_thread = lambda: None
+        for n in range(5):
+            buffer.add(AuditLog(action='ORDER_CREATED', details=str(n)))
+
+        batches = []
+
+        def second_batch_fails(batch):
+            batches.append(batch)
+            return batch if len(batches) == 2 else []
+
+        with mock.patch.object(pipeline, 'write_entries', side_effect=second_batch_fails):
+            self.assertFalse(buffer.flush())  # El segundo lote falla: regresan 2, 3 y 4
+
+        self.assertEqual([entry.details for entry in buffer._pending], ['2', '3', '4'])
+        self.assertTrue(buffer.flush())
+        self.assertEqual(sorted(AuditLog.objects.values_list('details', flat=True)), ['2', '3', '4'])
+
+    @override_settings(AUDIT_LOG={'ASYNC': True})
+    def test_async_mode_goes_through_the_buffer(self):
+        added = []
+        original, pipeline._buffer = pipeline._buffer, type('Fake', (), {'add': lambda self, e: added.append(e)})()
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                pipeline.log_action(None, 'USER_LOGIN')
+        finally:
+            pipeline._buffer = original
+
+        self.assertEqual([entry.action for entry in added], ['USER_LOGIN'])
+        self.assertFalse(AuditLog.objects.exists())
+
+
+class AuditWriteErrorTests(TransactionTestCase):
+    """ Sin transacción de prueba: SQLite revisa las llaves foráneas al confirmar. """
+
+    def test_an_invalid_row_does_not_drop_the_rest_of_the_batch(self):
+        gone = User.objects.create_user('borrado', password='x')
+        entries = [
+            AuditLog(action='USER_LOGIN', details='antes'),
+            AuditLog(user_id=gone.pk, action='USER_LOGIN', details='huérfano'),
+            AuditLog(action='USER_LOGIN', details='después'),
+        ]
+        gone.delete()  # Se borró mientras sus eventos esperaban en el búfer
+
+        with self.assertLogs('apps.audits.pipeline', 'WARNING') as logs:
+            self.assertEqual(pipeline.write_entries(entries), [])
+
+        self.assertEqual(sorted(AuditLog.objects.values_list('details', flat=True)), ['antes', 'después'])
+        self.assertIn('huérfano', logs.output[-1])
+
+    def test_rows_left_by_a_locked_database_are_returned_for_retry(self):
+        original = AuditLog.objects.bulk_create
+        calls = []
+
+        def invalid_then_locked(entries):
+            calls.append(len(entries))
+            if len(calls) == 1:
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            if len(calls) > 2:
+                raise OperationalError('database is locked')
+            return original(entries)
+
+        entries = [AuditLog(action='USER_LOGIN', details=str(n)) for n in range(3)]
+        with mock.patch.object(pipeline, 'RETRY_DELAYS', ()), \
+                mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=invalid_then_locked), \
+                self.assertLogs('apps.audits.pipeline', 'WARNING'):
+            unsaved = pipeline.write_entries(entries)
+
+        # El primero entró uno por uno; los otros dos se reintentan (no se tiran ni se duplican)
+        self.assertEqual([entry.details for entry in unsaved], ['1', '2'])
+        self.assertEqual(list(AuditLog.objects.values_list('details', flat=True)), ['0'])
+
+
+class AuditLogApiTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', password='x')
+        self.admin.profile.role = 'admin'
+        self.admin.profile.save()
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+        self.other = User.objects.create_user('otro', password='x')
+        AuditLog.objects.bulk_create([
+            AuditLog(user=self.other if n % 2 else self.admin, action='ORDER_CREATED' if n % 3 else 'USER_BANNED',
+                     details=str(n), timestamp=timezone.make_aware(datetime(2025, 11, 1 + n)))
+            for n in range(9)
+        ])
+
+    def get(self, url='/api/audits/', **params):
+        response = self.api.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_cursor_pages_newest_first_with_constant_queries(self):
+        seen = []
+        url = '/api/audits/?page_size=4'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.get(url)
+            self.assertEqual(len(queries), 1)  # Sin consulta extra por el username
+            seen += [entry['details'] for entry in page['results']]
+            url = page['next']
+
+        self.assertEqual(seen, [str(n) for n in reversed(range(9))])
+
+    def test_filters(self):
+        page = self.get(action='USER_BANNED', user=self.admin.id)
+        self.assertEqual([entry['details'] for entry in page['results']], ['6', '0'])
+
+        page = self.get(since='2025-11-03', until='2025-11-04')
+        self.assertEqual([entry['details'] for entry in page['results']], ['3', '2'])
+
+        response = self.api.get('/api/audits/', {'since': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_well_formed_but_impossible_dates_are_a_400(self):
+        urls = ['/api/audits/', '/api/audits/export/', '/api/orders/export/', '/api/reports/export/']
+        for url in urls:
+            for params in ({'since': '2025-02-30'}, {'until': '2025-13-01T10:00:00'}):
+                with self.subTest(url=url, **params):
+                    response = self.api.get(url, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(next(iter(params)), response.data)
+
+    def test_streaming_export_csv_and_ndjson_with_filters(self):
+        AuditLog.objects.filter(details='6').update(details='=HYPERLINK("x")')
+
+        response = self.api.get('/api/audits/export/', {'action': 'USER_BANNED'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Disposition'].endswith('.csv"'))
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'id,fecha,usuario_id,usuario,accion,detalles')
+        self.assertEqual([line.rsplit(',', 1)[1] for line in lines[1:]], ['"\'=HYPERLINK(""x"")"', '3', '0'])
+
+        response = self.api.get('/api/audits/export/', {'format': 'ndjson', 'user': self.other.id, 'until': '2025-11-04'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['usuario'], row['detalles']) for row in rows], [('otro', '3'), ('otro', '1')])
+
+        self.api.force_authenticate(self.other)
+        self.assertEqual(self.api.get('/api/audits/export/').status_code, 403)
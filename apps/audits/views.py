@@ -1,18 +1,81 @@
 # En: apps/audits/views.py
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from .models import AuditLog
+from .pagination import AuditLogCursorPagination
 from .serializers import AuditLogSerializer
 from apps.users.permissions import IsAdminUser # ¡Reutilizamos nuestro permiso!
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
+from markettec.exports import EXPORT_RENDERERS, stream_export
+from markettec.params import parse_moment
 
+
+AUDIT_FILTERS = [
+    OpenApiParameter(name='action', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                     description="Ej. 'ORDER_CREATED'."),
+    OpenApiParameter(name='user', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                     description='ID del usuario que hizo la acción.'),
+    OpenApiParameter(name='since', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                     description='Desde (AAAA-MM-DD o fecha y hora ISO).'),
+    OpenApiParameter(name='until', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                     description='Hasta, inclusive (AAAA-MM-DD o fecha y hora ISO).'),
+]
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Bitácora de Auditoría (Paginada por Cursor)",
+        parameters=AUDIT_FILTERS
+    ),
+    retrieve=extend_schema(summary="Detalle de Registro de Auditoría"),
+)
 @extend_schema(tags=['8. Auditoría (Admin)'])
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Endpoint de API de SOLO LECTURA para que los Admins
     consulten la bitácora de auditoría.
+    - GET /api/audits/?action=USER_BANNED&user=3&since=2025-11-01&until=2025-11-30
     """
-    queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
+    pagination_class = AuditLogCursorPagination
     
     # ¡Solo los Administradores pueden ver la bitácora!
-    permission_classes = [IsAdminUser]
\ No newline at end of file
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        """ Filtros opcionales; cada combinación cae en un índice (ver AuditLog.Meta). """
+        # select_related: el username sale en el mismo JOIN (no 1 consulta por fila)
+        queryset = AuditLog.objects.select_related('user')
+        params = self.request.query_params
+
+        if params.get('action'):
+            queryset = queryset.filter(action=params['action'])
+        if params.get('user'):
+            try:
+                queryset = queryset.filter(user_id=int(params['user']))
+            except ValueError:
+                raise ValidationError({'user': 'Debe ser un número.'})
+        if params.get('since'):
+            queryset = queryset.filter(timestamp__gte=parse_moment('since', params['since']))
+        if params.get('until'):
+            queryset = queryset.filter(timestamp__lte=parse_moment('until', params['until'], end_of_day=True))
+        return queryset
+
+    @extend_schema(
+        summary="Exportar Bitácora (CSV / NDJSON en Streaming)",
+        description="Mismos filtros que la lista. Formato con ?format=csv|ndjson o el header Accept.",
+        parameters=AUDIT_FILTERS,
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """ GET /api/audits/export/?action=USER_BANNED&since=2025-11-01 """
+        return stream_export(request, self.get_queryset(), [
+            ('id', 'id'),
+            ('fecha', 'timestamp'),
+            ('usuario_id', 'user_id'),
+            ('usuario', 'user__username'),
+            ('accion', 'action'),
+            ('detalles', 'details'),
+        ], 'bitacora')
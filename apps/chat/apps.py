@@ -1,5 +1,11 @@
+# En: apps/chat/apps.py
+
 from django.apps import AppConfig
 
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.chat'
\ No newline at end of file
+    name = 'apps.chat'
+
+    def ready(self):
+        # Signals que mantienen la bandeja (último mensaje y no-leídos) al borrar mensajes
+        import apps.chat.signals
@@ -0,0 +1,185 @@
+# En: apps/chat/consumers.py
+
+"""
+WebSocket del chat (ASGI puro, montado en markettec/asgi.py).
+
+Conexión:
+    ws://<host>/ws/chat/?token=<access_token>
+    (o el header 'Authorization: Bearer <access_token>')
+
+Servidor -> cliente:
+    {"type": "message.new", "conversation_id": 1, "message": {...}}
+    {"type": "message.read", "conversation_id": 1, "reader_id": 5, "marked": 3}
+    {"type": "typing", "conversation_id": 1, "user_id": 5, "is_typing": true}
+
+Cliente -> servidor:
+    {"type": "typing", "conversation_id": 1, "is_typing": true}
+    {"type": "read", "conversation_id": 1}
+    {"type": "ping"}
+
+Los mensajes se siguen ENVIANDO con POST /api/messages/ (guardan archivos,
+validan, etc.); el socket solo los empuja en tiempo real.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import Q
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import events
+from .layers import get_channel_layer
+from .models import Conversation
+
+# Códigos de cierre (rango 4000-4999 reservado para la aplicación)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+
+
+def database_sync_to_async(func):
+    """ Como sync_to_async, pero sin dejar conexiones viejas abiertas. """
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=True)
+
+
+def get_raw_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+
+    headers = dict(scope.get('headers', []))
+    auth = headers.get(b'authorization', b'').decode().split()
+    if len(auth) == 2 and auth[0] in jwt_settings.AUTH_HEADER_TYPES:
+        return auth[1]
+    return None
+
+
+@database_sync_to_async
+def authenticate(raw_token):
+    """ Valida el access token de SimpleJWT y regresa el Profile (o None). """
+    from apps.users.models import Profile
+
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    return Profile.objects.select_related('user').filter(
+        user_id=user_id, user__is_active=True
+    ).first()
+
+
+@database_sync_to_async
+def find_conversation(conversation_id, profile_id):
+    """ La conversación solo si el perfil participa en ella. """
+    return Conversation.objects.only('id', 'user_a_id', 'user_b_id').filter(
+        Q(user_a_id=profile_id) | Q(user_b_id=profile_id), pk=conversation_id
+    ).first()
+
+
+@database_sync_to_async
+def mark_read(conversation, profile_id):
+    marked = conversation.mark_read(profile_id)
+    events.messages_read(conversation, profile_id, marked)
+    return marked
+
+
+class ChatConsumer:
+    """ Aplicación ASGI para 'websocket'. Un objeto sirve a todas las conexiones. """
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        raw_token = get_raw_token(scope)
+        profile = await authenticate(raw_token) if raw_token else None
+        if profile is None:
+            await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+            return
+        if profile.is_banned:
+            await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+            return
+
+        await send({'type': 'websocket.accept'})
+        await ChatSession(profile, send).run(receive)
+
+
+class ChatSession:
+    """ Estado de UNA conexión: su suscripción y los chats que ya validamos. """
+
+    def __init__(self, profile, send):
+        self.profile = profile
+        self.send = send
+        self.layer = get_channel_layer()
+        self.conversations = {}  # id -> Conversation (membresía ya verificada)
+
+    async def run(self, receive):
+        subscription = self.layer.subscribe(events.profile_group(self.profile.pk))
+        pusher = asyncio.ensure_future(self.push(subscription))
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] == 'websocket.receive':
+                    await self.handle(message.get('text') or (message.get('bytes') or b'').decode())
+        finally:
+            self.layer.unsubscribe(subscription)
+            pusher.cancel()
+
+    async def push(self, subscription):
+        """ Todo lo que llega al grupo del usuario se manda por el socket. """
+        while True:
+            event = await subscription.get()
+            await self.send_json(event)
+
+    async def send_json(self, data):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(data, default=str)})
+
+    async def handle(self, text):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return await self.send_json({'type': 'error', 'detail': 'JSON inválido.'})
+        if not isinstance(data, dict):
+            return await self.send_json({'type': 'error', 'detail': 'Se esperaba un objeto JSON.'})
+
+        kind = data.get('type')
+        if kind == 'ping':
+            return await self.send_json({'type': 'pong'})
+
+        if kind not in ('typing', 'read'):
+            return await self.send_json({'type': 'error', 'detail': f"Tipo de evento desconocido: '{kind}'."})
+
+        conversation = await self.get_conversation(data.get('conversation_id'))
+        if conversation is None:
+            return await self.send_json({'type': 'error', 'detail': 'No perteneces a este chat.'})
+
+        if kind == 'typing':
+            events.typing(conversation, self.profile.pk, bool(data.get('is_typing', True)))
+        else:
+            await mark_read(conversation, self.profile.pk)
+
+    async def get_conversation(self, conversation_id):
+        try:
+            conversation_id = int(conversation_id)
+        except (TypeError, ValueError):
+            return None
+        if conversation_id not in self.conversations:
+            conversation = await find_conversation(conversation_id, self.profile.pk)
+            if conversation is None:
+                return None
+            self.conversations[conversation_id] = conversation
+        return self.conversations[conversation_id]
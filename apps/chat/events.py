@@ -0,0 +1,68 @@
+# En: apps/chat/events.py
+
+"""
+Eventos en tiempo real que se empujan a los sockets (ver consumers.py).
+
+Cada perfil escucha su propio grupo 'chat.profile.<id>', así un usuario
+recibe lo de TODOS sus chats (incluso los que se crean después de conectarse).
+
+Los eventos que salen de una escritura se publican con on_commit:
+si la transacción se revierte, nadie recibe un mensaje fantasma.
+"""
+
+from django.db import transaction
+
+from .layers import get_channel_layer
+
+MESSAGE_NEW = 'message.new'
+MESSAGE_READ = 'message.read'
+TYPING = 'typing'
+
+
+def profile_group(profile_id):
+    return f'chat.profile.{profile_id}'
+
+
+def publish_to_participants(conversation, payload, exclude=None):
+    layer = get_channel_layer()
+    for profile_id in (conversation.user_a_id, conversation.user_b_id):
+        if profile_id != exclude:
+            layer.publish(profile_group(profile_id), payload)
+
+
+def message_created(message, conversation, request=None):
+    """
+    Nuevo mensaje: le llega a ambos participantes (el remitente lo ve en sus otros dispositivos).
+    Con el request de la petición que lo creó, las URLs de foto y audio salen
+    absolutas, igual que en GET /api/messages/.
+    """
+    from .serializers import MessageSerializer
+
+    payload = {
+        'type': MESSAGE_NEW,
+        'conversation_id': conversation.pk,
+        'message': MessageSerializer(message, context={'request': request}).data,
+    }
+    transaction.on_commit(lambda: publish_to_participants(conversation, payload))
+
+
+def messages_read(conversation, reader_id, marked):
+    """ Confirmación de lectura: el otro participante ve las palomitas azules. """
+    payload = {
+        'type': MESSAGE_READ,
+        'conversation_id': conversation.pk,
+        'reader_id': reader_id,
+        'marked': marked,
+    }
+    transaction.on_commit(lambda: publish_to_participants(conversation, payload))
+
+
+def typing(conversation, profile_id, is_typing=True):
+    """ 'Escribiendo...': solo al otro participante, no toca la BD. """
+    payload = {
+        'type': TYPING,
+        'conversation_id': conversation.pk,
+        'user_id': profile_id,
+        'is_typing': is_typing,
+    }
+    publish_to_participants(conversation, payload, exclude=profile_id)
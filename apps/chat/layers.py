@@ -0,0 +1,120 @@
+# En: apps/chat/layers.py
+
+"""
+Capa de canales (pub/sub) para el chat en tiempo real.
+
+La capa es intercambiable desde settings:
+
+    CHAT_CHANNEL_LAYER = {
+        'BACKEND': 'apps.chat.layers.InMemoryChannelLayer',
+        'OPTIONS': {'capacity': 100},
+    }
+
+InMemoryChannelLayer vive dentro del proceso: sirve para desarrollo, pruebas
+y despliegues de UN solo worker ASGI (no necesita Redis). Un evento solo le
+llega a los sockets del proceso que atendió la petición HTTP, así que con
+varios workers (o HTTP y WebSockets en procesos distintos) hay que escribir un
+backend compartido (ej. Redis pub/sub) que implemente la misma interfaz de
+BaseChannelLayer y declare shared = True. gunicorn.conf.py no arranca más de
+un worker con una capa que no sea compartida.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseChannelLayer:
+    """
+    Interfaz mínima:
+    - subscribe(*groups): se llama DENTRO del event loop; regresa una Subscription.
+    - unsubscribe(subscription)
+    - publish(group, message): síncrono y seguro desde cualquier hilo
+      (las vistas de DRF corren en hilos, los sockets en el event loop).
+    shared: True si todos los procesos ven los mismos grupos (ej. Redis).
+    """
+    shared = False
+
+    def subscribe(self, *groups):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, group, message):
+        raise NotImplementedError
+
+
+class Subscription:
+    """ Buzón de un socket conectado. Se lee con 'await subscription.get()'. """
+
+    def __init__(self, groups, capacity):
+        self.groups = set(groups)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=capacity)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def deliver(self, message):
+        """ Puede llamarse desde cualquier hilo. """
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # El loop ya se cerró: el socket se desconectó
+
+    def _put(self, message):
+        if self._queue.full():
+            # Cliente lento: tiramos el evento más viejo para no crecer sin límite
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+
+class InMemoryChannelLayer(BaseChannelLayer):
+    """ Pub/sub en memoria del proceso (sin Redis). """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._groups = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, *groups):
+        subscription = Subscription(groups, self.capacity)
+        with self._lock:
+            for group in groups:
+                self._groups[group].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for group in subscription.groups:
+                members = self._groups.get(group)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del self._groups[group]
+
+    def publish(self, group, message):
+        with self._lock:
+            members = list(self._groups.get(group, ()))
+        for subscription in members:
+            subscription.deliver(message)
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_channel_layer():
+    """ Regresa la capa configurada en settings.CHAT_CHANNEL_LAYER (una por proceso). """
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                config = getattr(settings, 'CHAT_CHANNEL_LAYER', {})
+                backend = import_string(config.get('BACKEND', 'apps.chat.layers.InMemoryChannelLayer'))
+                _layer = backend(**config.get('OPTIONS', {}))
+    return _layer
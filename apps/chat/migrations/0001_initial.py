@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:40
+
+# Las tablas de chat existían antes que esta migración (la app no tenía
+# migraciones). En una BD que ya las tiene, aplicar con:
+#     python manage.py migrate chat --fake-initial
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0005_profile_ban_reason'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to='users.profile')),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to='users.profile')),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+                'unique_together': {('user_a', 'user_b')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(blank=True, null=True)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='chat/images/')),
+                ('audio', models.FileField(blank=True, null=True, upload_to='chat/audio/')),
+                ('location', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_read', models.BooleanField(default=False)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='chat.conversation')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.profile')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_inbox(apps, schema_editor):
+    """ Llena último mensaje, vista previa y no-leídos de los chats existentes. """
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+    db = schema_editor.connection.alias
+
+    for conversation in Conversation.objects.using(db).iterator():
+        messages = Message.objects.using(db).filter(conversation_id=conversation.pk)
+        last = messages.order_by('-created_at', '-id').first()
+        if last is None:
+            continue
+
+        if last.text:
+            preview = last.text[:120]
+        elif last.image:
+            preview = '[Foto]'
+        elif last.audio:
+            preview = '[Audio]'
+        elif last.location:
+            preview = '[Ubicación]'
+        else:
+            preview = ''
+
+        unread = messages.filter(is_read=False)
+        Conversation.objects.using(db).filter(pk=conversation.pk).update(
+            last_message_id=last.pk,
+            last_message_preview=preview,
+            last_message_at=last.created_at,
+            unread_count_a=unread.exclude(sender_id=conversation.user_a_id).count(),
+            unread_count_b=unread.exclude(sender_id=conversation.user_b_id).count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        ('users', '0005_profile_ban_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_count_a',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_count_b',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_a', '-updated_at'], name='chat_conv_user_a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_b', '-updated_at'], name='chat_conv_user_b_idx'),
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
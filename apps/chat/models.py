@@ -1,6 +1,11 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
+from django.utils import timezone
 from apps.users.models import Profile
 
+# Largo máximo de la vista previa del último mensaje
+PREVIEW_LENGTH = 120
+
 class Conversation(models.Model):
     """
     Representa la 'Sala de Chat' entre dos usuarios.
@@ -10,14 +15,112 @@ class Conversation(models.Model):
     
     updated_at = models.DateTimeField(auto_now=True) # Para ordenar por el chat más reciente
 
+    # --- DATOS DESNORMALIZADOS (para la bandeja de chats) ---
+    # Se actualizan en la MISMA escritura que crea el mensaje (ver record_message),
+    # así GET /api/chat/ no tiene que buscar el último mensaje de cada chat.
+    last_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default='')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    # Mensajes sin leer para cada participante
+    unread_count_a = models.PositiveIntegerField(default=0) # No leídos por user_a
+    unread_count_b = models.PositiveIntegerField(default=0) # No leídos por user_b
+
     class Meta:
         # Evitamos duplicados: Solo puede haber una conversación entre A y B
         unique_together = ('user_a', 'user_b')
         ordering = ['-updated_at']
+        indexes = [
+            # La bandeja filtra por participante y ordena por fecha
+            models.Index(fields=['user_a', '-updated_at'], name='chat_conv_user_a_idx'),
+            models.Index(fields=['user_b', '-updated_at'], name='chat_conv_user_b_idx'),
+        ]
 
     def __str__(self):
         return f"Chat: {self.user_a} <-> {self.user_b}"
 
+    # --- Helpers de participantes ---
+
+    def unread_field_for(self, profile_id):
+        """ Nombre del contador de no-leídos del participante indicado. """
+        return 'unread_count_a' if profile_id == self.user_a_id else 'unread_count_b'
+
+    def recipient_field_for(self, sender_id):
+        """ Contador que sube cuando 'sender_id' manda un mensaje (el del otro). """
+        return 'unread_count_b' if sender_id == self.user_a_id else 'unread_count_a'
+
+    def unread_count_for(self, profile_id):
+        return getattr(self, self.unread_field_for(profile_id))
+
+    def other_participant(self, profile_id):
+        """ El OTRO usuario del chat (con el que estás hablando). """
+        return self.user_b if profile_id == self.user_a_id else self.user_a
+
+    # --- Escrituras atómicas ---
+    # Todas escriben en el alias indicado o, si no, en el que da el router para
+    # escribir: la conversación pudo haberse leído de la réplica.
+
+    def write_db(self, using=None):
+        return using or router.db_for_write(Conversation, instance=self)
+
+    def record_message(self, message, using=None):
+        """
+        Actualiza puntero al último mensaje, vista previa y el contador de
+        no-leídos del destinatario en UN solo UPDATE (con F(), sin carreras).
+        Por default va a la misma base que el mensaje recién guardado.
+        """
+        using = self.write_db(using or message._state.db)
+        recipient_field = self.recipient_field_for(message.sender_id)
+        now = timezone.now()
+        Conversation.objects.using(using).filter(pk=self.pk).update(
+            last_message=message,
+            last_message_preview=message.preview(),
+            last_message_at=message.created_at,
+            updated_at=now,
+            **{recipient_field: F(recipient_field) + 1}
+        )
+
+    def mark_read(self, profile_id, using=None):
+        """
+        Marca como leídos los mensajes que recibió 'profile_id' y pone su
+        contador en cero (ambos en la misma transacción, para que el contador
+        no quede desfasado si falla el segundo UPDATE). Regresa cuántos
+        mensajes se marcaron.
+        """
+        using = self.write_db(using)
+        with transaction.atomic(using=using):
+            marked = Message.objects.using(using).filter(
+                conversation_id=self.pk, is_read=False
+            ).exclude(sender_id=profile_id).update(is_read=True)
+            Conversation.objects.using(using).filter(pk=self.pk).update(**{self.unread_field_for(profile_id): 0})
+        return marked
+
+    def forget_message(self, message, using=None):
+        """
+        Deshace lo que record_message() hizo por un mensaje que se borró:
+        baja el contador si no estaba leído y, si era el último, la vista
+        previa pasa al mensaje anterior.
+        """
+        using = self.write_db(using)
+        conversations = Conversation.objects.using(using).filter(pk=self.pk)
+        with transaction.atomic(using=using):
+            if not message.is_read:
+                field = self.recipient_field_for(message.sender_id)
+                conversations.filter(**{f'{field}__gt': 0}).update(**{field: F(field) - 1})
+
+            # on_delete=SET_NULL ya soltó el puntero si el borrado era el último
+            if self.last_message_id is None:
+                latest = Message.objects.using(using).filter(
+                    conversation_id=self.pk
+                ).order_by('-created_at', '-id').first()
+                conversations.update(
+                    last_message=latest,
+                    last_message_preview=latest.preview() if latest else '',
+                    last_message_at=latest.created_at if latest else None,
+                )
+
 class Message(models.Model):
     """
     Cada mensaje individual dentro de la conversación.
@@ -40,6 +143,22 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at'] # Orden cronológico (antiguos primero)
+        indexes = [
+            # Paginación por cursor: (chat, fecha, id) sin OFFSET ni ordenar en memoria
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chat_msg_conv_created_idx'),
+        ]
 
     def __str__(self):
-        return f"Msg de {self.sender} en Chat {self.conversation.id}"
\ No newline at end of file
+        return f"Msg de {self.sender} en Chat {self.conversation_id}"
+
+    def preview(self):
+        """ Texto corto para la lista de chats (o el tipo de adjunto). """
+        if self.text:
+            return self.text[:PREVIEW_LENGTH]
+        if self.image:
+            return '[Foto]'
+        if self.audio:
+            return '[Audio]'
+        if self.location:
+            return '[Ubicación]'
+        return ''
\ No newline at end of file
@@ -0,0 +1,146 @@
+# En: apps/chat/pagination.py
+
+"""
+Paginación por cursor (keyset) para los mensajes de un chat.
+
+En lugar de OFFSET usamos la posición (created_at, id) del mensaje, que está
+cubierta por el índice (conversation, created_at, id): cada página cuesta lo
+mismo aunque el chat tenga miles de mensajes.
+
+Parámetros (GET /api/messages/?conversation_id=1&...):
+    (nada)          -> los 'page_size' mensajes MÁS RECIENTES.
+    since_id=<id>   -> solo los mensajes NUEVOS después de ese mensaje.
+    before_id=<id>  -> mensajes ANTERIORES a ese (scroll hacia atrás).
+    cursor=<texto>  -> el 'newer_cursor' u 'older_cursor' de una respuesta previa.
+    page_size=<n>   -> default 50, máximo 200.
+
+Respuesta (los mensajes SIEMPRE en orden cronológico, viejos primero):
+    {
+        "results": [...],
+        "has_more": true,          # quedan más en la dirección pedida
+        "newer_cursor": "...",     # para sincronizar lo nuevo (siempre viene)
+        "older_cursor": "..." | null
+    }
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+AFTER = 'after'
+BEFORE = 'before'
+
+
+def encode_cursor(direction, created_at, pk):
+    raw = json.dumps({'d': direction, 't': created_at.isoformat(), 'id': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(data['t'])
+        if data['d'] not in (AFTER, BEFORE) or created_at is None:
+            raise ValueError
+        return data['d'], created_at, int(data['id'])
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError({'cursor': 'Cursor inválido.'})
+
+
+class MessageKeysetPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_position(self, queryset, request):
+        """ (dirección, created_at, id) a partir de cursor / since_id / before_id. """
+        params = request.query_params
+
+        if params.get('cursor'):
+            return decode_cursor(params['cursor'])
+
+        for param, direction in (('since_id', AFTER), ('before_id', BEFORE)):
+            if params.get(param):
+                try:
+                    message_id = int(params[param])
+                except ValueError:
+                    raise ValidationError({param: 'Debe ser un número.'})
+                position = queryset.filter(pk=message_id).values_list('created_at', 'id').first()
+                if position is None:
+                    raise ValidationError({param: 'El mensaje no existe en esta conversación.'})
+                return (direction, *position)
+
+        return None  # Últimos mensajes
+
+    def paginate_queryset(self, queryset, request, view=None):
+        size = self.get_page_size(request)
+        position = self.get_position(queryset, request)
+        self.direction = position[0] if position else None
+        self.position = position
+
+        if self.direction == AFTER:
+            _, created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            if position:
+                _, created_at, pk = position
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            queryset = queryset.order_by('-created_at', '-id')
+
+        rows = list(queryset[:size + 1])
+        self.has_more = len(rows) > size
+        rows = rows[:size]
+
+        if self.direction != AFTER:
+            rows.reverse()  # Siempre cronológico
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        page = self.page
+
+        if page:
+            newer_cursor = encode_cursor(AFTER, page[-1].created_at, page[-1].pk)
+        elif self.direction == AFTER:
+            newer_cursor = encode_cursor(AFTER, self.position[1], self.position[2])  # Nada nuevo: mismo punto
+        else:
+            newer_cursor = None
+
+        # ¿Hay mensajes más viejos que el primero de la página?
+        older_exists = self.has_more if self.direction != AFTER else self.position is not None
+        older_cursor = encode_cursor(BEFORE, page[0].created_at, page[0].pk) if page and older_exists else None
+
+        return Response({
+            'results': data,
+            'has_more': self.has_more,
+            'newer_cursor': newer_cursor,
+            'older_cursor': older_cursor,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'results': schema,
+                'has_more': {'type': 'boolean'},
+                'newer_cursor': {'type': 'string', 'nullable': True},
+                'older_cursor': {'type': 'string', 'nullable': True},
+            },
+        }
@@ -1,7 +1,6 @@
 from rest_framework import serializers
 from .models import Conversation, Message
 from apps.users.serializers import PublicProfileSerializer
-from django.db.models import Q
 
 class MessageSerializer(serializers.ModelSerializer):
     """ Serializer para enviar/recibir mensajes """
@@ -17,26 +16,44 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ('sender', 'is_read')
 
 class ConversationSerializer(serializers.ModelSerializer):
-    """ Serializer para la lista de chats """
+    """
+    Serializer para la lista de chats.
+    Todo sale de la fila de la conversación (campos desnormalizados +
+    select_related en la vista): cero consultas extra por chat.
+    """
     other_user = serializers.SerializerMethodField()
     last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
-        fields = ['id', 'user_a', 'user_b', 'other_user', 'last_message', 'updated_at']
+        fields = [
+            'id', 'user_a', 'user_b', 'other_user',
+            'last_message', 'last_message_preview', 'last_message_at',
+            'unread_count', 'updated_at'
+        ]
 
-    def get_other_user(self, obj):
-        """ Devuelve la info del OTRO usuario (con el que estás hablando) """
+    def _my_profile_id(self):
         request = self.context.get('request')
         if not request: return None
-        
-        me = request.user.profile
-        other = obj.user_b if obj.user_a == me else obj.user_a
-        return PublicProfileSerializer(other).data
+        return request.user.profile.id
+
+    def get_other_user(self, obj):
+        """ Devuelve la info del OTRO usuario (con el que estás hablando) """
+        me = self._my_profile_id()
+        if me is None: return None
+
+        other = obj.other_participant(me)
+        return PublicProfileSerializer(other, context=self.context).data
 
     def get_last_message(self, obj):
         """ Muestra el último mensaje para la vista previa """
-        last_msg = obj.messages.last()
-        if last_msg:
-            return MessageSerializer(last_msg).data
-        return None
\ No newline at end of file
+        if obj.last_message_id and obj.last_message:
+            return MessageSerializer(obj.last_message, context=self.context).data
+        return None
+
+    def get_unread_count(self, obj):
+        """ Mensajes que YO no he leído en este chat """
+        me = self._my_profile_id()
+        if me is None: return 0
+        return obj.unread_count_for(me)
@@ -0,0 +1,20 @@
+# En: apps/chat/signals.py
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Conversation, Message
+
+
+@receiver(post_delete, sender=Message)
+def update_inbox_on_delete(sender, instance, using=None, origin=None, **kwargs):
+    """
+    Al borrar mensajes sueltos (admin, API) la bandeja no debe seguir
+    mostrando su vista previa ni contarlos como no leídos. Si el borrado viene
+    en cascada (se borró el chat o el usuario) no hay nada que actualizar.
+    """
+    if not (isinstance(origin, Message) or getattr(origin, 'model', None) is Message):
+        return
+    conversation = Conversation.objects.using(using).filter(pk=instance.conversation_id).first()
+    if conversation is not None:
+        conversation.forget_message(instance, using=using)
@@ -0,0 +1,297 @@
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from markettec.asgi import application
+from markettec.testing import Marketplace, QueryBudgetMixin
+from .models import Conversation, Message
+
+
+class WebSocketClient:
+    """ Cliente ASGI mínimo para probar el socket sin servidor ni Redis. """
+
+    def __init__(self, path, query_string=''):
+        self.scope = {
+            'type': 'websocket', 'path': path, 'headers': [],
+            'query_string': query_string.encode(),
+        }
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+
+    async def connect(self):
+        self.task = asyncio.ensure_future(application(self.scope, self.inbox.get, self.outbox.put))
+        await self.inbox.put({'type': 'websocket.connect'})
+        return await self.receive()
+
+    async def receive(self, timeout=2):
+        return await asyncio.wait_for(self.outbox.get(), timeout)
+
+    async def receive_json(self, timeout=2):
+        message = await self.receive(timeout)
+        return json.loads(message['text'])
+
+    async def send_json(self, data):
+        await self.inbox.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def disconnect(self):
+        await self.inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, 2)
+
+
+class ChatWebSocketTests(TransactionTestCase):
+
+    def setUp(self):
+        self.ana = User.objects.create_user('ana', password='x')
+        self.beto = User.objects.create_user('beto', password='x')
+        self.conversation = Conversation.objects.create(user_a=self.ana.profile, user_b=self.beto.profile)
+
+    def socket_for(self, user):
+        return WebSocketClient('/ws/chat/', f'token={AccessToken.for_user(user)}')
+
+    def test_rejects_missing_or_invalid_token(self):
+        async def scenario():
+            for socket in (WebSocketClient('/ws/chat/'), WebSocketClient('/ws/chat/', 'token=basura')):
+                reply = await socket.connect()
+                self.assertEqual(reply, {'type': 'websocket.close', 'code': 4401})
+        async_to_sync(scenario)()
+
+    def test_pushes_new_messages_typing_and_read_receipts(self):
+        api = APIClient()
+        api.force_authenticate(self.ana)
+
+        async def scenario():
+            beto = self.socket_for(self.beto)
+            ana = self.socket_for(self.ana)
+            self.assertEqual((await beto.connect())['type'], 'websocket.accept')
+            self.assertEqual((await ana.connect())['type'], 'websocket.accept')
+
+            # 1. Ana envía un mensaje por la API REST -> Beto lo recibe por el socket
+            response = await sync_to_async(api.post)(
+                '/api/messages/', {'conversation': self.conversation.pk, 'text': 'hola'}
+            )
+            self.assertEqual(response.status_code, 201)
+            event = await beto.receive_json()
+            self.assertEqual(event['type'], 'message.new')
+            self.assertEqual(event['message']['text'], 'hola')
+            self.assertEqual((await ana.receive_json())['type'], 'message.new')
+
+            # 2. Beto está escribiendo -> solo Ana lo ve
+            await beto.send_json({'type': 'typing', 'conversation_id': self.conversation.pk})
+            event = await ana.receive_json()
+            self.assertEqual((event['type'], event['user_id']), ('typing', self.beto.profile.pk))
+
+            # 3. Beto lee el chat -> Ana recibe la confirmación de lectura
+            await beto.send_json({'type': 'read', 'conversation_id': self.conversation.pk})
+            event = await ana.receive_json()
+            self.assertEqual((event['type'], event['marked']), ('message.read', 1))
+            self.assertEqual((await beto.receive_json())['type'], 'message.read')  # sus otros dispositivos
+
+            # 4. Un chat ajeno se rechaza
+            await beto.send_json({'type': 'typing', 'conversation_id': self.conversation.pk + 100})
+            self.assertEqual((await beto.receive_json())['type'], 'error')
+
+            await beto.disconnect()
+            await ana.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_event_image_urls_are_absolute_like_the_rest_api(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        api = APIClient()
+        api.force_authenticate(self.ana)
+        buffer = io.BytesIO()
+        Image.new('RGB', (8, 8), 'blue').save(buffer, 'PNG')
+        photo = SimpleUploadedFile('foto.png', buffer.getvalue(), content_type='image/png')
+
+        async def scenario():
+            beto = self.socket_for(self.beto)
+            await beto.connect()
+            response = await sync_to_async(api.post)(
+                '/api/messages/', {'conversation': self.conversation.pk, 'image': photo}, format='multipart'
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            event = await beto.receive_json()
+            await beto.disconnect()
+            return response.data, event
+
+        created, event = async_to_sync(scenario)()
+        self.assertTrue(event['message']['image'].startswith('http://testserver/'))
+        self.assertEqual(event['message']['image'], created['image'])
+
+
+class ConversationInboxTests(TestCase):
+
+    def setUp(self):
+        self.ana = User.objects.create_user('ana', password='x')
+        self.beto = User.objects.create_user('beto', password='x')
+        self.conversation = Conversation.objects.create(user_a=self.ana.profile, user_b=self.beto.profile)
+
+    def api_for(self, user):
+        api = APIClient()
+        api.force_authenticate(user)
+        return api
+
+    def send(self, sender, text):
+        response = self.api_for(sender).post(
+            '/api/messages/', {'conversation': self.conversation.pk, 'text': text}, format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return Message.objects.get(pk=response.data['id'])
+
+    def inbox(self):
+        self.conversation.refresh_from_db()
+        return (
+            self.conversation.last_message_id, self.conversation.last_message_preview,
+            self.conversation.unread_count_a, self.conversation.unread_count_b,
+        )
+
+    def test_sending_updates_preview_and_the_recipient_counter(self):
+        self.send(self.ana, 'Hola')
+        self.send(self.ana, '¿Sigue disponible?')
+        reply = self.send(self.beto, 'Sí')
+
+        self.assertEqual(self.inbox(), (reply.pk, 'Sí', 1, 2))
+        self.assertEqual(self.api_for(self.beto).get('/api/chat/unread_count/').data, {'unread': 2, 'conversations': 1})
+
+    def test_mark_read_marks_only_received_messages_and_resets_the_counter(self):
+        self.send(self.ana, 'Hola')
+        self.send(self.ana, '¿Sigue disponible?')
+        self.send(self.beto, 'Sí')
+
+        response = self.api_for(self.beto).post(f'/api/chat/{self.conversation.pk}/mark_read/')
+
+        self.assertEqual(response.data['marked'], 2)
+        self.assertEqual(self.inbox()[2:], (1, 0))
+        self.assertEqual(self.api_for(self.beto).get('/api/chat/unread_count/').data, {'unread': 0, 'conversations': 0})
+        self.assertEqual(self.api_for(self.ana).get('/api/chat/unread_count/').data, {'unread': 1, 'conversations': 1})
+        self.assertEqual(list(Message.objects.filter(is_read=False).values_list('sender', flat=True)),
+                         [self.beto.profile.pk])
+
+    def test_mark_read_is_all_or_nothing(self):
+        self.send(self.ana, 'Hola')
+
+        # Falla entre el UPDATE de los mensajes y el del contador
+        with mock.patch.object(Conversation, 'unread_field_for', side_effect=RuntimeError('se cayó la conexión')):
+            with self.assertRaises(RuntimeError):
+                self.conversation.mark_read(self.beto.profile.pk)
+
+        self.assertFalse(Message.objects.get().is_read)
+        self.assertEqual(Conversation.objects.get(pk=self.conversation.pk).unread_count_b, 1)
+
+    def test_inbox_writes_go_to_the_write_database(self):
+        """ Una conversación leída de la réplica escribe en la primaria (aquí, 'replica' ni se puede tocar). """
+        message = self.send(self.ana, 'Hola')
+        second = Message.objects.create(conversation=self.conversation, sender=self.ana.profile, text='¿Hola?')
+        self.conversation._state.db = 'replica'
+
+        self.conversation.record_message(second)
+        self.assertEqual(self.conversation.mark_read(self.beto.profile.pk), 2)
+        self.conversation.last_message_id = None
+        self.conversation.forget_message(message)
+
+        self.conversation._state.db = 'default'
+        self.assertEqual(self.inbox()[1:], ('¿Hola?', 0, 0))
+
+    def test_deleting_messages_moves_the_preview_and_the_counter_back(self):
+        first = self.send(self.ana, 'Hola')
+        last = self.send(self.ana, '¿Sigue disponible?')
+
+        last.delete()
+        self.assertEqual(self.inbox(), (first.pk, 'Hola', 0, 1))
+
+        Message.objects.filter(pk=first.pk).delete()
+        self.assertEqual(self.inbox(), (None, '', 0, 0))
+
+    def test_deleting_the_chat_cascades_without_touching_the_inbox(self):
+        self.send(self.ana, 'Hola')
+        self.conversation.delete()
+        self.assertFalse(Message.objects.exists())
+
+
+class MessageSyncTests(TestCase):
+
+    def setUp(self):
+        ana = User.objects.create_user('ana', password='x')
+        beto = User.objects.create_user('beto', password='x')
+        self.conversation = Conversation.objects.create(user_a=ana.profile, user_b=beto.profile)
+        self.ids = [
+            Message.objects.create(conversation=self.conversation, sender=ana.profile, text=f'm{n}').pk
+            for n in range(7)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(beto)
+
+    def get(self, **params):
+        response = self.api.get('/api/messages/', {'conversation_id': self.conversation.pk, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def ids_of(self, page):
+        return [message['id'] for message in page['results']]
+
+    def test_latest_page_then_scroll_back_with_cursor(self):
+        page = self.get(page_size=3)
+        self.assertEqual(self.ids_of(page), self.ids[4:])
+        self.assertTrue(page['has_more'])
+
+        page = self.get(cursor=page['older_cursor'], page_size=3)
+        self.assertEqual(self.ids_of(page), self.ids[1:4])
+
+        page = self.get(cursor=page['older_cursor'], page_size=3)
+        self.assertEqual(self.ids_of(page), self.ids[:1])
+        self.assertFalse(page['has_more'])
+        self.assertIsNone(page['older_cursor'])
+
+    def test_since_id_and_before_id(self):
+        self.assertEqual(self.ids_of(self.get(since_id=self.ids[4])), self.ids[5:])
+        self.assertEqual(self.ids_of(self.get(before_id=self.ids[2])), self.ids[:2])
+
+    def test_newer_cursor_syncs_only_new_messages(self):
+        cursor = self.get()['newer_cursor']
+        page = self.get(cursor=cursor)
+        self.assertEqual(page['results'], [])
+        self.assertEqual(page['newer_cursor'], cursor)
+
+        new = Message.objects.create(conversation=self.conversation, sender=self.conversation.user_a, text='nuevo')
+        self.assertEqual(self.ids_of(self.get(cursor=cursor)), [new.pk])
+
+    def test_page_size_is_bounded_and_bad_cursor_is_rejected(self):
+        self.assertEqual(len(self.get(page_size=0)['results']), 1)
+        response = self.api.get('/api/messages/', {'conversation_id': self.conversation.pk, 'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_outsiders_cannot_read_the_chat(self):
+        self.api.force_authenticate(User.objects.create_user('intruso', password='x'))
+        self.assertEqual(self.get()['results'], [])
+
+
+class ChatQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.market = Marketplace()
+
+    def test_inbox_does_not_grow_with_conversations(self):
+        self.assertQueryBudget(
+            lambda: self.api_for(self.market.vendor).get('/api/chat/'),
+            grow=self.market.add_conversations, budget=1,
+        )
+
+    def test_messages_do_not_grow_with_the_conversation(self):
+        conversation = self.market.conversation
+        self.assertQueryBudget(
+            lambda: self.api_for(self.market.client).get(f'/api/messages/?conversation_id={conversation.id}'),
+            grow=self.market.add_messages, budget=1,
+        )
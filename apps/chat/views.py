@@ -1,12 +1,16 @@
 from rest_framework import viewsets, permissions, status, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, F, Case, When, Sum, Count
 from django.shortcuts import get_object_or_404
 from .models import Conversation, Message
 from .serializers import ConversationSerializer, MessageSerializer
+from .pagination import MessageKeysetPagination
+from . import events
 from apps.users.models import Profile
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from markettec.db_routers import ReplicaReadsMixin
 
 @extend_schema(tags=['9. Chat'])
 class ConversationViewSet(viewsets.ModelViewSet):
@@ -15,6 +19,8 @@ class ConversationViewSet(viewsets.ModelViewSet):
     - GET /api/chat/ -> Lista tus conversaciones.
     - DELETE /api/chat/{id}/ -> Borra una conversación completa.
     - POST /api/chat/start_chat/ -> Inicia/Obtiene un chat con un usuario.
+    - POST /api/chat/{id}/mark_read/ -> Marca como leídos los mensajes del chat.
+    - GET /api/chat/unread_count/ -> Total de mensajes sin leer (badge).
     """
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -22,7 +28,11 @@ class ConversationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """ Solo muestra conversaciones donde YO soy parte """
         profile = self.request.user.profile
-        return Conversation.objects.filter(Q(user_a=profile) | Q(user_b=profile))
+        return Conversation.objects.filter(
+            Q(user_a=profile) | Q(user_b=profile)
+        ).select_related(
+            'user_a__user', 'user_b__user', 'last_message__sender__user'
+        )
 
     @extend_schema(
         summary="Iniciar Chat",
@@ -59,23 +69,64 @@ class ConversationViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(chat)
         return Response(serializer.data)
 
+    @extend_schema(summary="Marcar Chat como Leído", request=None)
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """ Marca como leídos los mensajes que recibí en este chat. """
+        conversation = self.get_object()
+        profile_id = request.user.profile.id
+        marked = conversation.mark_read(profile_id)
+        events.messages_read(conversation, profile_id, marked)
+        return Response({'status': 'success', 'marked': marked, 'unread_count': 0})
+
+    @extend_schema(summary="Mensajes sin Leer (Badge)")
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """
+        Total de mensajes sin leer en todos mis chats.
+        Una sola consulta: suma el contador que me toca en cada conversación.
+        """
+        profile_id = request.user.profile.id
+        totals = Conversation.objects.filter(
+            Q(user_a_id=profile_id) | Q(user_b_id=profile_id)
+        ).aggregate(
+            unread=Sum(Case(
+                When(user_a_id=profile_id, then=F('unread_count_a')),
+                default=F('unread_count_b')
+            )),
+            conversations=Count(Case(
+                When(user_a_id=profile_id, unread_count_a__gt=0, then=1),
+                When(user_b_id=profile_id, unread_count_b__gt=0, then=1),
+            ))
+        )
+        return Response({
+            'unread': totals['unread'] or 0,
+            'conversations': totals['conversations'],
+        })
+
 
 @extend_schema(tags=['9. Chat'])
-class MessageViewSet(mixins.CreateModelMixin,
+class MessageViewSet(ReplicaReadsMixin,
+                     mixins.CreateModelMixin,
                      mixins.ListModelMixin,
                      viewsets.GenericViewSet):
     """
     API de Mensajes.
-    - GET /api/messages/?conversation_id=1 -> Ver mensajes de un chat.
+    - GET /api/messages/?conversation_id=1 -> Últimos mensajes de un chat (paginado).
+    - GET /api/messages/?conversation_id=1&since_id=40 -> Solo los nuevos (sincronizar).
+    - GET /api/messages/?conversation_id=1&before_id=10 -> Historial anterior (scroll).
     - POST /api/messages/ -> Enviar mensaje (Texto, Foto, Audio o Ubicación).
     """
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageKeysetPagination
+    # El historial lee de la réplica; quien acaba de enviar lee de la primaria
+    replica_actions = ('list',)
 
     def get_queryset(self):
         """ 
         CORRECCIÓN: Filtro robusto para los mensajes.
-        Acepta 'conversation_id' O 'conversation' y ordena por fecha.
+        Acepta 'conversation_id' O 'conversation'; el orden lo pone la paginación.
         """
         # 1. Buscamos el parámetro con ambos nombres posibles
         conversation_id = self.request.query_params.get('conversation_id') or self.request.query_params.get('conversation')
@@ -83,8 +134,29 @@ class MessageViewSet(mixins.CreateModelMixin,
         if not conversation_id:
             return Message.objects.none()
         
-        # 2. Devolvemos los mensajes ordenados (los más viejos primero, tipo WhatsApp)
-        return Message.objects.filter(conversation_id=conversation_id).order_by('created_at')
+        # 2. Solo chats donde participo (antes cualquiera podía leer cualquier chat)
+        profile = self.request.user.profile
+        return Message.objects.filter(
+            Q(conversation__user_a=profile) | Q(conversation__user_b=profile),
+            conversation_id=conversation_id,
+        ).select_related('sender__user')
+
+    @extend_schema(
+        summary="Mensajes de un Chat (Paginado por Cursor)",
+        parameters=[
+            OpenApiParameter(name='conversation_id', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(name='since_id', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='Solo mensajes posteriores a este id.'),
+            OpenApiParameter(name='before_id', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='Solo mensajes anteriores a este id.'),
+            OpenApiParameter(name='cursor', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description="'newer_cursor' u 'older_cursor' de la respuesta anterior."),
+            OpenApiParameter(name='page_size', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='Default 50, máximo 200.'),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """ Al guardar, asignamos el remitente y actualizamos la fecha del chat """
@@ -95,7 +167,10 @@ class MessageViewSet(mixins.CreateModelMixin,
         if conversation.user_a != me and conversation.user_b != me:
             raise permissions.PermissionDenied("No perteneces a este chat")
             
-        serializer.save(sender=me)
-        
-        # Actualizar fecha de la conversación (para que suba en la lista)
-        conversation.save()
\ No newline at end of file
+        # Mensaje + datos de la bandeja (último mensaje, no-leídos) en la misma escritura
+        with transaction.atomic():
+            message = serializer.save(sender=me)
+            # También actualiza la fecha de la conversación (para que suba en la lista)
+            conversation.record_message(message)
+            # Tiempo real: se empuja a los sockets cuando se confirme la transacción
+            events.message_created(message, conversation, request=self.request)
\ No newline at end of file
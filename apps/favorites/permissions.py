@@ -18,4 +18,4 @@ class IsFavoriteOwner(BasePermission):
         # es el perfil del usuario que hace la petición.
         if not hasattr(request.user, 'profile'):
             return False
-        return obj.profile == request.user.profile
\ No newline at end of file
+        return obj.profile_id == request.user.profile.id
\ No newline at end of file
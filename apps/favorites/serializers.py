@@ -4,11 +4,13 @@ from rest_framework import serializers
 from .models import Favorite
 from apps.products.models import Product
 from apps.products.serializers import ProductSerializer # Para anidar
+from markettec.serializers import SparseFieldsMixin
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para MOSTRAR la lista de favoritos.
-    Muestra el producto completo anidado.
+    Muestra el producto completo anidado
+    (o solo lo que se pida: ?fields=id,product.name,product.price).
     """
     # Anidamos el serializer del producto para mostrar todos sus detalles
     product = ProductSerializer(read_only=True)
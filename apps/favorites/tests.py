@@ -1,3 +1,13 @@
 from django.test import TestCase
 
-# Create your tests here.
+from markettec.testing import Marketplace, QueryBudgetMixin
+
+
+class FavoriteQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def test_list_does_not_grow_with_favorites(self):
+        market = Marketplace()
+        self.assertQueryBudget(
+            lambda: self.api_for(market.client).get('/api/favorites/'),
+            grow=market.add_favorites, budget=1,
+        )
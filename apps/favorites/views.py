@@ -6,16 +6,20 @@ from .models import Favorite
 from .serializers import FavoriteSerializer, FavoriteCreateSerializer
 from .permissions import IsFavoriteOwner
 from apps.products.models import Product
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
+from markettec.serializers import SPARSE_FIELDS_PARAMETERS, SparseFieldsViewMixin
 
 @extend_schema(tags=['5. Favoritos'])
-class FavoriteViewSet(mixins.CreateModelMixin,      # Para 'POST' (Crear tradicional)
+@extend_schema_view(list=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS))
+class FavoriteViewSet(SparseFieldsViewMixin,
+                   mixins.CreateModelMixin,      # Para 'POST' (Crear tradicional)
                    mixins.ListModelMixin,        # Para 'GET' (Listar)
                    mixins.DestroyModelMixin,     # Para 'DELETE' (Borrar tradicional)
                    viewsets.GenericViewSet):
     """
     API Endpoint para Favoritos.
     - GET /api/favorites/: Devuelve la lista de favoritos del usuario logueado.
+      (Para las tarjetas: ?fields=id,product.id,product.name,product.price,product.product_image_variants)
     - POST /api/favorites/toggle/: (NUEVO) Agrega/Quita favorito enviando product_id.
     - DELETE /api/favorites/<id>/: Quita un producto de favoritos (método viejo).
     """
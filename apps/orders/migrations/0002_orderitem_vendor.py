@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_sales(apps, schema_editor):
+    """ Copia vendedor (del producto) y fecha (del pedido) a los artículos existentes. """
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Order = apps.get_model('orders', 'Order')
+    Product = apps.get_model('products', 'Product')
+    db = schema_editor.connection.alias
+
+    # Dos UPDATE ... = (SELECT ...) en lugar de guardar fila por fila
+    OrderItem.objects.using(db).filter(product__isnull=False).update(
+        vendor_id=models.Subquery(
+            Product.objects.filter(pk=models.OuterRef('product_id')).values('vendor_id')[:1]
+        )
+    )
+    OrderItem.objects.using(db).update(
+        order_created_at=models.Subquery(
+            Order.objects.filter(pk=models.OuterRef('order_id')).values('created_at')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0006_product_sku'),
+        ('users', '0005_profile_ban_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='order_created_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha del Pedido'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='vendor',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sold_items', to='users.profile', verbose_name='Vendedor'),
+        ),
+        migrations.RunPython(backfill_sales, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['vendor', '-order_created_at', '-order'], name='orders_item_vendor_time_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # En: apps/orders/models.py
 
+from django.core.exceptions import ValidationError
 from django.db import models
 from apps.users.models import Profile
 from apps.products.models import Product
@@ -49,6 +50,19 @@ class Order(models.Model):
     def __str__(self):
         return f'Pedido #{self.id} - {self.client} ({self.get_status_display()})'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordamos el estatus con el que se leyó: los acumulados de ventas
+        # (analytics/signals.py) comparan contra él al guardar, sin otra consulta
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def clean(self):
+        # Un pedido cancelado ya devolvió su inventario: no puede volver a venderse
+        if getattr(self, '_loaded_status', None) == 'canceled' and self.status != 'canceled':
+            raise ValidationError({'status': 'Un pedido cancelado ya no puede cambiar de estatus.'})
+
     class Meta:
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
@@ -74,6 +88,19 @@ class OrderItem(models.Model):
         verbose_name='Producto'
     )
     
+    # Desnormalizados al comprar para que "mis ventas" lea solo esta tabla
+    # (sin el join pedido -> artículo -> producto ni el DISTINCT)
+    vendor = models.ForeignKey(
+        Profile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False, # Lo cubre el índice (vendor, order_created_at)
+        related_name='sold_items',
+        verbose_name='Vendedor'
+    )
+    order_created_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha del Pedido')
+
     quantity = models.PositiveIntegerField(default=1, verbose_name='Cantidad')
     
     # Guarda el precio al momento de la compra para evitar inconsistencias
@@ -87,6 +114,18 @@ class OrderItem(models.Model):
     def __str__(self):
         return f'{self.quantity} x {self.product.name} @ {self.price_at_purchase}'
 
+    def save(self, *args, **kwargs):
+        # (bulk_create no pasa por aquí: OrderSerializer.create los llena directo)
+        if self.vendor_id is None and self.product_id is not None:
+            self.vendor_id = self.product.vendor_id
+        if self.order_created_at is None:
+            self.order_created_at = self.order.created_at
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Artículo del Pedido'
-        verbose_name_plural = 'Artículos del Pedido'
\ No newline at end of file
+        verbose_name_plural = 'Artículos del Pedido'
+        indexes = [
+            # "Mis ventas": WHERE vendor = X ORDER BY order_created_at DESC, sin tocar la tabla de pedidos
+            models.Index(fields=['vendor', '-order_created_at', '-order'], name='orders_item_vendor_time_idx'),
+        ]
@@ -0,0 +1,17 @@
+# En: apps/orders/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class SalesCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para "mis ventas" (las más recientes primero).
+
+    Se pagina sobre los artículos del vendedor (OrderItem), no sobre los
+    pedidos: cada página es un 'WHERE vendor = X AND order_created_at < ...'
+    que recorre directo el índice orders_item_vendor_time_idx.
+    """
+    ordering = ('-order_created_at', '-order_id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
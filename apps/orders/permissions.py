@@ -1,7 +1,7 @@
 # En: apps/orders/permissions.py
 
 from rest_framework.permissions import BasePermission
-from apps.users.models import Profile # Importamos Profile para checar roles
+from apps.users.permissions import user_role
 
 class IsOrderOwnerOrAdmin(BasePermission):
     """
@@ -14,8 +14,9 @@ class IsOrderOwnerOrAdmin(BasePermission):
         'obj' es la instancia del modelo 'Order'.
         """
         # Si el usuario es admin, tiene permiso
-        if request.user.profile.role == 'admin':
+        if user_role(request.user) == 'admin':
             return True
         
         # Si el 'client' del pedido es el perfil del usuario, tiene permiso
-        return obj.client == request.user.profile
\ No newline at end of file
+        # (comparamos IDs: no hace falta cargar el perfil del cliente)
+        return hasattr(request.user, 'profile') and obj.client_id == request.user.profile.id
\ No newline at end of file
@@ -1,14 +1,20 @@
 # En: apps/orders/serializers.py
 
+from django.db import connections, models, router, transaction
+from django.db.models import Case, F, Prefetch, Value, When, prefetch_related_objects
 from rest_framework import serializers
 from .models import Order, OrderItem
+from apps.products import cache as catalog_cache
 from apps.products.models import Product
 from apps.products.serializers import ProductSerializer
-from apps.audits.models import AuditLog
+from apps.audits.pipeline import log_action
+from apps.analytics import rollups as sales_rollups
 from apps.users.models import Profile # <--- Importamos Profile para sacar el nombre
+from apps.users.serializers import PublicProfileSerializer
+from markettec.serializers import SparseFieldsMixin
 
 # --- 1. NUEVO: SERIALIZER PARA EL CLIENTE (Solo Nombre) ---
-class SimpleClientSerializer(serializers.ModelSerializer):
+class SimpleClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Muestra solo el ID y el Nombre del cliente.
     """
@@ -22,12 +28,16 @@ class SimpleClientSerializer(serializers.ModelSerializer):
 # ----------------------------------------------------------
 
 # --- Serializer de LECTURA de items ---
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     
     class Meta:
         model = OrderItem
         fields = ['id', 'product', 'quantity', 'price_at_purchase']
+        # ?expand=items.vendor -> el vendedor de cada artículo
+        expandable_fields = {
+            'vendor': (PublicProfileSerializer, {}),
+        }
 
 # --- Serializer de ESCRITURA de items ---
 class CreateOrderItemSerializer(serializers.Serializer):
@@ -35,7 +45,7 @@ class CreateOrderItemSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(required=True, min_value=1)
 
 # --- SERIALIZER PRINCIPAL DE LA ORDEN ---
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Items (Detalles)
     items = OrderItemSerializer(many=True, read_only=True)
     
@@ -60,51 +70,136 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['client', 'status', 'total_price']
 
+    def validate_items_to_create(self, items):
+        if not items:
+            raise serializers.ValidationError("El pedido debe tener al menos un producto.")
+        return items
+
     def create(self, validated_data):
+        """
+        Crea el pedido como UNA sola unidad de trabajo (transacción):
+        1. Trae todos los productos en una consulta (con bloqueo de fila si la BD lo soporta).
+        2. Crea el pedido y sus artículos con bulk_create.
+        3. Descuenta inventario con un UPDATE condicional (F()): si otro comprador
+           se llevó las últimas piezas, el UPDATE no aplica y se revierte todo.
+        El número de consultas es constante sin importar cuántos artículos traiga.
+        """
         items_data = validated_data.pop('items_to_create')
         client_profile = self.context['request'].user.profile
-        
-        order = Order.objects.create(client=client_profile)
-        
-        total_order_price = 0
 
+        # Si el mismo producto viene repetido, juntamos las cantidades
+        quantities = {}
         for item_data in items_data:
             product_id = item_data['product_id']
-            quantity = item_data['quantity']
-            
-            try:
-                product = Product.objects.get(id=product_id, status='active')
-            except Product.DoesNotExist:
-                order.delete()
-                raise serializers.ValidationError(f"Producto con id {product_id} no existe o no está activo.")
-
-            if product.inventory < quantity:
-                order.delete()
-                raise serializers.ValidationError(f"Inventario insuficiente para '{product.name}'. Disponibles: {product.inventory}")
-            
-            price = product.price
-            total_order_price += (price * quantity)
-            
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                price_at_purchase=price
-            )
-            
-            product.inventory -= quantity
-            product.save()
-
-        order.total_price = total_order_price
-        order.save()
-
-        try:
-            AuditLog.objects.create(
-                user=client_profile.user,
-                action='ORDER_CREATED',
-                details=f"Nuevo pedido #{order.id} creado. Total: ${order.total_price}"
+            quantities[product_id] = quantities.get(product_id, 0) + item_data['quantity']
+
+        with transaction.atomic():
+            products = Product.objects.select_for_update(
+                **lock_options()
+            ).filter(id__in=quantities, status='active').in_bulk()
+
+            for product_id, quantity in quantities.items():
+                product = products.get(product_id)
+                if product is None:
+                    raise serializers.ValidationError(f"Producto con id {product_id} no existe o no está activo.")
+                if product.inventory < quantity:
+                    raise serializers.ValidationError(f"Inventario insuficiente para '{product.name}'. Disponibles: {product.inventory}")
+
+            total_order_price = sum(
+                products[product_id].price * quantity for product_id, quantity in quantities.items()
             )
-        except Exception:
-            pass
-        
-        return order
\ No newline at end of file
+            order = Order.objects.create(client=client_profile, total_price=total_order_price)
+
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=products[product_id],
+                    vendor_id=products[product_id].vendor_id,
+                    order_created_at=order.created_at,
+                    quantity=quantity,
+                    price_at_purchase=products[product_id].price
+                )
+                for product_id, quantity in quantities.items()
+            ])
+
+            reserve_inventory(quantities, products)
+            sales_rollups.apply_transition(order, None, order.status)
+
+        log_action(client_profile.user_id, 'ORDER_CREATED', f"Nuevo pedido #{order.id} creado. Total: ${order.total_price}")
+
+        # Dejamos los artículos precargados para la respuesta (1 consulta en total)
+        prefetch_related_objects([order], Prefetch('items', queryset=order_items_for_display()))
+        return order
+
+
+def lock_options():
+    """
+    Opciones de select_for_update() según el backend:
+    - of=('self',): solo bloqueamos la fila del producto.
+    - no_key=True (PostgreSQL): FOR NO KEY UPDATE no choca con los INSERT
+      de OrderItem que referencian al producto.
+    En SQLite select_for_update() no hace nada (la BD serializa las escrituras).
+    Se consulta la conexión a la que el router manda las escrituras de productos.
+    """
+    features = connections[router.db_for_write(Product)].features
+    return {
+        'of': ('self',) if features.has_select_for_update_of else (),
+        'no_key': features.has_select_for_no_key_update,
+    }
+
+
+def reserve_inventory(quantities, products):
+    """
+    Descuenta el inventario de todos los productos con UN solo UPDATE condicional:
+
+        UPDATE product SET inventory = inventory - CASE id WHEN .. END
+        WHERE id IN (...) AND inventory >= CASE id WHEN .. END
+
+    Si alguna fila no cumple la condición (alguien compró antes que nosotros),
+    el conteo de filas no cuadra y lanzamos ValidationError, lo que revierte
+    la transacción completa (pedido, artículos e inventario).
+    """
+    requested = Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=models.PositiveIntegerField()
+    )
+    updated = Product.objects.filter(
+        pk__in=quantities, status='active', inventory__gte=requested
+    ).update(inventory=F('inventory') - requested)
+
+    if updated != len(quantities):
+        current = dict(Product.objects.filter(pk__in=quantities).values_list('pk', 'inventory'))
+        for product_id, quantity in quantities.items():
+            available = current.get(product_id, 0)
+            if available < quantity:
+                raise serializers.ValidationError(
+                    f"Inventario insuficiente para '{products[product_id].name}'. Disponibles: {available}"
+                )
+        raise serializers.ValidationError("No se pudo apartar el inventario. Intenta de nuevo.")
+
+    # UPDATE directo (sin señales): solo cambió el inventario de estos productos
+    catalog_cache.touch(catalog_cache.PRODUCT, quantities)
+
+
+def restore_inventory(quantities):
+    """
+    Regresa al inventario las piezas de un pedido cancelado con UN solo UPDATE:
+
+        UPDATE product SET inventory = inventory + CASE id WHEN .. END WHERE id IN (...)
+    """
+    if not quantities:
+        return
+    returned = Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=models.PositiveIntegerField()
+    )
+    Product.objects.filter(pk__in=quantities).update(inventory=F('inventory') + returned)
+    # UPDATE directo (sin señales): solo cambió el inventario de estos productos
+    catalog_cache.touch(catalog_cache.PRODUCT, quantities)
+
+
+def order_items_for_display():
+    """ Queryset de artículos con todo lo que necesita OrderItemSerializer. """
+    return OrderItem.objects.select_related(
+        'product', 'product__category', 'product__vendor', 'product__vendor__user', 'product__rating_stats'
+    )
@@ -1,3 +1,389 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.audits.models import AuditLog
+from apps.products.models import Product
+from markettec.testing import Marketplace, QueryBudgetMixin
+from .models import Order, OrderItem
+
+
+def create_vendor_products(count, inventory=10):
+    vendor = User.objects.create_user('vendedor', password='x').profile
+    return [
+        Product.objects.create(
+            name=f'Producto {n}', description='...', price='10.00',
+            inventory=inventory, vendor=vendor
+        )
+        for n in range(count)
+    ]
+
+
+class OrderCreateTests(TestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user('cliente', password='x')
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def post_order(self, items):
+        return self.api.post('/api/orders/', {'items_to_create': items}, format='json')
+
+    def test_creates_order_and_discounts_inventory(self):
+        first, second = create_vendor_products(2, inventory=5)
+
+        response = self.post_order([
+            {'product_id': first.id, 'quantity': 2},
+            {'product_id': second.id, 'quantity': 1},
+            {'product_id': first.id, 'quantity': 1},  # repetido: se suma
+        ])
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['total_price'], '40.00')
+        self.assertEqual(len(response.data['items']), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.inventory, second.inventory), (2, 4))
+
+    def test_insufficient_inventory_rolls_back_everything(self):
+        first, second = create_vendor_products(2, inventory=1)
+
+        response = self.post_order([
+            {'product_id': first.id, 'quantity': 1},
+            {'product_id': second.id, 'quantity': 2},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        first.refresh_from_db()
+        self.assertEqual(first.inventory, 1)
+
+    def test_query_count_does_not_depend_on_number_of_items(self):
+        products = create_vendor_products(12)
+
+        def count_queries(products):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post_order([{'product_id': p.id, 'quantity': 1} for p in products])
+            self.assertEqual(response.status_code, 201, response.data)
+            return len(queries)
+
+        self.assertEqual(count_queries(products[:1]), count_queries(products[1:]))
+
+    def test_cancel_restores_inventory_once(self):
+        product, = create_vendor_products(1, inventory=3)
+        order_id = self.post_order([{'product_id': product.id, 'quantity': 2}]).data['id']
+
+        self.assertEqual(self.api.post(f'/api/orders/{order_id}/cancel_order/').status_code, 200)
+        self.assertEqual(self.api.post(f'/api/orders/{order_id}/cancel_order/').status_code, 400)
+
+        product.refresh_from_db()
+        self.assertEqual(product.inventory, 3)
+
+    def test_cancel_query_count_does_not_depend_on_number_of_items(self):
+        products = create_vendor_products(12, inventory=5)
+
+        def count_queries(products):
+            order_id = self.post_order([{'product_id': p.id, 'quantity': 2} for p in products]).data['id']
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.api.post(f'/api/orders/{order_id}/cancel_order/').status_code, 200)
+            return len(queries)
+
+        self.assertEqual(count_queries(products[:1]), count_queries(products[1:]))
+        self.assertEqual(set(Product.objects.values_list('inventory', flat=True)), {5})
+
+
+class MySalesTests(TestCase):
+
+    def setUp(self):
+        self.products = create_vendor_products(3)
+        self.vendor = self.products[0].vendor
+        self.other = User.objects.create_user('otro', password='x').profile
+        self.foreign = Product.objects.create(name='Ajeno', description='...', price='5.00', inventory=10, vendor=self.other)
+        self.buyer = APIClient()
+        self.buyer.force_authenticate(User.objects.create_user('cliente', password='x'))
+
+    def buy(self, *products):
+        response = self.buyer.post(
+            '/api/orders/', {'items_to_create': [{'product_id': p.id, 'quantity': 1} for p in products]}, format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def sales(self, **params):
+        api = APIClient()
+        api.force_authenticate(self.vendor.user)
+        return api.get('/api/orders/my-sales/', params)
+
+    def test_items_capture_vendor_and_feed_is_cursor_paginated(self):
+        order_ids = [self.buy(self.products[n % 3], self.foreign) for n in range(5)]
+        self.assertEqual(OrderItem.objects.filter(vendor=self.vendor).count(), 5)
+
+        first = self.sales(page_size=3)
+        self.assertEqual([order['id'] for order in first.data['results']], order_ids[:1:-1])
+        # Solo los artículos del vendedor, no los de otros vendedores del mismo pedido
+        self.assertEqual([len(order['items']) for order in first.data['results']], [1, 1, 1])
+
+        second = APIClient()
+        second.force_authenticate(self.vendor.user)
+        rest = second.get(first.data['next']).data
+        self.assertEqual([order['id'] for order in rest['results']], order_ids[1::-1])
+        self.assertIsNone(rest['next'])
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for product in self.products * 3:
+            self.buy(product)
+
+        def count_queries(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.sales(page_size=page_size)
+            self.assertEqual(len(response.data['results']), page_size)
+            return len(queries)
+
+        self.assertEqual(count_queries(2), count_queries(8))
+
+    def test_user_without_profile_gets_an_empty_page(self):
+        user = User.objects.create_user('sin_perfil', password='x')
+        user.profile.delete()
+        api = APIClient()
+        api.force_authenticate(User.objects.get(pk=user.pk))
+
+        response = api.get('/api/orders/my-sales/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'next': None, 'previous': None, 'results': []})
+
+    def test_sparse_fields_reach_the_items(self):
+        self.buy(self.products[0], self.foreign)
+        response = self.sales(fields='id,items.quantity,items.product.name', expand='items.vendor')
+        self.assertEqual(response.status_code, 200)
+        item = response.data['results'][0]['items'][0]
+        self.assertEqual(item['product'], {'name': 'Producto 0'})
+        self.assertEqual(item['vendor']['id'], self.vendor.id)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'items'})
+
+
+class OrderConcurrencyTests(TransactionTestCase):
+    """
+    Prueba de estrés: muchos compradores peleando por las últimas piezas.
+    Nunca se debe vender más de lo que hay en inventario.
+    """
+    BUYERS = 12
+    STOCK = 4
+
+    def test_no_oversell_under_concurrent_orders(self):
+        product, = create_vendor_products(1, inventory=self.STOCK)
+        buyers = [User.objects.create_user(f'comprador{n}', password='x') for n in range(self.BUYERS)]
+        barrier = threading.Barrier(self.BUYERS)
+        results = []
+
+        def buy(user):
+            api = APIClient()
+            api.force_authenticate(user)
+            barrier.wait()
+            try:
+                # Si SQLite responde "database is locked", el cliente reintenta
+                for attempt in range(100):
+                    try:
+                        response = api.post(
+                            '/api/orders/',
+                            {'items_to_create': [{'product_id': product.id, 'quantity': 1}]},
+                            format='json'
+                        )
+                    except OperationalError:
+                        time.sleep(0.01)
+                        continue
+                    results.append(response.status_code)
+                    return
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+
+        # Todos recibieron respuesta definitiva, el producto se agotó
+        # y se vendieron EXACTAMENTE las piezas que había.
+        self.assertEqual(len(results), self.BUYERS)
+        self.assertEqual(product.inventory, 0)
+        self.assertEqual(Order.objects.count(), self.STOCK)
+        self.assertEqual(sum(OrderItem.objects.values_list('quantity', flat=True)), self.STOCK)
+        # La bitácora también compite por el candado: se reintenta, no se pierde ningún registro
+        self.assertEqual(AuditLog.objects.filter(action='ORDER_CREATED').count(), self.STOCK)
+
+
+@skipUnless(settings.DATABASES[DEFAULT_DB_ALIAS].get('OPTIONS', {}).get('transaction_mode') == 'IMMEDIATE',
+            'Solo con el perfil afinado de SQLite (SQLITE_TUNED)')
+class SQLiteWriteProfileTests(SimpleTestCase):
+    """
+    El perfil de SQLite de settings (WAL + BEGIN IMMEDIATE + busy_timeout) sobre
+    un archivo temporal, con una conexión por hilo como los workers de gunicorn.
+    """
+    ALIAS = 'sqlite_profile'
+    WRITERS = 8
+    TRANSACTIONS = 25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Alias temporal (no pasa por el runner de pruebas) con las mismas OPTIONS que 'default'
+        cls.tmpdir = tempfile.mkdtemp()
+        tuned = {**settings.DATABASES[DEFAULT_DB_ALIAS], 'NAME': os.path.join(cls.tmpdir, 'db.sqlite3'), 'TEST': {}}
+        connections.settings[cls.ALIAS] = connections.configure_settings({DEFAULT_DB_ALIAS: {}, cls.ALIAS: tuned})[cls.ALIAS]
+        cls.databases = frozenset({cls.ALIAS})
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        del connections.settings[cls.ALIAS]
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        self.run_sql('DROP TABLE IF EXISTS counter', 'CREATE TABLE counter (value INTEGER)', 'INSERT INTO counter VALUES (0)')
+
+    def db(self):
+        return connections[self.ALIAS]
+
+    def run_sql(self, *statements):
+        with self.db().cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+            return cursor.fetchall()
+
+    def in_thread(self, target):
+        """ Corre target en su propio hilo (y su propia conexión); regresa el hilo ya iniciado. """
+        def run():
+            try:
+                target()
+            except Exception as exc:
+                self.errors.append(exc)
+            finally:
+                self.db().close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def tearDown(self):
+        self.db().close()
+
+    def test_atomic_blocks_begin_immediate(self):
+        with CaptureQueriesContext(self.db()) as queries:
+            with transaction.atomic(using=self.ALIAS):
+                self.run_sql('SELECT value FROM counter')
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_write_lock_is_taken_at_begin(self):
+        """ Con DEFERRED un atomic() que aún no escribe no retiene nada; con IMMEDIATE sí. """
+        self.errors = []
+        inside, release = threading.Event(), threading.Event()
+
+        def hold():
+            with transaction.atomic(using=self.ALIAS):
+                inside.set()
+                release.wait(10)
+
+        holder = self.in_thread(hold)
+        inside.wait(10)
+        try:
+            with self.assertRaisesMessage(OperationalError, 'database is locked'):
+                self.run_sql('PRAGMA busy_timeout=50', 'UPDATE counter SET value = value + 1')
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(self.errors, [])
+
+    def test_readers_do_not_wait_for_the_writer(self):
+        """ WAL: mientras otro escribe (sin confirmar), se lee la última versión confirmada. """
+        self.errors = []
+        written, release = threading.Event(), threading.Event()
+
+        def write():
+            with transaction.atomic(using=self.ALIAS):
+                self.run_sql('UPDATE counter SET value = 41')
+                written.set()
+                release.wait(10)
+
+        writer = self.in_thread(write)
+        written.wait(10)
+        try:
+            self.assertEqual(self.run_sql('PRAGMA busy_timeout=0', 'SELECT value FROM counter'), [(0,)])
+        finally:
+            release.set()
+            writer.join()
+        self.assertEqual(self.errors, [])
+        self.assertEqual(self.run_sql('SELECT value FROM counter'), [(41,)])
+
+    def test_concurrent_read_then_write_transactions_wait_instead_of_failing(self):
+        """
+        Leer y luego escribir (como crear o cancelar un pedido) desde varios hilos:
+        con DEFERRED varias fallan al instante con 'database is locked' al subir
+        el candado; con IMMEDIATE esperan su turno y ninguna pierde la escritura.
+        """
+        self.errors = []
+        barrier = threading.Barrier(self.WRITERS)
+
+        def increment():
+            barrier.wait(10)
+            for _ in range(self.TRANSACTIONS):
+                with transaction.atomic(using=self.ALIAS):
+                    (value,), = self.run_sql('SELECT value FROM counter')
+                    time.sleep(0.001)  # Trabajo entre la lectura y la escritura (validar, calcular totales)
+                    self.run_sql(f'UPDATE counter SET value = {value + 1}')
+
+        for thread in [self.in_thread(increment) for _ in range(self.WRITERS)]:
+            thread.join()
+
+        self.assertEqual(self.errors, [])
+        self.assertEqual(self.run_sql('SELECT value FROM counter'), [(self.WRITERS * self.TRANSACTIONS,)])
+
+
+class OrderExportTests(TestCase):
+
+    def test_admin_streams_one_row_per_item_filtered_in_sql(self):
+        products = create_vendor_products(2)
+        buyer = APIClient()
+        buyer.force_authenticate(User.objects.create_user('cliente', password='x'))
+        for product in products:
+            buyer.post('/api/orders/', {'items_to_create': [{'product_id': product.id, 'quantity': 2}]}, format='json')
+        Order.objects.filter(items__product=products[0]).update(status='paid')
+
+        admin = User.objects.create_user('admin', password='x')
+        admin.profile.role = 'admin'
+        admin.profile.save()
+        api = APIClient()
+        api.force_authenticate(admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api.get('/api/orders/export/', {'status': 'paid'}, HTTP_ACCEPT='application/x-ndjson')
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(row['producto'], row['cantidad'], row['cliente']) for row in rows], [('Producto 0', 2, 'cliente')])
+        self.assertEqual(buyer.get('/api/orders/export/').status_code, 403)
+
+
+class OrderQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def test_client_orders_do_not_grow_with_orders(self):
+        market = Marketplace()
+        self.assertQueryBudget(
+            lambda: self.api_for(market.client).get('/api/orders/'),
+            grow=market.add_orders, budget=2,
+        )
@@ -1,17 +1,31 @@
 # En: apps/orders/views.py
 
+from django.db import connections, router, transaction
+from django.db.models import Sum
+from django.utils import timezone
 from rest_framework import viewsets, mixins, permissions, status 
 from rest_framework.decorators import action 
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response 
 from .models import Order, OrderItem 
-from .serializers import OrderSerializer
+from .pagination import SalesCursorPagination
+from .serializers import OrderSerializer, restore_inventory
 from .permissions import IsOrderOwnerOrAdmin
-from apps.users.permissions import IsAdminUser 
-from apps.audits.models import AuditLog 
-from drf_spectacular.utils import extend_schema
+from apps.users.permissions import IsAdminUser, user_role
+from apps.audits.pipeline import log_action
+from apps.analytics import rollups as sales_rollups
+from markettec.exports import EXPORT_RENDERERS, stream_export
+from markettec.params import parse_moment
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
+from markettec.serializers import SPARSE_FIELDS_PARAMETERS, SparseFieldsViewMixin
 
 @extend_schema(tags=['6. Pedidos'])
-class OrderViewSet(mixins.CreateModelMixin,
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+)
+class OrderViewSet(SparseFieldsViewMixin,
+                   mixins.CreateModelMixin,
                    mixins.RetrieveModelMixin,
                    mixins.ListModelMixin,
                    viewsets.GenericViewSet):
@@ -36,11 +50,12 @@ class OrderViewSet(mixins.CreateModelMixin,
         if not user.is_authenticated:
             return Order.objects.none() 
 
-        if hasattr(user, 'profile') and user.profile.role == 'admin':
-            return Order.objects.all().prefetch_related('items__product')
+        if user_role(user) == 'admin':
+            return Order.objects.all()
         
         # Por defecto (Clientes), solo mostrar sus propios pedidos (COMPRAS)
-        return Order.objects.filter(client=user.profile).prefetch_related('items__product')
+        # (Los JOINs y prefetches los arma filter_queryset según ?fields=)
+        return Order.objects.filter(client=user.profile)
 
     def get_permissions(self):
         """ Asigna permisos basados en la acción. """
@@ -81,24 +96,43 @@ class OrderViewSet(mixins.CreateModelMixin,
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        order_items = OrderItem.objects.filter(order=order)
-        for item in order_items:
-            product = item.product
-            if product:
-                product.inventory += item.quantity
-                product.save()
+        # Devolvemos el inventario con F() dentro de una transacción, para no
+        # pisar descuentos de otros pedidos que se estén creando al mismo tiempo.
+        with transaction.atomic():
+            if connections[router.db_for_write(Order)].features.has_select_for_update_skip_locked:
+                # PostgreSQL: si otra petición tiene tomado este pedido (doble clic en
+                # cancelar, el vendedor entregándolo), respondemos de inmediato en lugar
+                # de dejar la conexión del pool esperando el candado.
+                locked = Order.objects.select_for_update(skip_locked=True).filter(pk=order.pk)
+                if not list(locked.values_list('pk', flat=True)):
+                    return Response(
+                        {'error': 'El pedido se está actualizando en otra petición. Intenta de nuevo.'},
+                        status=status.HTTP_409_CONFLICT
+                    )
 
-        order.status = 'canceled'
-        order.save()
-        
-        try:
-            AuditLog.objects.create(
-                user=request.user, 
-                action='ORDER_CANCELED',
-                details=f"El usuario '{request.user.username}' canceló el pedido #{order.id}"
+            updated = Order.objects.filter(pk=order.pk).exclude(
+                status__in=['sent', 'delivered', 'canceled']
+            ).update(status='canceled', updated_at=timezone.now())
+
+            if updated:
+                order_items = OrderItem.objects.filter(order=order, product__isnull=False)
+                restore_inventory(dict(
+                    order_items.order_by().values('product_id').annotate(total=Sum('quantity'))
+                    .values_list('product_id', 'total')
+                ))
+                # UPDATE directo (sin señales): restamos el pedido de los acumulados
+                sales_rollups.apply_transition(order, order.status, 'canceled')
+
+        if not updated:
+            order.refresh_from_db()
+            return Response(
+                {'error': f"No se puede cancelar un pedido que ya está '{order.get_status_display()}'."}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
-        except Exception:
-            pass
+        # Volvemos a leerlo con sus artículos precargados (refresh_from_db los descarta)
+        order = self.get_object()
+        
+        log_action(request.user, 'ORDER_CANCELED', f"El usuario '{request.user.username}' canceló el pedido #{order.id}")
 
         serializer = self.get_serializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -106,30 +140,36 @@ class OrderViewSet(mixins.CreateModelMixin,
     # ==========================================
     #  NUEVO 1: MIS VENTAS
     # ==========================================
-    @extend_schema(summary="Ver Mis Ventas (Vendedor)")
-    @action(detail=False, methods=['get'], url_path='my-sales')
+    @extend_schema(
+        summary="Ver Mis Ventas (Vendedor)",
+        description="Pedidos donde vendiste algo, paginados por cursor (los más recientes primero). "
+                    "Cada pedido trae solo TUS artículos.",
+        parameters=SPARSE_FIELDS_PARAMETERS,
+    )
+    @action(detail=False, methods=['get'], url_path='my-sales', pagination_class=SalesCursorPagination)
     def my_sales(self, request):
         """
         Muestra una lista separada con los pedidos donde TÚ eres el vendedor.
-        URL: GET /api/orders/my-sales/
-        """
-        user = request.user
-        if not hasattr(user, 'profile'):
-             return Response([], status=200)
+        URL: GET /api/orders/my-sales/?cursor=...&page_size=20
 
-        # Buscamos pedidos que contengan productos míos
-        sales = Order.objects.filter(
-            items__product__vendor=user.profile
-        ).distinct().order_by('-created_at')
-
-        # Usamos paginación si está activa, si no, lista directa
+        1. Página de IDs de pedido sobre el índice (vendor, order_created_at) de
+           OrderItem: sin join con productos ni DISTINCT sobre pedidos completos.
+        2. Los pedidos de esa página con cliente y artículos precargados
+           (número fijo de consultas, sin importar el tamaño de la página).
+        """
+        # Sin perfil no hay ventas, pero la respuesta conserva la forma paginada
+        profile = getattr(request.user, 'profile', None)
+        sales = OrderItem.objects.filter(vendor=profile) if profile else OrderItem.objects.none()
+        sales = sales.values('order_id', 'order_created_at').distinct()
         page = self.paginate_queryset(sales)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        order_ids = [row['order_id'] for row in page]
 
-        serializer = self.get_serializer(sales, many=True)
-        return Response(serializer.data)
+        orders = self.shape_queryset(
+            Order.objects.all(), related={'items': OrderItem.objects.filter(vendor=profile)}
+        ).in_bulk(order_ids)
+
+        serializer = self.get_serializer([orders[order_id] for order_id in order_ids], many=True)
+        return self.get_paginated_response(serializer.data)
 
     # ==========================================
     #  NUEVO 2: MARCAR ENTREGADO
@@ -148,25 +188,88 @@ class OrderViewSet(mixins.CreateModelMixin,
             return Response({'error': 'Pedido no encontrado.'}, status=404)
 
         # Validación: ¿Soy el vendedor de esto?
-        is_vendor = order.items.filter(product__vendor=request.user.profile).exists()
+        is_vendor = order.items.filter(vendor=request.user.profile).exists()
         
         if not is_vendor and not request.user.is_staff:
              return Response({"error": "Solo el vendedor puede entregar este pedido."}, status=403)
 
         if order.status == 'delivered':
              return Response({"message": "Ya estaba entregado."}, status=200)
+        if order.status == 'canceled':
+            return Response({"error": "No se puede entregar un pedido cancelado."}, status=400)
+
+        # UPDATE condicional (como cancel_order): si lo cancelaron en medio, no aplica
+        with transaction.atomic():
+            updated = Order.objects.filter(pk=order.pk).exclude(
+                status__in=['delivered', 'canceled']
+            ).update(status='delivered', updated_at=timezone.now())
+            if updated:
+                sales_rollups.apply_transition(order, order.status, 'delivered')
 
-        order.status = 'delivered'
-        order.save()
+        if not updated:
+            order.refresh_from_db()
+            if order.status == 'delivered':
+                return Response({"message": "Ya estaba entregado."}, status=200)
+            return Response({"error": "No se puede entregar un pedido cancelado."}, status=400)
 
         # Bitácora
-        try:
-            AuditLog.objects.create(
-                user=request.user, 
-                action='ORDER_DELIVERED',
-                details=f"Venta entregada por {request.user.username}"
-            )
-        except:
-            pass
+        log_action(request.user, 'ORDER_DELIVERED', f"Venta entregada por {request.user.username}")
+
+        return Response({"status": "success", "message": "Venta marcada como entregada"}, status=200)
+
+    # ==========================================
+    #  EXPORTAR (Admin)
+    # ==========================================
+    @extend_schema(
+        summary="Exportar Pedidos (CSV / NDJSON en Streaming)",
+        description="Un renglón por artículo, con los datos de su pedido. "
+                    "Formato con ?format=csv|ndjson o el header Accept.",
+        parameters=[
+            OpenApiParameter(name='status', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description="Ej. 'paid'."),
+            OpenApiParameter(name='vendor', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='ID del perfil del vendedor.'),
+            OpenApiParameter(name='client', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='ID del perfil del cliente.'),
+            OpenApiParameter(name='since', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Desde (AAAA-MM-DD o fecha y hora ISO).'),
+            OpenApiParameter(name='until', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Hasta, inclusive (AAAA-MM-DD o fecha y hora ISO).'),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """
+        GET /api/orders/export/?status=delivered&since=2025-11-01
+        Los filtros van sobre OrderItem (un solo SELECT con los JOIN del pedido).
+        """
+        params = request.query_params
+        items = OrderItem.objects.order_by('order_id', 'id')
+
+        if params.get('status'):
+            items = items.filter(order__status=params['status'])
+        for param, lookup in (('vendor', 'vendor_id'), ('client', 'order__client_id')):
+            if params.get(param):
+                if not params[param].isdigit():
+                    raise ValidationError({param: 'Debe ser un número.'})
+                items = items.filter(**{lookup: int(params[param])})
+        if params.get('since'):
+            items = items.filter(order_created_at__gte=parse_moment('since', params['since']))
+        if params.get('until'):
+            items = items.filter(order_created_at__lte=parse_moment('until', params['until'], end_of_day=True))
 
-        return Response({"status": "success", "message": "Venta marcada como entregada"}, status=200)
\ No newline at end of file
+        return stream_export(request, items, [
+            ('pedido_id', 'order_id'),
+            ('fecha', 'order_created_at'),
+            ('estatus', 'order__status'),
+            ('cliente_id', 'order__client_id'),
+            ('cliente', 'order__client__user__username'),
+            ('total_pedido', 'order__total_price'),
+            ('articulo_id', 'id'),
+            ('producto_id', 'product_id'),
+            ('producto', 'product__name'),
+            ('vendedor_id', 'vendor_id'),
+            ('cantidad', 'quantity'),
+            ('precio_unitario', 'price_at_purchase'),
+        ], 'pedidos')
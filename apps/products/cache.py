@@ -0,0 +1,265 @@
+# En: apps/products/cache.py
+
+"""
+Caché de respuestas del catálogo público (productos, categorías, destacados).
+
+Dos niveles:
+1. Memoria del proceso (LRU pequeño): la respuesta sale sin tocar ni la BD
+   ni el caché compartido.
+2. Caché de Django (settings.CACHES; archivos por default, Redis si se
+   configura): lo comparten todos los workers.
+
+Llave = versiones de los "espacios" + visibilidad + formato + ruta + query.
+La visibilidad separa lo que ve cada quien:
+    'anon'            -> anónimos (solo productos activos)
+    'owner:<perfil>'  -> usuario logueado (ve también sus borradores)
+    'admin'           -> administradores (ven todo)
+
+Invalidación por versión: al guardar/borrar un Product, Category o Review,
+las señales cambian la versión del espacio ('products', 'categories').
+Las llaves viejas simplemente dejan de usarse y expiran solas.
+
+Invalidación por objeto: cada respuesta guarda qué productos y perfiles de
+vendedor trae (track) y cuándo se empezó a armar. Los cambios que no mueven
+qué productos aparecen (inventario de un pedido, nombre o foto del vendedor)
+solo marcan esos objetos (touch): se descartan las respuestas que los traen,
+no todo el catálogo. Una respuesta con más de MAX_DEPS objetos se compara
+contra el último cambio de cualquier objeto (una sola llave).
+
+Además se mandan ETag y Cache-Control: con 'If-None-Match' el cliente
+recibe un 304 sin cuerpo si nada cambió.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from apps.users.permissions import user_role
+
+PRODUCTS = 'products'
+CATEGORIES = 'categories'
+
+# Tipos de objeto para track()/touch()
+PRODUCT = 'product'
+PROFILE = 'profile'
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',    # Alias de settings.CACHES
+    'TIMEOUT': 300,        # Segundos que vive una respuesta en el caché
+    'LOCAL_ENTRIES': 256,  # Respuestas en la memoria de cada proceso
+    'MAX_AGE': 30,         # Cache-Control para anónimos (segundos)
+    'MAX_DEPS': 64,        # Objetos que se revisan uno por uno en cada acierto
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CATALOG_CACHE', {})}
+
+
+def shared_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def version_key(namespace):
+    return f'catalog:version:{namespace}'
+
+
+# --- Versiones ---
+
+def get_versions(namespaces):
+    """ Una sola lectura al caché compartido para todas las versiones. """
+    cache = shared_cache()
+    keys = [version_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            # Nunca se reinicia a un número viejo (si el caché la perdió, arrancamos en "ahora")
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions.append(str(found[key]))
+    return versions
+
+
+def bump(*namespaces):
+    cache = shared_cache()
+    cache.set_many({version_key(ns): time.time_ns() for ns in namespaces}, timeout=None)
+
+
+def invalidate(*namespaces):
+    """ Invalida al confirmarse la transacción (si se revierte, no hubo cambio). """
+    transaction.on_commit(lambda: bump(*namespaces))
+
+
+# --- Dependencias por objeto ---
+
+CHANGED_KEY = 'catalog:changed'
+
+
+def changed_key(kind, pk):
+    return f'catalog:changed:{kind}:{pk}'
+
+
+def track(request, kind, pk):
+    """ Anota que la respuesta que se está armando trae este objeto. """
+    deps = getattr(request, '_catalog_deps', None)
+    if deps is not None and pk is not None:
+        deps.add(changed_key(kind, pk))
+
+
+def touch(kind, pks):
+    """
+    Marca objetos como cambiados al confirmarse la transacción. Las marcas
+    solo tienen que vivir lo que vive una respuesta (TIMEOUT).
+    """
+    keys = [changed_key(kind, pk) for pk in pks]
+    if not keys:
+        return
+
+    def mark():
+        stamps = dict.fromkeys([*keys, CHANGED_KEY], time.time_ns())
+        shared_cache().set_many(stamps, timeout=get_config()['TIMEOUT'])
+    transaction.on_commit(mark)
+
+
+def is_fresh(entry):
+    """ ¿Ninguno de sus objetos cambió después de que se empezó a armar? """
+    deps = entry.get('deps')
+    if not deps:
+        return True
+    if len(deps) > get_config()['MAX_DEPS']:
+        deps = [CHANGED_KEY]
+    return all(stamp < entry['built_at'] for stamp in shared_cache().get_many(deps).values())
+
+
+# --- Nivel 1: memoria del proceso ---
+
+class LocalCache:
+    """ LRU con expiración, seguro entre hilos. """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(get_config()['LOCAL_ENTRIES'])
+
+
+# --- Llaves y respuestas ---
+
+def visibility(request):
+    role = user_role(request.user)
+    if role == 'admin':
+        return 'admin'
+    if role is not None:
+        return f'owner:{request.user.profile.id}'
+    return 'anon'
+
+
+def build_key(request, namespaces, scope):
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    raw = '|'.join([
+        *get_versions(namespaces), scope, request.accepted_renderer.format,
+        request.get_host(), request.path, query, # (Las URLs de imágenes son absolutas)
+    ])
+    return 'catalog:response:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def entry_from_response(response):
+    content = bytes(response.content)
+    return {
+        'content': content,
+        'content_type': response['Content-Type'],
+        'etag': '"%s"' % hashlib.md5(content).hexdigest(),
+    }
+
+
+def response_from_entry(request, entry, scope):
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if entry['etag'] in client_etags or '*' in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    if scope == 'anon' or scope == 'public':
+        response['Cache-Control'] = f"public, max-age={get_config()['MAX_AGE']}"
+    else:
+        response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Authorization', 'Accept'])
+    return response
+
+
+def cache_response(*namespaces, per_user=True):
+    """
+    Decorador para acciones GET de un ViewSet.
+    per_user=False: la respuesta es igual para todos (ej. categorías, destacados).
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            config = get_config()
+            # El API navegable (HTML) trae datos de la sesión: no se guarda
+            if not config['ENABLED'] or request.method != 'GET' or request.accepted_renderer.format == 'api':
+                return view_method(self, request, *args, **kwargs)
+
+            scope = visibility(request) if per_user else 'public'
+            key = build_key(request, namespaces, scope)
+
+            local_entry = entry = local_cache.get(key)
+            if entry is None:
+                entry = shared_cache().get(key)
+            if entry is not None and not is_fresh(entry):
+                entry = None
+            if entry is None:
+                # La hora va ANTES de leer la BD: un cambio confirmado durante la
+                # lectura queda después de built_at y descarta la respuesta
+                built_at = time.time_ns()
+                request._catalog_deps = set()
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response = self.finalize_response(request, response, *args, **kwargs)
+                response.render()
+                entry = entry_from_response(response)
+                entry.update(built_at=built_at, deps=sorted(request._catalog_deps))
+                shared_cache().set(key, entry, timeout=config['TIMEOUT'])
+            if entry is not local_entry:
+                local_cache.set(key, entry, timeout=config['TIMEOUT'])
+
+            return response_from_entry(request, entry, scope)
+        return wrapper
+    return decorator
@@ -0,0 +1,215 @@
+# En: apps/products/importer.py
+
+"""
+Importación masiva de productos (crear o actualizar por SKU del vendedor).
+
+    POST /api/products/bulk_import/
+    - JSON: [{"sku": "A-1", "name": "...", "price": "10.50", ...}, ...]
+    - CSV:  archivo en 'file' (multipart) o el cuerpo con Content-Type: text/csv
+            sku,name,description,price,inventory,category
+
+Las filas se procesan en bloques (CHUNK_SIZE). Cada bloque:
+1. Se valida fila por fila (los errores se reportan con su número de fila).
+2. Se escribe en UNA transacción con un solo INSERT ... ON CONFLICT (vendor, sku)
+   DO UPDATE (o bulk_create + bulk_update si la BD no lo soporta).
+3. Se reindexa en la búsqueda (las escrituras masivas no disparan señales).
+
+Si un bloque falla al escribir, solo ese bloque se revierte y sus filas
+se reportan con error; los demás bloques quedan guardados.
+"""
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.parsers import BaseParser
+
+from . import cache as catalog_cache
+from . import search
+from .models import Category, Product
+
+CHUNK_SIZE = 1000
+MAX_ROWS = getattr(settings, 'PRODUCT_IMPORT_MAX_ROWS', 100_000)
+MAX_REPORTED_ERRORS = 1000
+
+# Campos que se actualizan cuando el SKU ya existe
+UPDATE_FIELDS = ['name', 'description', 'price', 'inventory', 'category', 'updated_at']
+
+
+class ImportFileError(serializers.ValidationError):
+    """ Error con el archivo completo (no con una fila). """
+
+
+class CSVParser(BaseParser):
+    """ Cuerpo 'text/csv': se entrega el texto tal cual a parse_rows(). """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read().decode('utf-8-sig')
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """ Una fila del archivo. 'category' acepta el ID o el nombre. """
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    inventory = serializers.IntegerField(min_value=0, required=False, default=0)
+    category = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None)
+
+    def validate_category(self, value):
+        if value in (None, ''):
+            return None
+        categories = self.context['categories']
+        key = value.strip().lower()
+        if key not in categories:
+            raise serializers.ValidationError(f"La categoría '{value}' no existe.")
+        return categories[key]
+
+
+def parse_rows(data):
+    """ Convierte el cuerpo (lista JSON o texto CSV) en una lista de diccionarios. """
+    if hasattr(data, 'read'):  # Archivo subido
+        data = data.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+
+    if isinstance(data, str):
+        if data.lstrip().startswith('['):  # Archivo .json subido por multipart
+            try:
+                data = json.loads(data)
+            except ValueError:
+                raise ImportFileError({'detail': 'El archivo JSON no es válido.'})
+        else:
+            # En CSV una celda vacía significa "no viene" (usa el default del campo)
+            data = [
+                {key: value for key, value in row.items() if key is not None and value not in ('', None)}
+                for row in csv.DictReader(io.StringIO(data))
+            ]
+
+    if isinstance(data, list):
+        rows = data
+    elif isinstance(data, dict) and isinstance(data.get('rows'), list):
+        rows = data['rows']
+    else:
+        raise ImportFileError({'detail': 'Se esperaba un arreglo JSON de productos o un archivo CSV.'})
+
+    if not rows:
+        raise ImportFileError({'detail': 'El archivo no tiene filas.'})
+    if len(rows) > MAX_ROWS:
+        raise ImportFileError({'detail': f'Máximo {MAX_ROWS} filas por importación (llegaron {len(rows)}).'})
+    return rows
+
+
+def category_lookup():
+    """ {'3': 3, 'libros': 3, ...}: ID o nombre (sin mayúsculas) -> ID. Una consulta. """
+    lookup = {}
+    for pk, name in Category.objects.values_list('pk', 'name'):
+        lookup[str(pk)] = pk
+        lookup[name.strip().lower()] = pk
+    return lookup
+
+
+class ProductImporter:
+
+    def __init__(self, vendor, chunk_size=CHUNK_SIZE):
+        self.vendor = vendor
+        self.chunk_size = chunk_size
+        self.categories = category_lookup()
+        self.created = self.updated = self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, sku, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'sku': sku, 'errors': detail})
+
+    def run(self, rows):
+        for start in range(0, len(rows), self.chunk_size):
+            self.import_chunk(rows[start:start + self.chunk_size], first_row=start + 1)
+
+        if self.created or self.updated:
+            catalog_cache.invalidate(catalog_cache.PRODUCTS)
+
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+    def validate_chunk(self, rows, first_row):
+        """ Regresa {sku: (número de fila, datos validados)}; si un SKU se repite, gana la última fila. """
+        valid = {}
+        for row_number, row in enumerate(rows, start=first_row):
+            if not isinstance(row, dict):
+                self.add_error(row_number, None, {'detail': 'La fila debe ser un objeto.'})
+                continue
+            serializer = ProductImportRowSerializer(data=row, context={'categories': self.categories})
+            if not serializer.is_valid():
+                self.add_error(row_number, row.get('sku'), serializer.errors)
+                continue
+            data = serializer.validated_data
+            if data['sku'] in valid:
+                previous_row, _ = valid[data['sku']]
+                self.add_error(previous_row, data['sku'], {'sku': f'SKU repetido; se usó la fila {row_number}.'})
+            valid[data['sku']] = (row_number, data)
+        return valid
+
+    def import_chunk(self, rows, first_row):
+        valid = self.validate_chunk(rows, first_row)
+        if not valid:
+            return
+
+        now = timezone.now()
+        products = [
+            Product(
+                vendor=self.vendor, sku=sku, name=data['name'], description=data['description'],
+                price=data['price'], inventory=data['inventory'], category_id=data['category'],
+                created_at=now, updated_at=now,
+            )
+            for sku, (_, data) in valid.items()
+        ]
+
+        try:
+            with transaction.atomic():
+                existing = dict(
+                    Product.objects.filter(vendor=self.vendor, sku__in=valid).values_list('sku', 'pk')
+                )
+                self.write(products, existing)
+                product_ids = list(
+                    Product.objects.filter(vendor=self.vendor, sku__in=valid).values_list('pk', flat=True)
+                )
+                search.index_products(product_ids)
+        except DatabaseError as error:
+            for sku, (row_number, _) in valid.items():
+                self.add_error(row_number, sku, {'detail': f'No se pudo guardar el bloque: {error}'})
+            return
+
+        self.updated += len(existing)
+        self.created += len(valid) - len(existing)
+
+    def write(self, products, existing):
+        features = connections[Product.objects.db].features
+        if features.supports_update_conflicts_with_target:
+            # INSERT ... ON CONFLICT (vendor_id, sku) DO UPDATE SET ...
+            Product.objects.bulk_create(
+                products, update_conflicts=True,
+                unique_fields=['vendor', 'sku'], update_fields=UPDATE_FIELDS,
+            )
+            return
+
+        to_create, to_update = [], []
+        for product in products:
+            if product.sku in existing:
+                product.pk = existing[product.sku]
+                to_update.append(product)
+            else:
+                to_create.append(product)
+        Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, UPDATE_FIELDS)
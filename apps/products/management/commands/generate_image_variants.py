@@ -0,0 +1,50 @@
+# En: apps/products/management/commands/generate_image_variants.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from markettec import images
+
+
+class Command(BaseCommand):
+    help = 'Genera las miniaturas (thumb/medium) de las imágenes que ya estaban subidas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Vuelve a generar las variantes aunque ya existan.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Hilos en paralelo (default: 4).'
+        )
+
+    def handle(self, *args, **options):
+        def process(fieldfile):
+            try:
+                return images.generate_variants(fieldfile, overwrite=options['force']), None
+            except Exception as error:
+                return 0, f'{fieldfile.name}: {error}'
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for model, fields in images.registry.items():
+                for field in fields:
+                    fieldfile_list = (
+                        getattr(instance, field)
+                        for instance in model.objects.exclude(**{field: ''}).exclude(
+                            **{f'{field}__isnull': True}
+                        ).only('pk', field).iterator()
+                    )
+                    written = errors = 0
+                    for count, error in executor.map(process, fieldfile_list):
+                        written += count
+                        if error:
+                            errors += 1
+                            self.stderr.write(f'  {error}')
+
+                    self.stdout.write(
+                        f'{model._meta.label}.{field}: {written} variantes nuevas, {errors} errores.'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('Miniaturas listas.'))
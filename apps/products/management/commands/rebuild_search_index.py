@@ -0,0 +1,29 @@
+# En: apps/products/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction, DEFAULT_DB_ALIAS
+
+from apps.products import search
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero el índice de búsqueda de texto completo de productos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias de la base de datos a reindexar (default: "default").'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+
+        with transaction.atomic(using=using):
+            total = search.rebuild(using=using)
+
+        if total is None:
+            raise CommandError(
+                'No hay índice de búsqueda en esta base de datos '
+                '(backend sin FTS5/tsvector o faltan migraciones).'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido: {total} productos.'))
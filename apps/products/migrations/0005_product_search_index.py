@@ -0,0 +1,67 @@
+# Índice de búsqueda de texto completo para productos.
+# SQLite -> tabla virtual FTS5 | PostgreSQL -> tsvector + índice GIN.
+# En otros backends (o SQLite compilado sin FTS5) no se crea nada y la
+# búsqueda sigue usando icontains.
+
+from django.db import migrations, OperationalError
+
+
+SQLITE_FTS = 'products_product_fts'
+PG_TABLE = 'products_product_search'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+
+    if connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {SQLITE_FTS} USING fts5("
+                f"name, description, category, "
+                f"tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite sin FTS5: la app sigue funcionando con icontains
+            return
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_FTS} (rowid, name, description, category) "
+            f"SELECT p.id, p.name, p.description, COALESCE(c.name, '') "
+            f"FROM products_product p LEFT JOIN products_category c ON c.id = p.category_id"
+        )
+
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {PG_TABLE} ("
+            f"product_id bigint PRIMARY KEY REFERENCES products_product (id) ON DELETE CASCADE, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {PG_TABLE}_document_gin ON {PG_TABLE} USING GIN (document)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {PG_TABLE} (product_id, document) "
+            f"SELECT p.id, "
+            f"setweight(to_tsvector('spanish', p.name), 'A') || "
+            f"setweight(to_tsvector('spanish', COALESCE(c.name, '')), 'B') || "
+            f"setweight(to_tsvector('spanish', p.description), 'C') "
+            f"FROM products_product p LEFT JOIN products_category c ON c.id = p.category_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS}")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {PG_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_category_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
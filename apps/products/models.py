@@ -40,6 +40,10 @@ class Product(models.Model):
     description = models.TextField(verbose_name='Descripción')
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Precio')
     inventory = models.PositiveIntegerField(default=0, verbose_name='Inventario')
+
+    # Clave del vendedor (su propio código de inventario). Única POR vendedor;
+    # es la llave de la importación masiva (ver products/importer.py).
+    sku = models.CharField(max_length=64, null=True, blank=True, verbose_name='SKU')
     
     status = models.CharField(
         max_length=10, 
@@ -82,4 +86,7 @@ class Product(models.Model):
 
     class Meta:
         verbose_name = 'Producto'
-        verbose_name_plural = 'Productos'
\ No newline at end of file
+        verbose_name_plural = 'Productos'
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'sku'], name='products_vendor_sku_uniq'),
+        ]
\ No newline at end of file
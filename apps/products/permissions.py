@@ -1,8 +1,7 @@
 # En: apps/products/permissions.py
 
-import sys
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from apps.users.permissions import IsAdminUser 
+from apps.users.permissions import IsAdminUser, user_role
 
 class IsVendorUser(BasePermission):
     """
@@ -11,9 +10,7 @@ class IsVendorUser(BasePermission):
     message = "Solo los vendedores pueden realizar esta acción."
 
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated or not hasattr(request.user, 'profile'):
-            return False
-        return request.user.profile.role == 'vendor'
+        return user_role(request.user) == 'vendor'
 
 
 class IsOwnerOrAdmin(BasePermission):
@@ -34,19 +31,17 @@ class IsOwnerOrAdmin(BasePermission):
             return True
             
         # 2. Si es Admin, pase VIP
-        if request.user.profile.role == 'admin':
+        if user_role(request.user) == 'admin':
             return True
         
         # 3. Validación de Dueño (A PRUEBA DE BALAS)
-        # Verificamos que el producto tenga vendedor asignado
-        if not hasattr(obj, 'vendor') or not obj.vendor:
+        # Verificamos que el producto tenga vendedor asignado (sin cargarlo)
+        if getattr(obj, 'vendor_id', None) is None:
             return False
-        
-        print(f"DEBUG ESPÍA: UserID={request.user.id} vs VendorUserID={obj.vendor.user.id} | Metodo={request.method}", file=sys.stderr)
 
-        # COMPARAMOS USER IDs DIRECTAMENTE (Números)
+        # COMPARAMOS IDs DIRECTAMENTE (Números)
         # Esto evita errores de comparación de objetos Profile
-        return obj.vendor.user.id == request.user.id
+        return obj.vendor_id == request.user.profile.id
 
 class IsOwnerOnly(BasePermission):
     """
@@ -61,5 +56,5 @@ class IsOwnerOnly(BasePermission):
         if not hasattr(obj, 'vendor') or not obj.vendor:
             return False
             
-        # COMPARAMOS USER IDs DIRECTAMENTE
-        return obj.vendor.user.id == request.user.id
\ No newline at end of file
+        # COMPARAMOS IDs DIRECTAMENTE (sin cargar el vendedor)
+        return obj.vendor_id == request.user.profile.id
\ No newline at end of file
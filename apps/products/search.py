@@ -0,0 +1,210 @@
+# En: apps/products/search.py
+
+"""
+Motor de búsqueda de texto completo para el catálogo de productos.
+
+- SQLite: tabla virtual FTS5 (products_product_fts), rowid = id del producto.
+- PostgreSQL: tabla con columna tsvector + índice GIN (products_product_search).
+- Cualquier otro backend (o SQLite sin FTS5): regresamos None y la vista
+  usa el filtro clásico con icontains.
+
+El índice se mantiene sincronizado con los signals de products/signals.py
+y se puede reconstruir completo con: python manage.py rebuild_search_index
+"""
+
+import re
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from .models import Product, Category
+
+FTS_TABLE = 'products_product_fts'
+PG_TABLE = 'products_product_search'
+PG_CONFIG = 'spanish'
+
+# Máximo de palabras que tomamos de ?q= (evita consultas gigantes)
+MAX_TERMS = 8
+
+# Lotes para no pasarnos del límite de parámetros de SQLite
+BATCH_SIZE = 500
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Cache por alias: ¿existe la tabla del índice en esta base de datos?
+_available = {}
+
+
+def engine(using=DEFAULT_DB_ALIAS):
+    """
+    Devuelve 'sqlite', 'postgresql' o None si el índice no existe
+    en la base de datos indicada.
+    """
+    if using not in _available:
+        conn = connections[using]
+        table = {'sqlite': FTS_TABLE, 'postgresql': PG_TABLE}.get(conn.vendor)
+        found = False
+        if table:
+            with conn.cursor() as cursor:
+                found = table in conn.introspection.table_names(cursor)
+        _available[using] = conn.vendor if found else None
+    return _available[using]
+
+
+def reset_engine_cache():
+    """ Olvida la detección de backend (útil tras migrar o en pruebas). """
+    _available.clear()
+
+
+def parse_terms(query):
+    """ Parte el texto de búsqueda en palabras limpias (sin operadores). """
+    return _TERM_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def rank_queryset(queryset, query):
+    """
+    Filtra un queryset de productos a los que coinciden con el texto y lo
+    ordena por relevancia (el más relevante primero).
+
+    La coincidencia y el rank salen de un JOIN con el índice, así que los
+    filtros que ya traiga el queryset (visibilidad, dueño...) van en la misma
+    consulta.
+
+    Regresa None si no hay motor de búsqueda disponible en este backend.
+    Cada palabra se busca como prefijo de palabra: "iph" encuentra "iphone",
+    pero "phone" no (eso sería un LIKE '%phone%' sin índice).
+    """
+    kind = engine(queryset.db)
+    if kind is None:
+        return None
+
+    terms = parse_terms(query)
+    if not terms:
+        return queryset.none()
+
+    product_table = queryset.model._meta.db_table
+
+    if kind == 'sqlite':
+        # Cada término entre comillas (escapa operadores de FTS5) y con '*' para prefijo.
+        # bm25(): pesos por columna -> nombre, descripción, categoría (menor = mejor).
+        match = ' '.join('"%s"*' % term for term in terms)
+        return queryset.extra(
+            select={'search_rank': f'bm25("{FTS_TABLE}", 10.0, 1.0, 4.0)'},
+            tables=[FTS_TABLE],
+            where=[f'"{FTS_TABLE}".rowid = "{product_table}"."id"', f'"{FTS_TABLE}" MATCH %s'],
+            params=[match],
+            order_by=['search_rank', 'id'],
+        )
+
+    # Los términos solo traen caracteres \w, así que son seguros para to_tsquery.
+    tsquery = ' & '.join('%s:*' % term for term in terms)
+    return queryset.extra(
+        select={'search_rank': f'ts_rank_cd("{PG_TABLE}".document, to_tsquery(%s, %s))'},
+        select_params=[PG_CONFIG, tsquery],
+        tables=[PG_TABLE],
+        where=[
+            f'"{PG_TABLE}".product_id = "{product_table}"."id"',
+            f'"{PG_TABLE}".document @@ to_tsquery(%s, %s)',
+        ],
+        params=[PG_CONFIG, tsquery],
+        order_by=['-search_rank', 'id'],
+    )
+
+
+def _document_select():
+    """ SELECT que arma el texto indexable de cada producto (con su categoría). """
+    return (
+        f'SELECT p.id, p.name, p.description, COALESCE(c.name, \'\') '
+        f'FROM {Product._meta.db_table} p '
+        f'LEFT JOIN {Category._meta.db_table} c ON c.id = p.category_id'
+    )
+
+
+def _pg_document_select():
+    return (
+        f'SELECT p.id, '
+        f'setweight(to_tsvector(\'{PG_CONFIG}\', p.name), \'A\') || '
+        f'setweight(to_tsvector(\'{PG_CONFIG}\', COALESCE(c.name, \'\')), \'B\') || '
+        f'setweight(to_tsvector(\'{PG_CONFIG}\', p.description), \'C\') '
+        f'FROM {Product._meta.db_table} p '
+        f'LEFT JOIN {Category._meta.db_table} c ON c.id = p.category_id'
+    )
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def index_products(product_ids, using=DEFAULT_DB_ALIAS):
+    """
+    (Re)indexa los productos indicados. Si alguno ya no existe,
+    simplemente se quita del índice.
+    """
+    kind = engine(using)
+    if kind is None:
+        return
+
+    conn = connections[using]
+    with conn.cursor() as cursor:
+        for batch in _batches(product_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            if kind == 'sqlite':
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', batch)
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, name, description, category) '
+                    f'{_document_select()} WHERE p.id IN ({placeholders})',
+                    batch
+                )
+            else:
+                cursor.execute(f'DELETE FROM {PG_TABLE} WHERE product_id IN ({placeholders})', batch)
+                cursor.execute(
+                    f'INSERT INTO {PG_TABLE} (product_id, document) '
+                    f'{_pg_document_select()} WHERE p.id IN ({placeholders})',
+                    batch
+                )
+
+
+def index_category(category_id, using=DEFAULT_DB_ALIAS):
+    """ Reindexa todos los productos de una categoría (ej. al renombrarla). """
+    if engine(using) is None:
+        return
+    product_ids = Product.objects.using(using).filter(
+        category_id=category_id
+    ).values_list('id', flat=True)
+    index_products(product_ids, using=using)
+
+
+def remove_products(product_ids, using=DEFAULT_DB_ALIAS):
+    """ Quita productos del índice. """
+    kind = engine(using)
+    if kind is None:
+        return
+
+    table, column = (FTS_TABLE, 'rowid') if kind == 'sqlite' else (PG_TABLE, 'product_id')
+    with connections[using].cursor() as cursor:
+        for batch in _batches(product_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', batch)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """
+    Vacía y reconstruye el índice completo desde las tablas de productos.
+    Regresa el número de productos indexados (o None si no hay motor).
+    """
+    reset_engine_cache()
+    kind = engine(using)
+    if kind is None:
+        return None
+
+    with connections[using].cursor() as cursor:
+        if kind == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, category) {_document_select()}'
+            )
+        else:
+            cursor.execute(f'TRUNCATE {PG_TABLE}')
+            cursor.execute(f'INSERT INTO {PG_TABLE} (product_id, document) {_pg_document_select()}')
+    return Product.objects.using(using).count()
@@ -2,16 +2,32 @@
 
 from rest_framework import serializers
 from .models import Product, Category
+from . import cache as catalog_cache
 # Importamos el serializer PÚBLICO que creamos
 from apps.users.serializers import PublicProfileSerializer 
+from markettec.images import ImageVariantsField
+from markettec.serializers import SparseFieldsMixin
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Miniaturas (thumb/medium) para no mandar la imagen original en las listas
+    image_variants = ImageVariantsField(source='image')
 
-class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'image']
+        fields = ['id', 'name', 'description', 'image', 'image_variants']
+
+
+class ProductRatingSerializer(SparseFieldsMixin, serializers.Serializer):
+    """
+    Calificación del producto leída de las estadísticas desnormalizadas
+    (reviews.ProductRating), sin hacer Avg() sobre las reseñas.
+    """
+    average = serializers.FloatField(read_only=True)
+    count = serializers.IntegerField(source='review_count', read_only=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer principal para el Producto.
     (Actualizado para incluir la imagen)
@@ -21,6 +37,12 @@ class ProductSerializer(serializers.ModelSerializer):
     vendor = PublicProfileSerializer(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
 
+    # null si el producto aún no tiene reseñas
+    rating = ProductRatingSerializer(source='rating_stats', read_only=True)
+
+    # Miniaturas (thumb/medium) para las tarjetas de producto
+    product_image_variants = ImageVariantsField(source='product_image')
+
     class Meta:
         model = Product
         fields = [
@@ -29,11 +51,14 @@ class ProductSerializer(serializers.ModelSerializer):
             'description', 
             'price', 
             'inventory', 
+            'sku',
             'status', 
             'vendor', 
             'category', 
             'category_name',
-            'product_image' # <-- ¡CAMPO NUEVO AÑADIDO!
+            'product_image', # <-- ¡CAMPO NUEVO AÑADIDO!
+            'product_image_variants',
+            'rating',
         ]
         
         # El 'status' es 'read_only' porque es automático (default='active')
@@ -41,4 +66,29 @@ class ProductSerializer(serializers.ModelSerializer):
         
         extra_kwargs = {
             'category': {'write_only': True}
-        }
\ No newline at end of file
+        }
+
+        # ?expand=category -> la categoría completa (con sus miniaturas) en lugar del ID
+        expandable_fields = {
+            'category': (CategorySerializer, {}),
+        }
+
+    def validate_sku(self, value):
+        """ Vacío = sin SKU. Si viene, no se puede repetir entre los productos del vendedor. """
+        if not value:
+            return None
+        request = self.context.get('request')
+        vendor_id = self.instance.vendor_id if self.instance else request.user.profile.id
+        duplicates = Product.objects.filter(vendor_id=vendor_id, sku=value)
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('Ya tienes otro producto con este SKU.')
+        return value
+
+    def to_representation(self, instance):
+        # Caché del catálogo: esta respuesta cambia si cambian el producto o su vendedor
+        request = self.context.get('request')
+        catalog_cache.track(request, catalog_cache.PRODUCT, instance.pk)
+        catalog_cache.track(request, catalog_cache.PROFILE, instance.vendor_id)
+        return super().to_representation(instance)
@@ -0,0 +1,105 @@
+# En: apps/products/signals.py
+
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from django.contrib.auth.models import User
+
+from apps.users.models import Profile
+from markettec import images
+
+from .models import Product, Category
+from . import search
+from .cache import invalidate, touch, PRODUCTS, CATEGORIES, PROFILE
+
+
+# --- Índice de búsqueda (ver products/search.py) ---
+# Se actualiza dentro de la misma transacción que el guardado,
+# así que un rollback también deshace el cambio en el índice.
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return  # loaddata: se reconstruye con 'rebuild_search_index'
+    search.index_products([instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, using=None, **kwargs):
+    search.remove_products([instance.pk], using=using)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_name(sender, instance, raw=False, using=None, **kwargs):
+    """ Guardamos el nombre anterior para reindexar solo si cambió. """
+    if raw or not instance.pk:
+        instance._previous_name = None
+        return
+    instance._previous_name = Category.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, '_previous_name', None) != instance.name:
+        search.index_category(instance.pk, using=using)
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_products(sender, instance, using=None, **kwargs):
+    """ Al borrar la categoría sus productos quedan en NULL; los anotamos antes. """
+    instance._product_ids = list(
+        Product.objects.using(using).filter(category=instance).values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def reindex_orphan_products(sender, instance, using=None, **kwargs):
+    search.index_products(getattr(instance, '_product_ids', []), using=using)
+
+
+# --- Caché del catálogo (ver products/cache.py) ---
+# Las categorías van dentro de cada producto: un cambio en ellas invalida ambos.
+# Las miniaturas se generan después del guardado: al quedar listas, las URLs cambian.
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(images.variants_ready, sender=Product)
+def invalidate_product_cache(sender, **kwargs):
+    invalidate(PRODUCTS)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(images.variants_ready, sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    invalidate(PRODUCTS, CATEGORIES)
+
+
+# El vendedor va anidado en cada producto (nombre, usuario, foto): al cambiar
+# solo se descartan las respuestas que traen sus productos.
+
+@receiver(post_save, sender=Profile)
+def invalidate_vendor_cache(sender, instance, created, **kwargs):
+    if not created:
+        touch(PROFILE, [instance.pk])
+
+
+@receiver(images.variants_ready, sender=Profile)
+def invalidate_vendor_image_cache(sender, fieldfile, **kwargs):
+    touch(PROFILE, [fieldfile.instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_vendor_user_cache(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields == frozenset(['last_login']):
+        return  # Iniciar sesión no cambia nada de lo que se muestra
+    touch(PROFILE, Profile.objects.filter(user_id=instance.pk).values_list('pk', flat=True))
+
+
+# --- Miniaturas (ver markettec/images.py) ---
+images.track(Product, 'product_image')
+images.track(Category, 'image')
@@ -1,3 +1,415 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.reviews.models import Review
+from markettec import images
+from markettec.testing import Marketplace, QueryBudgetMixin
+from . import cache as catalog_cache
+from . import search
+from .models import Category, Product
+
+
+def ranked_ids(query):
+    """ IDs que encuentra el índice (sin filtro de visibilidad), por relevancia. """
+    return list(search.rank_queryset(Product.objects.all(), query).values_list('id', flat=True))
+
+
+class ProductSearchTests(TestCase):
+
+    def setUp(self):
+        search.reset_engine_cache()
+        self.vendor = User.objects.create_user('vendedor', password='x')
+        self.category = Category.objects.create(name='Electrónica')
+
+    def create_product(self, name, description='...', status='active', vendor=None):
+        return Product.objects.create(
+            name=name, description=description, price='10.00', inventory=3, status=status,
+            vendor=(vendor or self.vendor).profile, category=self.category,
+        )
+
+    def search(self, query, user=None):
+        api = APIClient()
+        if user:
+            api.force_authenticate(user)
+        response = api.get('/api/products/', {'q': query}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.json()]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.create_product('Funda genérica', description='Compatible con iPhone 12')
+        self.create_product('iPhone 12 usado')
+
+        self.assertEqual(self.search('iphone'), ['iPhone 12 usado', 'Funda genérica'])
+        self.assertEqual(self.search('ipho'), ['iPhone 12 usado', 'Funda genérica'])
+
+    def test_visibility_and_ranking_go_in_a_single_query(self):
+        for number in range(3):
+            self.create_product(f'Calculadora {number} calculadora', status='pending')
+        self.create_product('Calculadora científica')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search('calculadora'), ['Calculadora científica'])
+        self.assertEqual(len(queries), 1)  # Sin .exists() previo ni LIKE de respaldo
+        # El dueño también ve sus pendientes, todos (sin tope)
+        self.assertEqual(len(self.search('calculadora', user=self.vendor)), 4)
+
+    def test_matches_word_prefixes_only(self):
+        self.create_product('iPhone 12 usado')
+        self.assertEqual(self.search('iph'), ['iPhone 12 usado'])
+        self.assertEqual(self.search('phone'), [])  # Nada de LIKE '%phone%' sobre la tabla
+
+    def test_backend_without_index_uses_icontains(self):
+        self.create_product('iPhone 12 usado')
+        with mock.patch.object(search, 'engine', return_value=None):
+            self.assertEqual(self.search('phone'), ['iPhone 12 usado'])
+
+    def test_signals_keep_the_index_in_sync(self):
+        product = self.create_product('Mochila')
+        self.assertEqual(ranked_ids('mochila'), [product.id])
+
+        product.name = 'Maleta'
+        product.save()
+        self.assertEqual(ranked_ids('mochila'), [])
+        self.assertEqual(ranked_ids('maleta'), [product.id])
+
+        self.category.name = 'Equipaje'
+        self.category.save()
+        self.assertEqual(ranked_ids('equipaje'), [product.id])
+
+        product.delete()
+        self.assertEqual(ranked_ids('maleta'), [])
+
+    def test_rebuild_command_reindexes_everything(self):
+        product = self.create_product('Tenis')
+        search.remove_products([product.id])
+        self.assertEqual(ranked_ids('tenis'), [])
+
+        output = io.StringIO()
+        call_command('rebuild_search_index', stdout=output)
+
+        self.assertIn('1 productos', output.getvalue())
+        self.assertEqual(ranked_ids('tenis'), [product.id])
+
+
+@override_settings(CATALOG_CACHE={'ENABLED': True})
+class CatalogCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.local_cache.clear()
+        self.vendor = User.objects.create_user('vendedor', password='x')
+        self.category = Category.objects.create(name='Libros')
+        self.product = self.create_product('Cálculo', status='active')
+        self.api = APIClient()
+
+    def create_product(self, name, status='active'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(
+                name=name, description='...', price='10.00', inventory=3,
+                status=status, vendor=self.vendor.profile, category=self.category
+            )
+
+    def names(self, response):
+        return sorted(product['name'] for product in response.json())
+
+    def test_second_request_is_served_from_cache_with_etag(self):
+        first = self.api.get('/api/products/', HTTP_ACCEPT='application/json')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.api.get('/api/products/', HTTP_ACCEPT='application/json')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(second.content, first.content)
+
+        not_modified = self.api.get('/api/products/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], first['ETag'])
+
+    def test_product_category_and_review_changes_invalidate(self):
+        url = '/api/products/'
+        self.assertEqual(self.names(self.api.get(url, HTTP_ACCEPT='application/json')), ['Cálculo'])
+
+        self.create_product('Álgebra')
+        self.assertEqual(self.names(self.api.get(url, HTTP_ACCEPT='application/json')), ['Cálculo', 'Álgebra'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Textos'
+            self.category.save()
+        categories = self.api.get('/api/categories/', HTTP_ACCEPT='application/json').json()
+        self.assertEqual([category['name'] for category in categories], ['Textos'])
+
+        self.assertEqual(self.api.get('/api/products/featured/', HTTP_ACCEPT='application/json').json(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(product=self.product, reviewer=self.vendor.profile, rating=5)
+        featured = self.api.get('/api/products/featured/', HTTP_ACCEPT='application/json').json()
+        self.assertEqual([product['name'] for product in featured], ['Cálculo'])
+
+    def get(self, url):
+        response = self.api.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_orders_only_invalidate_the_products_they_touch(self):
+        other = self.create_product('Álgebra')
+        self.get(f'/api/products/{self.product.pk}/')
+        self.get(f'/api/products/{other.pk}/')
+
+        buyer = APIClient()
+        buyer.force_authenticate(User.objects.create_user('cliente', password='x'))
+        with self.captureOnCommitCallbacks(execute=True):
+            order = buyer.post('/api/orders/', {'items_to_create': [{'product_id': self.product.pk, 'quantity': 2}]},
+                               format='json')
+        self.assertEqual(order.status_code, 201, order.data)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get(f'/api/products/{other.pk}/')['inventory'], 3)
+        self.assertEqual(len(queries), 0)  # Sigue en caché
+        self.assertEqual(self.get(f'/api/products/{self.product.pk}/')['inventory'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            buyer.post(f"/api/orders/{order.data['id']}/cancel_order/")
+        self.assertEqual(self.get(f'/api/products/{self.product.pk}/')['inventory'], 3)
+
+    def test_large_responses_fall_back_to_any_change(self):
+        other = self.create_product('Álgebra')
+        url = f'/api/products/{self.product.pk}/'
+
+        with override_settings(CATALOG_CACHE={'ENABLED': True, 'MAX_DEPS': 1}):
+            self.get(url)  # Dos objetos (producto y vendedor) > MAX_DEPS
+            with self.captureOnCommitCallbacks(execute=True):
+                catalog_cache.touch(catalog_cache.PRODUCT, [other.pk])  # Otro producto
+            with CaptureQueriesContext(connection) as queries:
+                self.get(url)
+        self.assertGreater(len(queries), 0)
+
+    def test_vendor_changes_invalidate_their_products(self):
+        url = f'/api/products/{self.product.pk}/'
+        self.assertEqual(self.get(url)['vendor']['first_name'], '')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.first_name = 'Vero'
+            self.vendor.save()
+        self.assertEqual(self.get(url)['vendor']['first_name'], 'Vero')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.profile.career = 'Sistemas'
+            self.vendor.profile.save()
+        self.assertEqual(self.get(url)['vendor']['career'], 'Sistemas')
+
+    def test_visibility_classes_do_not_share_entries(self):
+        self.create_product('Borrador', status='pending')
+
+        anonymous = self.api.get('/api/products/', HTTP_ACCEPT='application/json')
+        self.api.force_authenticate(self.vendor)
+        owner = self.api.get('/api/products/', HTTP_ACCEPT='application/json')
+
+        self.assertEqual(self.names(anonymous), ['Cálculo'])
+        self.assertEqual(self.names(owner), ['Borrador', 'Cálculo'])
+        self.assertIn('private', owner['Cache-Control'])
+
+
+class ImageVariantsTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        images._stored.clear()  # Cada prueba usa otro MEDIA_ROOT con los mismos nombres
+        self.vendor = User.objects.create_user('vendedor', password='x')
+
+    def upload(self, size=(1600, 1200), filename='foto.jpg', content=None):
+        if content is None:
+            buffer = io.BytesIO()
+            Image.new('RGB', size, 'red').save(buffer, 'PNG' if filename.endswith('.png') else 'JPEG')
+            content = buffer.getvalue()
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(
+                name='Foto', description='...', price='1.00', vendor=self.vendor.profile,
+                product_image=SimpleUploadedFile(filename, content),
+            )
+
+    def variants_of(self, product):
+        return APIClient().get(f'/api/products/{product.id}/', HTTP_ACCEPT='application/json').json()[
+            'product_image_variants'
+        ]
+
+    def variant_path(self, product, variant):
+        return images.variant_name(product.product_image.name, variant)
+
+    def test_upload_generates_bounded_variants_and_serializer_exposes_them(self):
+        product = self.upload()
+
+        for variant, box in images.get_config()['SIZES'].items():
+            with default_storage.open(self.variant_path(product, variant)) as file:
+                width, height = Image.open(file).size
+            self.assertLessEqual(max(width, height), max(box))
+            self.assertEqual(round(width / height, 1), round(1600 / 1200, 1))
+
+        self.assertTrue(self.variants_of(product)['thumb'].endswith(self.variant_path(product, 'thumb')))
+
+    def test_same_name_with_another_extension_gets_its_own_variants(self):
+        jpg = self.upload(size=(1600, 1200), filename='foto.jpg')
+        png = self.upload(size=(300, 900), filename='foto.png')
+
+        self.assertNotEqual(self.variant_path(jpg, 'thumb'), self.variant_path(png, 'thumb'))
+        with default_storage.open(self.variant_path(jpg, 'thumb')) as file:
+            self.assertGreater(*Image.open(file).size)  # Sigue siendo la horizontal
+
+    def test_missing_or_failed_variants_point_to_the_original(self):
+        with self.assertLogs('markettec.images', 'ERROR'):
+            product = self.upload(content=b'no es una imagen')
+
+        variants = self.variants_of(product)
+        self.assertTrue(variants['thumb'].endswith(product.product_image.url))
+        self.assertEqual(variants['thumb'], variants['medium'])
+
+    def test_missing_variants_are_not_looked_up_on_every_request(self):
+        with self.assertLogs('markettec.images', 'ERROR'):
+            product = self.upload(content=b'no es una imagen')
+
+        with mock.patch.object(default_storage, 'exists', return_value=False) as exists:
+            for _ in range(3):
+                self.variants_of(product)
+            self.assertEqual(exists.call_count, len(images.get_config()['SIZES']))
+
+            with override_settings(IMAGE_VARIANTS={'MISSING_TTL': 0}):
+                images._stored.clear()
+                self.variants_of(product)
+                self.variants_of(product)  # Ya venció: se vuelve a preguntar
+            self.assertEqual(exists.call_count, 3 * len(images.get_config()['SIZES']))
+
+    def test_variant_memo_evicts_the_least_recently_used(self):
+        with mock.patch.object(images, 'STORED_MAX', 2):
+            images.remember_variant('a.jpg', 'thumb', 'variants/a.jpg.thumb.webp')
+            images.remember_variant('b.jpg', 'thumb', 'variants/b.jpg.thumb.webp')
+            fieldfile = SimpleNamespace(name='a.jpg', storage=mock.Mock())
+            self.assertEqual(images.stored_variant(fieldfile, 'thumb'), 'variants/a.jpg.thumb.webp')  # a es la más reciente
+            images.remember_variant('c.jpg', 'thumb', None)
+
+        self.assertEqual([name for name, _ in images._stored], ['a.jpg', 'c.jpg'])
+        fieldfile.storage.exists.assert_not_called()
+
+    def test_backfill_command_recreates_missing_variants(self):
+        product = self.upload()
+        default_storage.delete(self.variant_path(product, 'thumb'))
+
+        call_command('generate_image_variants', stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists(self.variant_path(product, 'thumb')))
+
+
+class BulkImportTests(TestCase):
+
+    def setUp(self):
+        self.vendor = User.objects.create_user('vendedor', password='x')
+        self.category = Category.objects.create(name='Libros')
+        self.api = APIClient()
+        self.api.force_authenticate(self.vendor)
+
+    def post(self, data, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api.post('/api/products/bulk_import/', data, **extra)
+
+    def test_json_import_creates_then_upserts_by_sku_and_reindexes(self):
+        rows = [
+            {'sku': 'A-1', 'name': 'Cálculo diferencial', 'price': '10.00', 'category': 'libros'},
+            {'sku': 'A-2', 'name': 'Física', 'price': '12.50', 'inventory': 4, 'category': self.category.id},
+        ]
+        first = self.post(rows, format='json')
+        self.assertEqual(first.status_code, 200, first.content)
+        self.assertEqual((first.data['created'], first.data['updated'], first.data['failed']), (2, 0, 0))
+
+        rows[0]['price'] = '11.00'
+        second = self.post(rows + [{'sku': 'A-3', 'name': 'Química', 'price': '5.00'}], format='json')
+        self.assertEqual((second.data['created'], second.data['updated']), (1, 2))
+
+        product = Product.objects.get(vendor=self.vendor.profile, sku='A-1')
+        self.assertEqual(str(product.price), '11.00')
+        self.assertEqual(product.category, self.category)
+        self.assertEqual(Product.objects.filter(vendor=self.vendor.profile).count(), 3)
+        self.assertEqual(ranked_ids('diferencial'), [product.id])
+
+    def test_csv_upload_reports_invalid_rows_and_keeps_the_rest(self):
+        content = (
+            'sku,name,price,inventory,category\n'
+            'B-1,Regla,3.50,10,\n'
+            'B-2,Compás,-1,2,\n'
+            'B-3,Mochila,20.00,1,Ropa\n'
+        ).encode()
+        upload = SimpleUploadedFile('productos.csv', content, content_type='text/csv')
+        result = self.post({'file': upload}, format='multipart')
+
+        self.assertEqual(result.status_code, 200, result.content)
+        self.assertEqual((result.data['created'], result.data['failed']), (1, 2))
+        self.assertEqual([error['row'] for error in result.data['errors']], [2, 3])
+        self.assertIn('category', result.data['errors'][1]['errors'])
+        self.assertTrue(Product.objects.filter(sku='B-1', category__isnull=True).exists())
+
+    def test_rejects_empty_payload_and_anonymous_users(self):
+        self.assertEqual(self.post([], format='json').status_code, 400)
+        self.assertEqual(APIClient().post('/api/products/bulk_import/', [], format='json').status_code, 401)
+
+
+class SparseFieldsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.local_cache.clear()
+        self.vendor = User.objects.create_user('vendedor', password='x', first_name='Ana')
+        self.category = Category.objects.create(name='Libros')
+        self.product = Product.objects.create(
+            name='Cálculo', description='...', price='10.00', status='active',
+            vendor=self.vendor.profile, category=self.category
+        )
+        self.api = APIClient()
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get('/api/products/', params, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_default_shape_is_unchanged(self):
+        data, _ = self.get()
+        self.assertEqual(set(data[0]), {
+            'id', 'name', 'description', 'price', 'inventory', 'sku', 'status', 'vendor',
+            'category_name', 'product_image', 'product_image_variants', 'rating',
+        })
+        self.assertEqual(data[0]['vendor']['first_name'], 'Ana')
+
+    def test_fields_prune_output_and_joins(self):
+        data, sql = self.get(fields='id,name,price,vendor')
+        self.assertEqual(data, [{'id': self.product.id, 'name': 'Cálculo', 'price': '10.00', 'vendor': self.vendor.profile.id}])
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"description"', sql)
+
+        data, sql = self.get(fields='id,vendor.username', expand='category')
+        self.assertEqual(data[0]['vendor'], {'username': 'vendedor'})
+        self.assertEqual(data[0]['category']['name'], 'Libros')
+        self.assertIn('"auth_user"', sql)
+        self.assertNotIn('"reviews_productrating"', sql)
+
+
+class ProductQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def test_catalog_does_not_grow_with_products(self):
+        market = Marketplace()
+        self.assertQueryBudget(
+            lambda: self.api_for(None).get('/api/products/'),
+            grow=market.add_products, budget=1,
+        )
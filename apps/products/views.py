@@ -1,17 +1,24 @@
 from rest_framework import viewsets, permissions, status, response
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 
 # --- IMPORTACIONES CLAVE ---
-from django.db.models import Avg, Q 
+from django.db.models import Q
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
 from .models import Product, Category
 from .serializers import ProductSerializer, CategorySerializer
 from .permissions import IsOwnerOrAdmin, IsOwnerOnly
-from apps.users.permissions import IsAdminUser
+from . import search
+from .importer import CSVParser, ProductImporter, parse_rows
+from .cache import cache_response, PRODUCTS, CATEGORIES
+from apps.users.permissions import IsAdminUser, user_role
+from markettec.db_routers import ReplicaReadsMixin
+from markettec.renderers import FastJSONParser
+from markettec.serializers import SPARSE_FIELDS_PARAMETERS, SparseFieldsViewMixin
 
 @extend_schema(tags=['3. Productos y Categorías'])
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     def get_permissions(self):
@@ -21,6 +28,15 @@ class CategoryViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAdminUser] 
         return [permission() for permission in permission_classes]
 
+    # Las categorías son iguales para todos: una sola respuesta en caché
+    @cache_response(CATEGORIES, per_user=False)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(CATEGORIES, per_user=False)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 @extend_schema(
     tags=['3. Productos y Categorías'],
     parameters=[
@@ -29,16 +45,22 @@ class CategoryViewSet(viewsets.ModelViewSet):
             # ¡OJO AQUÍ! Debe ser STR, no STRING
             type=OpenApiTypes.STR, 
             location=OpenApiParameter.QUERY,
-            description='Búsqueda por nombre, descripción o categoría (ej. ?q=iphone)'
+            description='Búsqueda por nombre, descripción o categoría (ej. ?q=iphone). '
+                        'Cada palabra se busca por inicio de palabra ("iph" encuentra "iPhone") '
+                        'y los resultados se ordenan por relevancia.'
         )
-    ]
+    ] + SPARSE_FIELDS_PARAMETERS
 )
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ReplicaReadsMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     Endpoint de API para Productos (Modelo Marketplace Abierto).
     Soporta búsqueda con ?q=texto
+    y respuestas a la medida con ?fields= / ?expand= (ver markettec/serializers.py):
+    los JOINs salen de los campos pedidos.
     """
-    queryset = Product.objects.select_related('category', 'vendor', 'vendor__user').all()
+    # Navegar el catálogo lee de la réplica (ver markettec/db_routers.py)
+    replica_actions = ('list', 'retrieve', 'featured')
+    queryset = Product.objects.select_related('category', 'vendor', 'vendor__user', 'rating_stats').all()
     serializer_class = ProductSerializer
 
     def get_permissions(self):
@@ -47,7 +69,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if self.action in ['list', 'retrieve']:
             permission_classes = [permissions.AllowAny]
             
-        elif self.action == 'create':
+        elif self.action in ['create', 'bulk_import']:
             permission_classes = [permissions.IsAuthenticated] 
             
         elif self.action in ['update', 'partial_update', 'destroy']:
@@ -74,9 +96,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         
-        queryset = Product.objects.select_related('category', 'vendor', 'vendor__user')
+        queryset = Product.objects.select_related('category', 'vendor', 'vendor__user', 'rating_stats')
 
-        if user.is_authenticated and hasattr(user, 'profile') and user.profile.role == 'admin':
+        if user_role(user) == 'admin':
             queryset = queryset.all()
         elif user.is_authenticated and hasattr(user, 'profile'):
             queryset = queryset.filter(Q(status='active') | Q(vendor=user.profile))
@@ -87,17 +109,62 @@ class ProductViewSet(viewsets.ModelViewSet):
         query = self.request.query_params.get('q', None)
         
         if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(category__name__icontains=query)
-            )
+            queryset = self.search_queryset(queryset, query)
 
         return queryset
 
+    def search_queryset(self, queryset, query):
+        """
+        Aplica la búsqueda de texto completo (FTS5 / tsvector) y ordena
+        por relevancia, en la misma consulta del listado. Solo si el backend
+        no tiene índice (ej. SQLite sin FTS5) usa icontains.
+        """
+        ranked = search.rank_queryset(queryset, query)
+        if ranked is not None:
+            return ranked
+
+        return queryset.filter(
+            Q(name__icontains=query) | 
+            Q(description__icontains=query) |
+            Q(category__name__icontains=query)
+        )
+
+    # Catálogo en caché por visibilidad (anónimo / dueño / admin), ver products/cache.py
+    @cache_response(PRODUCTS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(PRODUCTS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(vendor=self.request.user.profile)
 
+    @extend_schema(
+        summary="Importación Masiva de Productos (CSV o JSON)",
+        description="Crea o actualiza productos por SKU (único por vendedor). "
+                    "JSON: arreglo de objetos. CSV: archivo en 'file' o cuerpo text/csv con columnas "
+                    "sku,name,description,price,inventory,category (category = ID o nombre). "
+                    "Responde cuántos se crearon/actualizaron y los errores por número de fila.",
+        request={
+            'application/json': {'type': 'array', 'items': {'type': 'object'}},
+            'multipart/form-data': {'type': 'object', 'properties': {'file': {'type': 'string', 'format': 'binary'}}},
+            'text/csv': {'type': 'string'},
+        },
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=['post'], parser_classes=[FastJSONParser, MultiPartParser, CSVParser])
+    def bulk_import(self, request):
+        """
+        Miles de filas en una sola petición. Se valida y escribe por bloques
+        (ver products/importer.py): un bloque con error no tumba a los demás.
+        """
+        data = request.FILES['file'] if 'file' in request.FILES else request.data
+        rows = parse_rows(data)
+        result = ProductImporter(vendor=request.user.profile).run(rows)
+        return response.Response(result, status=status.HTTP_200_OK)
+
     @extend_schema(summary="Marcar Agotado")
     @action(detail=True, methods=['post'])
     def mark_out_of_stock(self, request, pk=None):
@@ -114,7 +181,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     @extend_schema(summary="Mis Publicaciones")
     @action(detail=False, methods=['get'])
     def my_publications(self, request):
-        products = Product.objects.filter(vendor=self.request.user.profile)
+        products = self.shape_queryset(Product.objects.filter(vendor=self.request.user.profile))
         page = self.paginate_queryset(products)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -124,10 +191,13 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="Productos Destacados")
     @action(detail=False, methods=['get'])
+    @cache_response(PRODUCTS, per_user=False) # Solo productos activos: igual para todos
     def featured(self, request):
-        featured_products = Product.objects.filter(status='active').annotate(
-            average_rating=Avg('reviews__rating')
-        ).filter(average_rating__isnull=False).order_by('-average_rating')
+        # Leemos el promedio ya calculado (reviews.ProductRating) en lugar de
+        # hacer Avg() sobre todas las reseñas en cada petición.
+        featured_products = self.shape_queryset(Product.objects.filter(
+            status='active', rating_stats__review_count__gt=0
+        )).order_by('-rating_stats__average', '-rating_stats__review_count')
         
         top_products = featured_products[:5]
         serializer = self.get_serializer(top_products, many=True)
@@ -4,8 +4,9 @@ from rest_framework import serializers
 from .models import Report
 from apps.users.serializers import PublicProfileSerializer
 from apps.products.serializers import ProductSerializer
+from markettec.serializers import SparseFieldsMixin
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para LEER y CREAR reportes.
     """
@@ -1,3 +1,21 @@
 from django.test import TestCase
 
-# Create your tests here.
+from markettec.testing import Marketplace, QueryBudgetMixin
+
+
+class ReportQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.market = Marketplace()
+
+    def test_admin_list_does_not_grow_with_reports(self):
+        self.assertQueryBudget(
+            lambda: self.api_for(self.market.admin).get('/api/reports/'),
+            grow=self.market.add_reports, budget=1,
+        )
+
+    def test_my_reports_does_not_grow_with_reports(self):
+        self.assertQueryBudget(
+            lambda: self.api_for(self.market.client).get('/api/reports/my_reports/'),
+            grow=self.market.add_reports, budget=1,
+        )
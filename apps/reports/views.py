@@ -5,12 +5,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Report
 from .serializers import ReportSerializer
-from apps.users.permissions import IsAdminUser
-from apps.audits.models import AuditLog
-from drf_spectacular.utils import extend_schema
+from apps.users.permissions import IsAdminUser, user_role
+from apps.audits.pipeline import log_action
+from markettec.params import parse_moment
+from markettec.exports import EXPORT_RENDERERS, stream_export
+from markettec.serializers import SparseFieldsViewMixin
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
 @extend_schema(tags=['7. Reportes'])
-class ReportViewSet(mixins.CreateModelMixin,
+class ReportViewSet(SparseFieldsViewMixin,
+                    mixins.CreateModelMixin,
                     mixins.ListModelMixin,
                     mixins.RetrieveModelMixin,
                     mixins.UpdateModelMixin,
@@ -19,6 +23,8 @@ class ReportViewSet(mixins.CreateModelMixin,
     API de Reportes y Moderación.
     - Usuarios: Crean reportes y ven los suyos.
     - Admins: Gestionan reportes, banean vendedores o desestiman quejas.
+    (El reportante y el producto anidados salen con los JOINs que arma
+    SparseFieldsViewMixin, sin una consulta por reporte.)
     """
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
@@ -31,7 +37,7 @@ class ReportViewSet(mixins.CreateModelMixin,
         user = self.request.user
         
         # Admin ve todo (con filtros)
-        if user.is_authenticated and hasattr(user, 'profile') and user.profile.role == 'admin':
+        if user_role(user) == 'admin':
             status_param = self.request.query_params.get('status', None)
             if status_param:
                 return Report.objects.filter(status=status_param)
@@ -46,7 +52,7 @@ class ReportViewSet(mixins.CreateModelMixin,
             return [permissions.IsAuthenticated()] 
         
         # Para moderar (banear, desestimar, listar), solo Admin
-        if self.action in ['list', 'retrieve', 'update', 'partial_update', 'ban_vendor', 'dismiss_report']:
+        if self.action in ['list', 'retrieve', 'update', 'partial_update', 'ban_vendor', 'dismiss_report', 'export']:
             return [IsAdminUser()]
             
         return [permissions.IsAuthenticated()]
@@ -55,7 +61,7 @@ class ReportViewSet(mixins.CreateModelMixin,
     @extend_schema(summary="Mis Reportes")
     @action(detail=False, methods=['get'])
     def my_reports(self, request):
-        user_reports = Report.objects.filter(reporter=self.request.user.profile)
+        user_reports = self.shape_queryset(Report.objects.filter(reporter=self.request.user.profile))
         page = self.paginate_queryset(user_reports)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -97,11 +103,7 @@ class ReportViewSet(mixins.CreateModelMixin,
         report.save()
 
         # Auditoría
-        AuditLog.objects.create(
-            user=request.user,
-            action='USER_BANNED',
-            details=f"Admin baneó a {vendor_profile.user.username} por reporte #{report.id}"
-        )
+        log_action(request.user, 'USER_BANNED', f"Admin baneó a {vendor_profile.user.username} por reporte #{report.id}")
 
         return Response({
             "status": "success", 
@@ -127,13 +129,48 @@ class ReportViewSet(mixins.CreateModelMixin,
         report.status = 'resolved'
         report.save()
 
-        AuditLog.objects.create(
-            user=request.user,
-            action='REPORT_DISMISSED',
-            details=f"Reporte #{report.id} desestimado por falta de pruebas."
-        )
+        log_action(request.user, 'REPORT_DISMISSED', f"Reporte #{report.id} desestimado por falta de pruebas.")
 
         return Response({
             "status": "success", 
             "message": "Reporte cerrado sin penalización (Evidencia insuficiente)."
-        })
\ No newline at end of file
+        })
+
+    # =========================================================
+    #  EXPORTAR (Admin)
+    # =========================================================
+    @extend_schema(
+        summary="Exportar Reportes (CSV / NDJSON en Streaming)",
+        description="Formato con ?format=csv|ndjson o el header Accept.",
+        parameters=[
+            OpenApiParameter(name='status', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description="'pending' o 'resolved'."),
+            OpenApiParameter(name='since', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Desde (AAAA-MM-DD o fecha y hora ISO).'),
+            OpenApiParameter(name='until', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Hasta, inclusive (AAAA-MM-DD o fecha y hora ISO).'),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """ GET /api/reports/export/?status=pending&since=2025-11-01 """
+        params = request.query_params
+        reports = self.get_queryset()  # (ya filtra por 'status')
+        if params.get('since'):
+            reports = reports.filter(created_at__gte=parse_moment('since', params['since']))
+        if params.get('until'):
+            reports = reports.filter(created_at__lte=parse_moment('until', params['until'], end_of_day=True))
+
+        return stream_export(request, reports, [
+            ('id', 'id'),
+            ('fecha', 'created_at'),
+            ('estatus', 'status'),
+            ('reportante_id', 'reporter_id'),
+            ('reportante', 'reporter__user__username'),
+            ('producto_id', 'product_id'),
+            ('producto', 'product__name'),
+            ('vendedor_id', 'product__vendor_id'),
+            ('razon', 'reason'),
+            ('evidencia', 'evidence'),
+        ], 'reportes')
@@ -1,11 +1,24 @@
 # En: apps/reviews/admin.py
 
 from django.contrib import admin
-from .models import Review
+from .models import Review, ProductRating
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('product', 'reviewer', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
     search_fields = ('product__name', 'reviewer__user__username', 'comment')
-    readonly_fields = ('product', 'reviewer', 'created_at')
\ No newline at end of file
+    readonly_fields = ('product', 'reviewer', 'created_at')
+
+@admin.register(ProductRating)
+class ProductRatingAdmin(admin.ModelAdmin):
+    """
+    Solo lectura: estas estadísticas se calculan solas
+    (o con 'python manage.py reconcile_ratings').
+    """
+    list_display = ('product', 'average', 'review_count', 'updated_at')
+    search_fields = ('product__name',)
+    readonly_fields = [field.name for field in ProductRating._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.reviews' # <-- ¡ASEGÚRATE DE QUE DIGA "apps.reviews"!
\ No newline at end of file
+    name = 'apps.reviews' # <-- ¡ASEGÚRATE DE QUE DIGA "apps.reviews"!
+
+    def ready(self):
+        # Signals que mantienen las estadísticas de calificación (ProductRating)
+        import apps.reviews.signals
@@ -0,0 +1,22 @@
+# En: apps/reviews/management/commands/reconcile_ratings.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction, DEFAULT_DB_ALIAS
+
+from apps.reviews.ratings import recompute
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero las estadísticas de calificación (ProductRating) a partir de las reseñas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias de la base de datos (default: "default").'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        with transaction.atomic(using=using):
+            total = recompute(using=using)
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas recalculadas para {total} productos.'))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_product_ratings(apps, schema_editor):
+    """ Calcula las estadísticas iniciales con las reseñas existentes. """
+    Review = apps.get_model('reviews', 'Review')
+    ProductRating = apps.get_model('reviews', 'ProductRating')
+    db = schema_editor.connection.alias
+
+    stars = {f'stars_{n}': Count('id', filter=Q(rating=n)) for n in range(1, 6)}
+    rows = Review.objects.using(db).order_by().values('product_id').annotate(
+        count=Count('id'), total=Sum('rating'), **stars
+    )
+    ProductRating.objects.using(db).bulk_create([
+        ProductRating(
+            product_id=row['product_id'],
+            review_count=row['count'],
+            rating_sum=row['total'],
+            average=row['total'] / row['count'],
+            **{field: row[field] for field in stars}
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search_index'),
+        ('reviews', '0002_remove_review_unique_review_per_user_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRating',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to='products.product', verbose_name='Producto')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Número de Reseñas')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Suma de Calificaciones')),
+                ('average', models.FloatField(default=0, verbose_name='Promedio')),
+                ('stars_1', models.PositiveIntegerField(default=0, verbose_name='1 Estrella')),
+                ('stars_2', models.PositiveIntegerField(default=0, verbose_name='2 Estrellas')),
+                ('stars_3', models.PositiveIntegerField(default=0, verbose_name='3 Estrellas')),
+                ('stars_4', models.PositiveIntegerField(default=0, verbose_name='4 Estrellas')),
+                ('stars_5', models.PositiveIntegerField(default=0, verbose_name='5 Estrellas')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+            ],
+            options={
+                'verbose_name': 'Calificación de Producto',
+                'verbose_name_plural': 'Calificaciones de Productos',
+                'indexes': [models.Index(fields=['-average', 'product'], name='reviews_rating_avg_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_product_ratings, migrations.RunPython.noop),
+    ]
@@ -47,4 +47,49 @@ class Review(models.Model):
 
     def __str__(self):
         reviewer_name = self.reviewer.user.username if self.reviewer and self.reviewer.user else 'N/A'
-        return f"Reseña de {reviewer_name} para {self.product.name} ({self.rating} estrellas)"
\ No newline at end of file
+        return f"Reseña de {reviewer_name} para {self.product.name} ({self.rating} estrellas)"
+
+class ProductRating(models.Model):
+    """
+    Estadísticas DESNORMALIZADAS de calificación por producto.
+    Se mantienen incrementalmente con los signals de reviews/signals.py
+    (crear, editar o borrar una reseña) para que 'featured' y el
+    ProductSerializer no tengan que hacer Avg() sobre todas las reseñas.
+
+    Si algo se desfasa: python manage.py reconcile_ratings
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating_stats',
+        verbose_name='Producto'
+    )
+
+    review_count = models.PositiveIntegerField(default=0, verbose_name='Número de Reseñas')
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name='Suma de Calificaciones')
+    average = models.FloatField(default=0, verbose_name='Promedio')
+
+    # Histograma de estrellas (1 a 5)
+    stars_1 = models.PositiveIntegerField(default=0, verbose_name='1 Estrella')
+    stars_2 = models.PositiveIntegerField(default=0, verbose_name='2 Estrellas')
+    stars_3 = models.PositiveIntegerField(default=0, verbose_name='3 Estrellas')
+    stars_4 = models.PositiveIntegerField(default=0, verbose_name='4 Estrellas')
+    stars_5 = models.PositiveIntegerField(default=0, verbose_name='5 Estrellas')
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')
+
+    class Meta:
+        verbose_name = 'Calificación de Producto'
+        verbose_name_plural = 'Calificaciones de Productos'
+        indexes = [
+            # Para 'featured': los mejor calificados primero
+            models.Index(fields=['-average', 'product'], name='reviews_rating_avg_idx'),
+        ]
+
+    @property
+    def histogram(self):
+        return {str(stars): getattr(self, f'stars_{stars}') for stars in range(1, 6)}
+
+    def __str__(self):
+        return f"{self.product_id}: {self.average:.2f} ({self.review_count} reseñas)"
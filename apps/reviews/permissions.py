@@ -30,4 +30,5 @@ class IsReviewOwnerOrReadOnly(BasePermission):
         
         # Para editar/borrar, el 'reviewer' (autor) de la reseña
         # debe ser el perfil del usuario que hace la petición.
-        return obj.reviewer == request.user.profile
\ No newline at end of file
+        # (Comparamos IDs: no hace falta cargar el perfil del autor)
+        return hasattr(request.user, 'profile') and obj.reviewer_id == request.user.profile.id
\ No newline at end of file
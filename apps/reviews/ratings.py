@@ -0,0 +1,105 @@
+# En: apps/reviews/ratings.py
+
+"""
+Mantenimiento de las estadísticas desnormalizadas (ProductRating).
+
+- apply_review(): suma o resta UNA reseña con un solo UPDATE basado en F(),
+  así dos reseñas simultáneas no se pisan.
+- recompute(): recalcula todo desde la tabla de reseñas (para reparar desfases).
+"""
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+
+from .models import Review, ProductRating
+
+STAR_FIELDS = [f'stars_{stars}' for stars in range(1, 6)]
+RECOMPUTE_BATCH_SIZE = 1000
+
+
+def apply_review(product_id, rating, sign, using=DEFAULT_DB_ALIAS):
+    """
+    Aplica una reseña a las estadísticas del producto.
+    sign = +1 al crear, -1 al borrar (editar = -1 viejo, +1 nuevo).
+    """
+    if product_id is None or rating not in range(1, 6):
+        return
+
+    star_field = f'stars_{rating}'
+    new_count = F('review_count') + sign
+    new_sum = F('rating_sum') + sign * rating
+
+    # En SQL el lado derecho del SET usa los valores ANTERIORES de la fila,
+    # así que el promedio se calcula con los totales ya actualizados.
+    average = Cast(new_sum, FloatField()) / Cast(new_count, FloatField())
+    if sign < 0:
+        average = Case(When(review_count__lte=1, then=Value(0.0)), default=average)
+
+    queryset = ProductRating.objects.using(using).filter(pk=product_id)
+    if sign < 0:
+        # Nunca bajamos de cero (si hubo desfase lo arregla reconcile_ratings)
+        queryset = queryset.filter(review_count__gt=0, **{f'{star_field}__gt': 0})
+
+    updated = queryset.update(
+        review_count=new_count,
+        rating_sum=new_sum,
+        average=average,
+        **{star_field: F(star_field) + sign}
+    )
+
+    if not updated and sign > 0:
+        # Primera reseña del producto: creamos la fila y reintentamos.
+        # (ignore_conflicts por si otra petición la creó al mismo tiempo)
+        ProductRating.objects.using(using).bulk_create(
+            [ProductRating(product_id=product_id)], ignore_conflicts=True
+        )
+        apply_review(product_id, rating, sign, using=using)
+
+
+def recompute(using=DEFAULT_DB_ALIAS):
+    """
+    Recalcula desde cero las estadísticas de TODOS los productos.
+    Regresa el número de productos con reseñas.
+    """
+    aggregates = Review.objects.using(using).order_by().values('product_id').annotate(
+        count=Count('id'),
+        total=Sum('rating'),
+        **{
+            field: Count('id', filter=Q(rating=stars))
+            for stars, field in enumerate(STAR_FIELDS, start=1)
+        }
+    )
+
+    batch = []
+    total_products = 0
+    for row in aggregates.iterator(chunk_size=RECOMPUTE_BATCH_SIZE):
+        batch.append(ProductRating(
+            product_id=row['product_id'],
+            review_count=row['count'],
+            rating_sum=row['total'] or 0,
+            average=(row['total'] or 0) / row['count'] if row['count'] else 0,
+            **{field: row[field] for field in STAR_FIELDS}
+        ))
+        if len(batch) >= RECOMPUTE_BATCH_SIZE:
+            total_products += _upsert(batch, using)
+            batch = []
+    if batch:
+        total_products += _upsert(batch, using)
+
+    # Productos que ya no tienen reseñas: fuera de la tabla
+    ProductRating.objects.using(using).exclude(
+        product_id__in=Review.objects.using(using).values('product_id')
+    ).delete()
+
+    return total_products
+
+
+def _upsert(batch, using):
+    ProductRating.objects.using(using).bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['review_count', 'rating_sum', 'average', *STAR_FIELDS],
+    )
+    return len(batch)
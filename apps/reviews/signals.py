@@ -0,0 +1,47 @@
+# En: apps/reviews/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.products.cache import invalidate, PRODUCTS
+from .models import Review
+from .ratings import apply_review
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, raw=False, using=None, **kwargs):
+    """ Al EDITAR, guardamos la calificación anterior para poder restarla. """
+    instance._previous_rating = None
+    if raw or not instance.pk:
+        return
+    instance._previous_rating = Review.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return  # loaddata: usar 'reconcile_ratings'
+
+    previous = getattr(instance, '_previous_rating', None)
+    current = (instance.product_id, instance.rating)
+
+    if not created and previous == current:
+        return
+
+    if previous:
+        apply_review(*previous, sign=-1, using=using)
+    apply_review(*current, sign=1, using=using)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, using=None, **kwargs):
+    apply_review(instance.product_id, instance.rating, sign=-1, using=using)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog_cache(sender, **kwargs):
+    """ El promedio y los destacados salen en el catálogo en caché. """
+    invalidate(PRODUCTS)
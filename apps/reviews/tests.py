@@ -1,3 +1,101 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models.query import QuerySet
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.products.models import Product
+from markettec.testing import Marketplace, QueryBudgetMixin
+from .models import ProductRating, Review
+from .ratings import apply_review
+
+
+class ProductRatingTests(TestCase):
+
+    def setUp(self):
+        self.vendor = User.objects.create_user('vendedor', password='x')
+        self.reviewer = User.objects.create_user('cliente', password='x')
+        self.product = self.create_product('Cálculo')
+
+    def create_product(self, name):
+        return Product.objects.create(
+            name=name, description='...', price='10.00', inventory=3, status='active', vendor=self.vendor.profile
+        )
+
+    def review(self, rating, product=None):
+        return Review.objects.create(product=product or self.product, reviewer=self.reviewer.profile, rating=rating)
+
+    def stats(self, product=None):
+        stats = ProductRating.objects.get(pk=(product or self.product).pk)
+        return stats.review_count, stats.rating_sum, stats.average, [getattr(stats, f'stars_{n}') for n in range(1, 6)]
+
+    def test_create_update_and_delete_keep_the_aggregate(self):
+        first = self.review(5)
+        self.review(3)
+        self.assertEqual(self.stats(), (2, 8, 4.0, [0, 0, 1, 0, 1]))
+
+        first.rating = 1
+        first.save()
+        self.assertEqual(self.stats(), (2, 4, 2.0, [1, 0, 1, 0, 0]))
+
+        first.comment = 'Sin cambio de calificación'
+        first.save()
+        self.assertEqual(self.stats(), (2, 4, 2.0, [1, 0, 1, 0, 0]))
+
+        first.delete()
+        self.assertEqual(self.stats(), (1, 3, 3.0, [0, 0, 1, 0, 0]))
+        Review.objects.get().delete()
+        self.assertEqual(self.stats(), (0, 0, 0.0, [0, 0, 0, 0, 0]))
+
+    def test_first_review_survives_a_concurrent_row_creation(self):
+        original = QuerySet.bulk_create
+
+        def racing(queryset, objs, **kwargs):
+            # Otra petición crea la fila (con su reseña) justo antes que nosotros
+            ProductRating.objects.create(product=self.product, review_count=1, rating_sum=4, average=4, stars_4=1)
+            return original(queryset, objs, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', autospec=True, side_effect=racing) as bulk_create:
+            apply_review(self.product.pk, 2, sign=1)
+
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertEqual(self.stats(), (2, 6, 3.0, [0, 1, 0, 1, 0]))
+
+    def test_reconcile_ratings_repairs_drifted_counters(self):
+        self.review(4)
+        self.review(2)
+        ProductRating.objects.filter(pk=self.product.pk).update(review_count=7, rating_sum=1, average=0.1, stars_4=0)
+        orphan = self.create_product('Sin reseñas')
+        ProductRating.objects.create(product=orphan, review_count=3, rating_sum=15, average=5)
+
+        call_command('reconcile_ratings', stdout=io.StringIO())
+
+        self.assertEqual(self.stats(), (2, 6, 3.0, [0, 1, 0, 1, 0]))
+        self.assertFalse(ProductRating.objects.filter(pk=orphan.pk).exists())
+
+    def test_featured_reads_the_denormalized_rating(self):
+        other = self.create_product('Álgebra')
+        self.review(5)
+        self.review(3, product=other)
+
+        def featured():
+            return [product['name'] for product in APIClient().get('/api/products/featured/').json()]
+
+        self.assertEqual(featured(), ['Cálculo', 'Álgebra'])
+        # Solo cambia la tabla desnormalizada, no las reseñas: manda lo desnormalizado
+        ProductRating.objects.filter(pk=other.pk).update(average=5.0, review_count=10)
+        self.assertEqual(featured(), ['Álgebra', 'Cálculo'])
+
+
+class ReviewQueryBudgetTests(QueryBudgetMixin, TestCase):
 
-# Create your tests here.
+    def test_product_reviews_do_not_grow_with_reviews(self):
+        market = Marketplace()
+        product = market.add_products(1)[0]
+        self.assertQueryBudget(
+            lambda: self.api_for(None).get(f'/api/reviews/?product_id={product.id}'),
+            grow=lambda count: market.add_reviews(count, product=product), budget=1,
+        )
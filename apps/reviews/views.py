@@ -3,9 +3,10 @@ from .models import Review
 from .serializers import ReviewSerializer
 from .permissions import IsReviewOwnerOrReadOnly
 from drf_spectacular.utils import extend_schema
+from markettec.db_routers import ReplicaReadsMixin
 
 @extend_schema(tags=['4. Reseñas'])
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     """
     API Endpoint para Reseñas (Create, Edit, Delete, View).
     - Cualquiera (GET): Puede VER reseñas.
@@ -21,6 +22,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     
     serializer_class = ReviewSerializer
     permission_classes = [IsReviewOwnerOrReadOnly]
+    replica_actions = ('list',) # Leer reseñas va a la réplica
 
     def get_queryset(self):
         """
@@ -0,0 +1,113 @@
+# En: apps/users/authentication.py
+
+"""
+Autenticación JWT sin consultar la BD en cada petición.
+
+Al hacer login, el token lleva los datos que piden los permisos:
+
+    {"user_id": 5, "username": "ana", "is_staff": false,
+     "profile_id": 7, "role": "vendor", "is_banned": false, "claims_at": ..., ...}
+
+ClaimsJWTAuthentication arma con eso un User y su Profile "ligeros": son
+instancias reales de los modelos (sirven para FKs, filtros y comparaciones)
+pero solo con esos campos cargados. Si una vista lee otro campo (ej. email),
+Django lo trae de la BD en ese momento, así que nunca se lee un dato falso.
+
+Los baneos se siguen respetando: ver revocation.py.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Profile
+from .revocation import is_revoked
+
+User = get_user_model()
+
+USER_CLAIMS = ('username', 'is_staff', 'is_superuser')
+PROFILE_CLAIMS = ('role', 'is_banned')
+
+BANNED_MESSAGE = 'Tu cuenta ha sido suspendida permanentemente.'
+
+
+def add_profile_claims(token, user):
+    """ Copia al token los datos que necesitan los permisos. """
+    # Momento de la lectura (con fracciones de segundo) para compararlo con las revocaciones
+    token['claims_at'] = time.time()
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+
+    try:
+        profile = user.profile # (Casi siempre ya viene en caché del login)
+    except Profile.DoesNotExist:
+        profile = None
+    token['profile_id'] = profile.id if profile else None
+    for claim in PROFILE_CLAIMS:
+        token[claim] = getattr(profile, claim) if profile else None
+    return token
+
+
+def user_from_claims(token):
+    """ User (y Profile) armados con los datos del token, sin tocar la BD. """
+    user = User.from_db(
+        DEFAULT_DB_ALIAS,
+        ['id', 'is_active', *USER_CLAIMS],
+        [token[api_settings.USER_ID_CLAIM], True, *(token.get(claim) for claim in USER_CLAIMS)],
+    )
+    if token.get('profile_id') is not None:
+        profile = Profile.from_db(
+            DEFAULT_DB_ALIAS,
+            ['id', 'user_id', *PROFILE_CLAIMS],
+            [token['profile_id'], user.id, *(token[claim] for claim in PROFILE_CLAIMS)],
+        )
+        # 'user.profile' y 'profile.user' ya no hacen consulta
+        user._state.fields_cache['profile'] = profile
+        profile._state.fields_cache['user'] = user
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """ JWTAuthentication que arma el usuario desde el token (0 consultas). """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken('El token no contiene un usuario reconocible.')
+
+        if is_revoked(user_id, validated_token):
+            raise AuthenticationFailed('Tu sesión cambió. Vuelve a iniciar sesión o refresca el token.', code='token_revoked')
+
+        # Tokens emitidos antes de agregar los claims: el camino de siempre (BD)
+        if 'profile_id' not in validated_token:
+            return super().get_user(validated_token)
+
+        if validated_token.get('is_banned'):
+            raise AuthenticationFailed(BANNED_MESSAGE, code='user_banned')
+        return user_from_claims(validated_token)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    El refresh SÍ revisa la BD: rechaza baneados/inactivos y
+    emite el nuevo access token con el rol y baneo actuales.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = User.objects.select_related('profile').filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        access = add_profile_claims(refresh.access_token, user)
+        if access['is_banned']:
+            raise AuthenticationFailed(BANNED_MESSAGE, code='user_banned')
+        return {'access': str(access)}
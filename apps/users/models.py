@@ -63,6 +63,19 @@ class Profile(models.Model):
     def __str__(self):
         return f'Perfil de {self.user.username} ({self.get_role_display()})'
 
+    # Campos que viajan en el JWT (ver apps/users/authentication.py)
+    TOKEN_CLAIM_FIELDS = ('role', 'is_banned')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordamos cómo venían para saber si hay que revocar tokens al guardar
+        instance._loaded_claims = instance.token_claims()
+        return instance
+
+    def token_claims(self):
+        return {field: self.__dict__.get(field) for field in self.TOKEN_CLAIM_FIELDS}
+
 # --- Señales (Signals) para la magia automática ---
 # Estas funciones crean un Profile automáticamente cada vez que un User se registra.
 
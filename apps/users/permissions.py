@@ -2,6 +2,17 @@
 
 from rest_framework.permissions import BasePermission
 
+
+def user_role(user):
+    """
+    Rol del usuario o None (anónimo / sin perfil).
+    Con ClaimsJWTAuthentication el perfil viene del token: no hay consulta.
+    """
+    if not user or not user.is_authenticated or not hasattr(user, 'profile'):
+        return None
+    return user.profile.role
+
+
 class IsAdminUser(BasePermission):
     """
     Permite el acceso solo a usuarios administradores.
@@ -9,12 +20,8 @@ class IsAdminUser(BasePermission):
     message = "Acción no permitida. Solo los administradores pueden realizar esta acción."
 
     def has_permission(self, request, view):
-        # Comprueba que el usuario esté autenticado y tenga un perfil
-        if not request.user or not request.user.is_authenticated or not hasattr(request.user, 'profile'):
-            return False
-        
-        # Comprueba que el rol sea 'admin'
-        return request.user.profile.role == 'admin'
+        # Autenticado, con perfil y con rol 'admin'
+        return user_role(request.user) == 'admin'
 
 
 class IsOwnerOrAdmin(BasePermission):
@@ -33,8 +40,8 @@ class IsOwnerOrAdmin(BasePermission):
         'obj' es la instancia del modelo 'User' que se está consultando.
         """
         # Si el usuario es admin, tiene permiso
-        if hasattr(request.user, 'profile') and request.user.profile.role == 'admin':
+        if user_role(request.user) == 'admin':
             return True
         
-        # Si el usuario es el dueño del perfil, tiene permiso
-        return obj == request.user
\ No newline at end of file
+        # Si el usuario es el dueño del perfil, tiene permiso (comparamos IDs)
+        return obj.pk == request.user.pk
\ No newline at end of file
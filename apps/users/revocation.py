@@ -0,0 +1,37 @@
+# En: apps/users/revocation.py
+
+"""
+Revocación de tokens de acceso (baneos, cambios de rol, cuentas desactivadas).
+
+El access token ya trae el rol y el baneo (ver authentication.py), así que
+no se consulta la BD en cada petición. Cuando esos datos cambian, se guarda
+en el caché compartido la hora del cambio: todo token emitido ANTES queda
+inválido (401) y el cliente debe refrescarlo; el refresh sí revisa la BD.
+
+Costo por petición: un 'cache.get' de una llave que casi nunca existe.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY = 'auth:revoked:{}'
+
+
+def revoke_tokens(user_id):
+    """ Invalida todos los access tokens emitidos hasta ahora para el usuario. """
+    # Basta con recordarlo mientras viva el token más largo
+    lifetime = settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME']
+    cache.set(KEY.format(user_id), time.time(), timeout=int(lifetime.total_seconds()))
+
+
+def is_revoked(user_id, token):
+    revoked_at = cache.get(KEY.format(user_id))
+    if revoked_at is None:
+        return False
+    # 'claims_at' tiene fracciones de segundo: un login justo después del cambio sí vale.
+    # Tokens sin él solo traen 'iat' (segundos enteros): en el mismo segundo se rechaza.
+    if token.get('claims_at') is not None:
+        return token['claims_at'] < revoked_at
+    return token.get('iat') is None or token['iat'] <= int(revoked_at)
@@ -4,14 +4,17 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework.validators import UniqueValidator
 from .models import Profile  
-from apps.audits.models import AuditLog
+from apps.audits.pipeline import log_action
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import add_profile_claims
+from markettec.images import ImageVariantsField
+from markettec.serializers import SparseFieldsMixin
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
 
 # --- 1. SERIALIZER PÚBLICO (Para la API de Productos/Vendedores) ---
-class PublicProfileSerializer(serializers.ModelSerializer):
+class PublicProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para MOSTRAR PÚBLICAMENTE al vendedor.
     (Solo muestra campos no sensibles)
@@ -19,6 +22,7 @@ class PublicProfileSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(source='user.first_name', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
     user_id = serializers.IntegerField(source='user.id', read_only=True)
+    profile_image_variants = ImageVariantsField(source='profile_image') # Miniaturas
     
     class Meta:
         model = Profile
@@ -28,6 +32,7 @@ class PublicProfileSerializer(serializers.ModelSerializer):
             'first_name', 
             'username',
             'profile_image',
+            'profile_image_variants',
             'career',
         ]
 
@@ -98,6 +103,8 @@ class UserSerializer(serializers.ModelSerializer):
 
 # --- SERIALIZERS PARA EL PERFIL PÚBLICO DEL USUARIO ---
 class SimpleProfileSerializer(serializers.ModelSerializer):
+    profile_image_variants = ImageVariantsField(source='profile_image')
+
     class Meta:
         model = Profile
         fields = [
@@ -106,7 +113,8 @@ class SimpleProfileSerializer(serializers.ModelSerializer):
             'control_number',
             'career',
             'date_of_birth',
-            'profile_image'
+            'profile_image',
+            'profile_image_variants'
         ]
 
 class SimpleUserSerializer(serializers.ModelSerializer):
@@ -118,6 +126,11 @@ class SimpleUserSerializer(serializers.ModelSerializer):
 
 # --- LOGIN SEGURO (Baneo) ---
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Rol, perfil y baneo viajan en el token: los permisos ya no consultan la BD
+        return add_profile_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         # 1. Validación estándar (verifica usuario y contraseña)
         # Si la contraseña está mal, aquí lanzará el error 401 normal.
@@ -193,13 +206,6 @@ class RegisterSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**user_data)
         Profile.objects.filter(user=user).update(**profile_data)
 
-        try:
-            AuditLog.objects.create(
-                user=user,
-                action='USER_REGISTERED',
-                details=f"Nuevo usuario registrado: '{user.username}' (ID: {user.id})"
-            )
-        except Exception:
-            pass
+        log_action(user, 'USER_REGISTERED', f"Nuevo usuario registrado: '{user.username}' (ID: {user.id})")
 
         return user
\ No newline at end of file
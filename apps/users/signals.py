@@ -1,10 +1,17 @@
 # En: apps/users/signals.py
 
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.urls import reverse
 from django_rest_passwordreset.signals import reset_password_token_created
 from django.core.mail import send_mail  
 
+from markettec import images
+
+from .models import Profile
+from .revocation import revoke_tokens
+
 
 @receiver(reset_password_token_created)
 def password_reset_token_created(sender, instance, reset_password_token, *args, **kwargs):
@@ -45,4 +52,28 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
         "no-reply@markettec.com", # Email remitente (puede ser cualquiera)
         [email_to], # Email destinatario
         fail_silently=False,
-    )
\ No newline at end of file
+    )
+
+
+# --- Revocación de tokens (ver revocation.py) ---
+
+@receiver(post_save, sender=Profile)
+def revoke_tokens_on_claims_change(sender, instance, created, **kwargs):
+    """ Si cambió el rol o el baneo, los tokens viejos ya mienten: se invalidan. """
+    if created:
+        return
+    loaded = getattr(instance, '_loaded_claims', {})
+    current = instance.token_claims()
+    if any(loaded.get(field) != value for field, value in current.items() if value is not None):
+        revoke_tokens(instance.user_id)
+    instance._loaded_claims = current
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_deactivation(sender, instance, **kwargs):
+    if not instance.is_active:
+        revoke_tokens(instance.pk)
+
+
+# --- Miniaturas de la foto de perfil (ver markettec/images.py) ---
+images.track(Profile, 'profile_image')
@@ -1,3 +1,92 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from markettec.testing import Marketplace, QueryBudgetMixin
+from .revocation import revoke_tokens
+
+
+class ClaimsAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana', password='Secreta123!')
+        self.user.profile.role = 'vendor'
+        self.user.profile.save()
+        self.api = APIClient()
+
+    def login(self, user='ana'):
+        response = self.api.post('/api/token/', {'username': user, 'password': 'Secreta123!'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def test_access_token_carries_role_profile_and_ban(self):
+        token = AccessToken(self.login()['access'])
+        self.assertEqual(
+            (token['role'], token['profile_id'], token['is_banned'], token['username']),
+            ('vendor', self.user.profile.id, False, 'ana'),
+        )
+
+    def test_permission_checks_do_not_query_user_or_profile(self):
+        self.login()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        # (La consulta de los pedidos sí une al cliente: lo pide OrderSerializer)
+        tables = ' '.join(query['sql'] for query in queries if not query['sql'].startswith('SELECT "orders_order"'))
+        self.assertNotIn('auth_user', tables)
+        self.assertNotIn('users_profile', tables)
+
+    def test_ban_revokes_existing_tokens_and_refresh(self):
+        tokens = self.login()
+        admin = User.objects.create_user('admin', password='x')
+        admin.profile.role = 'admin'
+        admin.profile.save()
+        admin_api = APIClient()
+        admin_api.force_authenticate(admin)
+
+        self.assertEqual(self.api.get('/api/orders/').status_code, 200)
+        response = admin_api.post(f'/api/users/{self.user.id}/ban_user/', {'reason': 'spam'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.api.get('/api/orders/').status_code, 401)
+        response = self.api.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_is_picked_up_on_refresh(self):
+        tokens = self.login()
+        profile = User.objects.get(pk=self.user.pk).profile
+        profile.role = 'client'
+        profile.save()
+
+        self.assertEqual(self.api.get('/api/orders/').status_code, 401)
+        response = self.api.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'client')
+
+    def test_unrelated_profile_saves_do_not_revoke(self):
+        self.login()
+        profile = User.objects.get(pk=self.user.pk).profile
+        profile.career = 'Sistemas'
+        profile.save()
+        self.assertEqual(self.api.get('/api/orders/').status_code, 200)
+
+    def test_revocation_only_affects_that_user(self):
+        self.login()
+        revoke_tokens(self.user.id + 1000)
+        self.assertEqual(self.api.get('/api/orders/').status_code, 200)
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def test_admin_list_does_not_grow_with_users(self):
+        market = Marketplace()
+        self.assertQueryBudget(
+            lambda: self.api_for(market.admin).get('/api/users/'),
+            grow=market.add_users, budget=1,
+        )
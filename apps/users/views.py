@@ -1,9 +1,8 @@
 from rest_framework import viewsets, permissions, decorators, response, status, mixins
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserSerializer, RegisterSerializer, SimpleUserSerializer
+from .serializers import UserSerializer, RegisterSerializer, SimpleUserSerializer, MyTokenObtainPairSerializer
 from .permissions import IsAdminUser, IsOwnerOrAdmin
-from apps.audits.models import AuditLog
+from apps.audits.pipeline import log_action
 from drf_spectacular.utils import extend_schema
 
 User = get_user_model()
@@ -15,7 +14,8 @@ class UserViewSet(viewsets.ModelViewSet):
     Permite a los Admins ver la lista completa y banear, 
     y a los usuarios editar su propio perfil.
     """
-    queryset = User.objects.all()
+    # El perfil va anidado en UserSerializer: lo traemos en el mismo SELECT
+    queryset = User.objects.select_related('profile').all()
     serializer_class = UserSerializer
 
     def get_serializer_class(self):
@@ -57,7 +57,8 @@ class UserViewSet(viewsets.ModelViewSet):
         GET: Devuelve mis datos.
         PATCH: Actualiza mis datos (Foto, Teléfono, etc).
         """
-        user = request.user
+        # request.user solo trae lo que viene en el token; aquí sí cargamos todo (1 consulta)
+        user = User.objects.select_related('profile').get(pk=request.user.pk)
         
         # Si es una actualización (PUT o PATCH)
         if request.method in ['PUT', 'PATCH']:
@@ -77,7 +78,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=False, methods=['get'])
     def banned_users(self, request):
         """ Devuelve una lista de usuarios con 'is_banned=True'. """
-        banned_users = User.objects.filter(profile__is_banned=True)
+        banned_users = User.objects.filter(profile__is_banned=True).select_related('profile')
         page = self.paginate_queryset(banned_users)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -99,9 +100,7 @@ class UserViewSet(viewsets.ModelViewSet):
             user.profile.is_banned = True
             user.profile.ban_reason = reason
             user.profile.save()
-            AuditLog.objects.create(
-                user=request.user, action='USER_BANNED', details=f"Admin '{request.user.username}' baneó a '{user.username}'. Razón: {reason}"
-            )
+            log_action(request.user, 'USER_BANNED', f"Admin '{request.user.username}' baneó a '{user.username}'. Razón: {reason}")
             return response.Response({'status': f'Usuario {user.username} ha sido baneado.'}, status=status.HTTP_200_OK)
         return response.Response({'error': 'El usuario no tiene perfil.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -117,9 +116,7 @@ class UserViewSet(viewsets.ModelViewSet):
             user.profile.is_banned = False
             user.profile.ban_reason = None
             user.profile.save()
-            AuditLog.objects.create(
-                user=request.user, action='USER_UNBANNED', details=f"Admin '{request.user.username}' quitó el baneo a '{user.username}'"
-            )
+            log_action(request.user, 'USER_UNBANNED', f"Admin '{request.user.username}' quitó el baneo a '{user.username}'")
             return response.Response({'status': f'Usuario {user.username} ha sido desbaneado.'}, status=status.HTTP_200_OK)
         return response.Response({'error': 'El usuario no tiene perfil.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -141,14 +138,9 @@ class RegisterViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         """ Registra un nuevo usuario y devuelve sus tokens JWT. """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save() 
-        
-        try:
-            AuditLog.objects.create(user=user, action='USER_REGISTERED', details=f"Nuevo usuario registrado: '{user.username}' (ID: {user.id})")
-        except Exception:
-            pass # Si falla el log, no rompemos el registro
+        user = serializer.save() # (El serializer ya deja el registro en la bitácora)
         
-        refresh = RefreshToken.for_user(user)
+        refresh = MyTokenObtainPairSerializer.get_token(user) # Mismos claims que el login
         return response.Response({
             "user": serializer.data, "refresh": str(refresh), "access": str(refresh.access_token),
         }, status=status.HTTP_201_CREATED)
\ No newline at end of file
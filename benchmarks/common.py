@@ -0,0 +1,52 @@
+# En: benchmarks/common.py
+
+"""
+Utilidades compartidas por los benchmarks.
+
+Cada benchmark corre contra una BD de PRUEBAS que se crea y se destruye
+(igual que 'manage.py test'), nunca contra db.sqlite3:
+
+    python -m benchmarks.product_import --rows 100000
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'markettec.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """ Crea la BD de pruebas (con migraciones) y la borra al terminar. """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def timer(label, count=None, unit='filas'):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    rate = f' ({count / elapsed:,.0f} {unit}/s)' if count else ''
+    print(f'{label}: {elapsed:.2f} s{rate}')
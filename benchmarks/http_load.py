@@ -0,0 +1,367 @@
+# En: benchmarks/http_load.py
+
+"""
+Carga HTTP sobre los endpoints que más usa la app de Android.
+
+    python -m benchmarks.http_load                               # BD nueva (seed_marketplace --scale 0.1)
+    python -m benchmarks.http_load --workers 8 --duration 10 --scenarios product_list,featured
+    python -m benchmarks.http_load --save                        # -> benchmarks/baselines/<commit>.json
+    python -m benchmarks.http_load --compare benchmarks/baselines/1a2b3c4.json
+    python -m benchmarks.http_load --diff viejo.json nuevo.json  # solo compara, no corre nada
+
+    # Contra una BD ya sembrada (ej. manage.py seed_marketplace --scale 100)
+    python -m benchmarks.http_load --sqlite-path /tmp/seed100.sqlite3 --skip-seed
+
+Arranca la app contra una BD sembrada con seed_marketplace (un archivo
+temporal, db.sqlite3 no se toca) y levanta --workers procesos, cada uno con
+el cliente de pruebas de Django (la pila completa: middlewares, JWT,
+permisos, serializers, render; sin red), como workers síncronos de gunicorn.
+Cada worker entra como un cliente distinto del seed.
+
+Por escenario, todos los workers pegan al mismo endpoint durante --duration
+segundos (después de --warmup peticiones) y se reporta: peticiones, errores
+(respuestas >= 400), RPS total y latencia p50 / p95 / p99 / máx.
+
+El JSON guardado (--save) lleva además el commit, la BD y los parámetros;
+--compare / --diff marcan como regresión si el RPS baja o el p95 sube más
+de --threshold por ciento (y salen con código 1, para CI).
+
+Nota: GET /api/products/ no está paginado, así que su costo crece con el
+catálogo: compara siempre con el mismo --scale.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from collections import Counter
+from datetime import datetime, timezone
+
+from benchmarks.common import BASE_DIR, setup_django
+
+BASELINES_DIR = BASE_DIR / 'benchmarks' / 'baselines'
+SEED_END_DATE = '2026-01-01'  # Fija: mismas fechas en cada corrida
+SEARCH_TERMS = ['laptop', 'calculadora', 'mochila', 'usado', 'libro', 'tenis nuevo']
+SCENARIOS = [
+    'token_obtain', 'product_list', 'product_search', 'featured', 'order_create',
+    'chat_list', 'message_list', 'message_send', 'favorite_toggle',
+]
+
+
+# --- Dentro de cada worker ---
+
+class Session:
+    """ Un cliente del seed con su token, su chat y un puñado de productos. """
+
+    password = 'marketplace'  # La de seed_marketplace
+
+    def __init__(self, index, seed):
+        from django.contrib.auth.models import User
+        from rest_framework.test import APIClient
+        from apps.products.models import Product
+
+        self.rng = random.Random(index)
+        self.api = APIClient()
+        clients = User.objects.filter(username__startswith=f'seed{seed}-client-').order_by('id')
+        self.user = clients[index % clients.count()]
+        self.credentials = {'username': self.user.username, 'password': self.password}
+
+        response = self.api.post('/api/token/', self.credentials, format='json')
+        if response.status_code != 200:
+            raise RuntimeError(f'No se pudo obtener token para {self.user.username}: {response.content[:200]}')
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+
+        chats = self.api.get('/api/chat/').data
+        chats = chats.get('results', chats) if isinstance(chats, dict) else chats
+        self.conversation_id = chats[0]['id'] if chats else None
+
+        active = Product.objects.filter(status='active', inventory__gt=0).order_by('id').values_list('id', flat=True)
+        self.product_ids = list(active[index * 500:(index + 1) * 500]) or list(active[:500])
+
+    def product(self):
+        return self.rng.choice(self.product_ids)
+
+    # Cada escenario: una petición
+    def token_obtain(self):
+        return self.api.post('/api/token/', self.credentials, format='json')
+
+    def product_list(self):
+        return self.api.get('/api/products/')
+
+    def product_search(self):
+        return self.api.get('/api/products/', {'q': self.rng.choice(SEARCH_TERMS)})
+
+    def featured(self):
+        return self.api.get('/api/products/featured/')
+
+    def order_create(self):
+        items = [{'product_id': self.product(), 'quantity': 1}]
+        return self.api.post('/api/orders/', {'items_to_create': items}, format='json')
+
+    def chat_list(self):
+        return self.api.get('/api/chat/')
+
+    def message_list(self):
+        return self.api.get('/api/messages/', {'conversation_id': self.conversation_id})
+
+    def message_send(self):
+        return self.api.post('/api/messages/', {'conversation': self.conversation_id, 'text': '¿Sigue disponible?'},
+                             format='json')
+
+    def favorite_toggle(self):
+        return self.api.post('/api/favorites/toggle/', {'product_id': self.product()}, format='json')
+
+    def run(self, name, duration, warmup):
+        request = getattr(self, name)
+        for _ in range(warmup):
+            request()
+
+        latencies, statuses = [], Counter()
+        started = time.perf_counter()
+        deadline = started + duration
+        while True:
+            before = time.perf_counter()
+            response = request()
+            after = time.perf_counter()
+            latencies.append(after - before)
+            statuses[response.status_code] += 1
+            if after >= deadline:
+                break
+        return {'latencies': latencies, 'elapsed': after - started, 'statuses': dict(statuses)}
+
+
+def worker_main(index, seed, tasks, results):
+    try:
+        setup_django()
+        session = Session(index, seed)
+    except Exception:
+        results.put(('error', index, traceback.format_exc()))
+        return
+    results.put(('ready', index, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        name, duration, warmup = task
+        try:
+            results.put((name, index, session.run(name, duration, warmup)))
+        except Exception:
+            results.put(('error', index, traceback.format_exc()))
+
+
+# --- Proceso principal ---
+
+def percentile(ordered, fraction):
+    """ Rango más cercano sobre una lista ya ordenada. """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(parts):
+    latencies = sorted(latency for part in parts for latency in part['latencies'])
+    statuses = Counter()
+    for part in parts:
+        statuses.update({int(code): count for code, count in part['statuses'].items()})
+    milliseconds = lambda seconds: round(seconds * 1000, 2)
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for code, count in statuses.items() if code >= 400),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        # Cada worker midió su propia ventana: se suman sus RPS
+        'rps': round(sum(len(part['latencies']) / part['elapsed'] for part in parts if part['elapsed']), 1),
+        'p50_ms': milliseconds(percentile(latencies, 0.50)),
+        'p95_ms': milliseconds(percentile(latencies, 0.95)),
+        'p99_ms': milliseconds(percentile(latencies, 0.99)),
+        'max_ms': milliseconds(latencies[-1] if latencies else 0),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_database(args):
+    """ Migra y siembra (en subprocesos, con el mismo entorno que los workers). """
+    manage = [sys.executable, 'manage.py']
+    subprocess.run(manage + ['migrate', '-v', '0'], cwd=BASE_DIR, check=True)
+    if not args.skip_seed:
+        print(f'Sembrando (seed_marketplace --scale {args.scale} --seed {args.seed})...')
+        subprocess.run(manage + ['seed_marketplace', '--scale', str(args.scale), '--seed', str(args.seed),
+                                 '--end-date', SEED_END_DATE], cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def run_benchmark(args):
+    scenarios = args.scenarios.split(',') if args.scenarios else SCENARIOS
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        raise SystemExit(f'Escenarios desconocidos: {", ".join(unknown)} (hay: {", ".join(SCENARIOS)})')
+
+    if args.skip_seed and not args.sqlite_path:
+        raise SystemExit('--skip-seed necesita --sqlite-path (una BD ya sembrada).')
+
+    directory = None
+    sqlite_path = args.sqlite_path
+    if sqlite_path is None:
+        directory = tempfile.mkdtemp(prefix='markettec-http-')
+        sqlite_path = os.path.join(directory, 'benchmark.sqlite3')
+    # Los workers y los subprocesos heredan este entorno
+    os.environ.update({
+        'SQLITE_PATH': str(sqlite_path),
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'benchmark'),
+        'DEBUG': 'False',  # Con DEBUG se guardan todas las consultas y se activa el detector de N+1
+        'ALLOWED_HOSTS': 'testserver',
+        'REQUEST_PROFILING': 'False',
+        'CATALOG_CACHE': 'False' if args.no_cache else os.environ.get('CATALOG_CACHE', 'True'),
+    })
+
+    try:
+        prepare_database(args)
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        queues = [context.Queue() for _ in range(args.workers)]
+        workers = [context.Process(target=worker_main, args=(index, args.seed, queues[index], results), daemon=True)
+                   for index in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            collect(results, 'ready', args.workers)
+            report = {'meta': metadata(args), 'scenarios': {}}
+            print(f'\n{args.workers} workers, {args.duration} s por escenario\n')
+            print(f'{"escenario":<16} {"peticiones":>10} {"errores":>8} {"RPS":>9} '
+                  f'{"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"máx ms":>9}')
+            for name in scenarios:
+                for queue in queues:
+                    queue.put((name, args.duration, args.warmup))
+                summary = summarize(collect(results, name, args.workers))
+                report['scenarios'][name] = summary
+                print(f'{name:<16} {summary["requests"]:>10,} {summary["errors"]:>8,} {summary["rps"]:>9,.1f} '
+                      f'{summary["p50_ms"]:>9.2f} {summary["p95_ms"]:>9.2f} {summary["p99_ms"]:>9.2f} '
+                      f'{summary["max_ms"]:>9.2f}')
+        finally:
+            for queue in queues:
+                queue.put(None)
+            for worker in workers:
+                worker.join(timeout=10)
+    finally:
+        if directory and not args.keep_db:
+            shutil.rmtree(directory, ignore_errors=True)
+        elif directory:
+            print(f'\nBD conservada en {sqlite_path}')
+    return report
+
+
+def collect(results, expected, count):
+    parts = []
+    while len(parts) < count:
+        kind, index, payload = results.get()
+        if kind == 'error':
+            raise SystemExit(f'El worker {index} falló:\n{payload}')
+        if kind == expected:
+            parts.append(payload)
+    return parts
+
+
+def metadata(args):
+    import django
+    return {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': f'{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs',
+        'database': os.environ.get('DB_ENGINE', 'sqlite'),
+        'catalog_cache': os.environ['CATALOG_CACHE'],
+        'seed': args.seed,
+        'scale': None if args.skip_seed else args.scale,
+        'workers': args.workers,
+        'duration': args.duration,
+    }
+
+
+# --- Comparar corridas ---
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(baseline, current, threshold):
+    """ Imprime la tabla y regresa los escenarios con regresión. """
+    print(f'\nBase: {baseline["meta"].get("commit")} ({baseline["meta"].get("date")})  ->  '
+          f'actual: {current["meta"].get("commit")} ({current["meta"].get("date")})')
+    print(f'{"escenario":<16} {"RPS base":>10} {"RPS":>10} {"Δ":>8}   {"p95 base":>9} {"p95":>9} {"Δ":>8}')
+    regressions = []
+    for name, now in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            print(f'{name:<16} (no está en la base)')
+            continue
+        rps_change, p95_change = change(before['rps'], now['rps']), change(before['p95_ms'], now['p95_ms'])
+        regressed = rps_change < -threshold or p95_change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f'{name:<16} {before["rps"]:>10,.1f} {now["rps"]:>10,.1f} {rps_change:>+7.1f}%   '
+              f'{before["p95_ms"]:>9.2f} {now["p95_ms"]:>9.2f} {p95_change:>+7.1f}%'
+              + ('   <-- REGRESIÓN' if regressed else ''))
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Procesos concurrentes (default: 4).')
+    parser.add_argument('--duration', type=float, default=5, help='Segundos por escenario (default: 5).')
+    parser.add_argument('--warmup', type=int, default=20, help='Peticiones de calentamiento por worker.')
+    parser.add_argument('--scenarios', help=f'Lista separada por comas (default: todos): {",".join(SCENARIOS)}')
+    parser.add_argument('--scale', type=float, default=0.1, help='--scale de seed_marketplace (default: 0.1).')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sqlite-path', help='Archivo SQLite a usar (default: uno temporal nuevo).')
+    parser.add_argument('--skip-seed', action='store_true', help='La BD ya está sembrada con --seed.')
+    parser.add_argument('--keep-db', action='store_true', help='No borrar la BD temporal al terminar.')
+    parser.add_argument('--no-cache', action='store_true', help='Sin caché del catálogo (CATALOG_CACHE=False).')
+    parser.add_argument('--save', nargs='?', const='', metavar='RUTA',
+                        help='Guardar el resultado en JSON (default: benchmarks/baselines/<commit>.json).')
+    parser.add_argument('--compare', metavar='BASE.json', help='Comparar el resultado con una base guardada.')
+    parser.add_argument('--diff', nargs=2, metavar=('BASE.json', 'NUEVO.json'),
+                        help='Solo comparar dos resultados guardados.')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='Porcentaje de cambio que cuenta como regresión (default: 10).')
+    args = parser.parse_args()
+
+    if args.diff:
+        regressions = compare(load(args.diff[0]), load(args.diff[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    report = run_benchmark(args)
+
+    if args.save is not None:
+        path = args.save or BASELINES_DIR / f'{report["meta"]["commit"] or "sin-commit"}.json'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f'\nGuardado en {path}')
+
+    if args.compare:
+        regressions = compare(load(args.compare), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
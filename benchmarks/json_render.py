@@ -0,0 +1,105 @@
+# En: benchmarks/json_render.py
+
+"""
+Benchmark del render de la API (markettec/renderers.py).
+
+    python -m benchmarks.json_render                    # 5,000 productos
+    python -m benchmarks.json_render --products 20000 --repeat 20
+
+Serializa una vez el catálogo con ProductSerializer (con vendedor, categoría
+y calificación anidados) y mide solo el render de ese resultado, en
+milisegundos por cada 1,000 productos:
+
+    - JSONRenderer de DRF (json estándar), el que se usaba antes
+    - FastJSONRenderer (orjson)
+    - MessagePackRenderer (si 'msgpack' está instalado)
+
+Como referencia también mide el parser y el tiempo del serializer.
+"""
+
+import argparse
+import io
+import time
+
+from benchmarks.common import setup_django, test_database
+
+
+def best_of(repeat, function):
+    """ El mejor de N intentos (el menos afectado por el resto del sistema). """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(label, seconds, products, size=None):
+    per_thousand = seconds * 1000 * 1000 / products
+    extra = f'  ({size / 1024:,.0f} KB)' if size is not None else ''
+    print(f'{label:<44} {per_thousand:8.2f} ms / 1k productos{extra}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.parsers import JSONParser
+    from apps.products.models import Category, Product
+    from apps.products.serializers import ProductSerializer
+    from apps.reviews.models import ProductRating
+    from markettec import renderers
+
+    with test_database():
+        categories = [Category.objects.create(name=f'Categoría {n}') for n in range(10)]
+        vendors = [User.objects.create_user(f'vendedor{n}', password='x', first_name=f'Vendedor {n}').profile
+                   for n in range(20)]
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Producto {n}', description='Descripción del producto con acentos: cálculo, físico.',
+                price=f'{10 + n % 500}.90', inventory=n % 40, sku=f'SKU-{n:06d}', status='active',
+                vendor=vendors[n % len(vendors)], category=categories[n % len(categories)],
+            )
+            for n in range(args.products)
+        ], batch_size=1000)
+        ProductRating.objects.bulk_create([
+            ProductRating(product=product, review_count=3, rating_sum=13, average=13 / 3, stars_4=2, stars_5=1)
+            for product in products[::2]
+        ], batch_size=1000)
+
+        queryset = Product.objects.select_related('category', 'vendor', 'vendor__user', 'rating_stats')
+        seconds, data = best_of(3, lambda: ProductSerializer(queryset, many=True).data)
+        count = len(data)
+        print(f'{count:,} productos, mejor de {args.repeat} intentos\n')
+        report('Serializer (referencia)', seconds, count)
+
+        candidates = [('JSONRenderer (DRF, json estándar)', JSONRenderer()),
+                      ('FastJSONRenderer' + ('' if renderers.orjson else ' (sin orjson)'),
+                       renderers.FastJSONRenderer())]
+        if renderers.msgpack_available():
+            candidates.append(('MessagePackRenderer', renderers.MessagePackRenderer()))
+
+        baseline = None
+        for label, renderer in candidates:
+            seconds, content = best_of(args.repeat, lambda: renderer.render(data))
+            report(f'Render: {label}', seconds, count, len(content))
+            if baseline is None:
+                baseline = seconds
+            else:
+                print(f'{"":<44} {baseline / seconds:8.1f}x más rápido que DRF')
+
+        content = JSONRenderer().render(data)
+        for label, json_parser in (('Parser: JSONParser (DRF)', JSONParser()),
+                                   ('Parser: FastJSONParser', renderers.FastJSONParser())):
+            seconds, _ = best_of(args.repeat, lambda: json_parser.parse(io.BytesIO(content), parser_context={}))
+            report(label, seconds, count)
+
+
+if __name__ == '__main__':
+    main()
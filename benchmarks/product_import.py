@@ -0,0 +1,82 @@
+# En: benchmarks/product_import.py
+
+"""
+Benchmark de la importación masiva de productos (apps/products/importer.py).
+
+    python -m benchmarks.product_import                 # 100,000 filas
+    python -m benchmarks.product_import --rows 20000 --chunk-size 500
+
+Mide: importación inicial (todo INSERT), reimportación (todo UPDATE por SKU)
+y, como referencia, crear productos uno por uno con el serializer normal.
+"""
+
+import argparse
+from decimal import Decimal
+
+from benchmarks.common import setup_django, test_database, timer
+
+
+def make_rows(count, categories, price_offset=0):
+    return [
+        {
+            'sku': f'SKU-{n:07d}',
+            'name': f'Producto de prueba {n}',
+            'description': 'Descripción generada para el benchmark de importación.',
+            'price': str(Decimal(10 + n % 500 + price_offset).quantize(Decimal('0.01'))),
+            'inventory': n % 50,
+            'category': categories[n % len(categories)],
+        }
+        for n in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--baseline-rows', type=int, default=500,
+                        help='Filas para la referencia "uno por uno" (0 = omitir).')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from apps.products import importer
+    from apps.products.models import Category, Product
+
+    with test_database(), override_settings(CATALOG_CACHE={'ENABLED': False}):
+        importer.MAX_ROWS = max(importer.MAX_ROWS, args.rows)
+        vendor = User.objects.create_user('bench_vendor', password='x').profile
+        categories = [Category.objects.create(name=f'Categoría {n}').name for n in range(10)]
+
+        rows = make_rows(args.rows, categories)
+        with timer(f'Importación inicial ({args.rows:,} filas, bloques de {args.chunk_size})', args.rows):
+            result = importer.ProductImporter(vendor, chunk_size=args.chunk_size).run(rows)
+        print(f"  creados={result['created']} actualizados={result['updated']} errores={result['failed']}")
+
+        rows = make_rows(args.rows, categories, price_offset=1)
+        with timer(f'Reimportación / upsert ({args.rows:,} filas)', args.rows):
+            result = importer.ProductImporter(vendor, chunk_size=args.chunk_size).run(rows)
+        print(f"  creados={result['created']} actualizados={result['updated']} errores={result['failed']}")
+
+        if args.baseline_rows:
+            from rest_framework.test import APIRequestFactory
+            from apps.products.serializers import ProductSerializer
+
+            request = APIRequestFactory().post('/api/products/')
+            request.user = vendor.user
+            category_id = Category.objects.values_list('pk', flat=True).first()
+            with timer(f'Referencia: uno por uno con ProductSerializer ({args.baseline_rows:,})', args.baseline_rows):
+                for n in range(args.baseline_rows):
+                    serializer = ProductSerializer(data={
+                        'name': f'Uno por uno {n}', 'description': '...', 'price': '10.00',
+                        'inventory': 1, 'category': category_id,
+                    }, context={'request': request})
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save(vendor=vendor)
+
+        print(f'Productos en la BD: {Product.objects.count():,}')
+
+
+if __name__ == '__main__':
+    main()
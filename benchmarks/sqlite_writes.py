@@ -0,0 +1,120 @@
+# En: benchmarks/sqlite_writes.py
+
+"""
+Escrituras concurrentes en SQLite: configuración por default vs. afinada
+(WAL + synchronous=NORMAL + busy_timeout + BEGIN IMMEDIATE, ver settings.py).
+
+    python -m benchmarks.sqlite_writes                      # 8 procesos x 200 transacciones
+    python -m benchmarks.sqlite_writes --workers 16 --transactions 500
+
+Cada proceso imita a un worker de gunicorn: transacciones que LEEN el
+inventario de un producto y luego escriben (UPDATE del inventario + un
+registro de bitácora), como al crear o cancelar un pedido. Se cuentan las
+transacciones confirmadas, los 'database is locked' y el throughput total.
+Cada perfil usa su propio archivo temporal (db.sqlite3 no se toca).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import BASE_DIR, setup_django
+
+PROFILES = {
+    'default': {'SQLITE_TUNED': 'False'},  # journal DELETE, DEFERRED, timeout 5 s
+    'afinado': {'SQLITE_TUNED': 'True'},
+}
+
+
+def run_worker(transactions, products):
+    """ Corre dentro de cada proceso hijo; imprime su resultado en JSON. """
+    setup_django()
+    from django.db import OperationalError, transaction
+    from django.db.models import F
+    from apps.audits.models import AuditLog
+    from apps.products.models import Product
+
+    committed = locked = 0
+    start = time.perf_counter()
+    for n in range(transactions):
+        product_id = products[n % len(products)]
+        try:
+            with transaction.atomic():
+                inventory = Product.objects.filter(pk=product_id).values_list('inventory', flat=True).get()
+                Product.objects.filter(pk=product_id).update(inventory=F('inventory') + (1 if inventory < 10 else -1))
+                AuditLog.objects.create(action='ORDER_CREATED', details=f'benchmark {os.getpid()} #{n}')
+            committed += 1
+        except OperationalError:
+            locked += 1
+    print(json.dumps({'committed': committed, 'locked': locked, 'seconds': time.perf_counter() - start}))
+
+
+def seed(count):
+    setup_django()
+    from django.contrib.auth.models import User
+    from apps.products.models import Product
+
+    vendor = User.objects.create_user('bench_vendor', password='x').profile
+    products = Product.objects.bulk_create([
+        Product(name=f'Producto {n}', description='...', price='10.00', inventory=10, vendor=vendor)
+        for n in range(count)
+    ])
+    print(json.dumps([product.pk for product in products]))
+
+
+def run_profile(name, env_overrides, args):
+    directory = tempfile.mkdtemp(prefix='markettec-sqlite-')
+    env = {
+        **os.environ, **env_overrides,
+        'SQLITE_PATH': os.path.join(directory, f'{name}.sqlite3'),
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'benchmark'),
+        'AUDIT_ASYNC': 'False',
+    }
+    python = [sys.executable, '-m', 'benchmarks.sqlite_writes']
+
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'], cwd=BASE_DIR, env=env, check=True)
+    products = subprocess.run(
+        python + ['--seed', str(args.products)], cwd=BASE_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout.strip().splitlines()[-1]
+
+    workers = [
+        subprocess.Popen(python + ['--worker', '--transactions', str(args.transactions), '--products', products],
+                         cwd=BASE_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(args.workers)
+    ]
+    results = [json.loads(worker.communicate()[0].strip().splitlines()[-1]) for worker in workers]
+    # Tiempo del worker más lento, sin contar el arranque de Django
+    elapsed = max(result['seconds'] for result in results)
+
+    committed = sum(result['committed'] for result in results)
+    locked = sum(result['locked'] for result in results)
+    print(f'{name:>8}: {committed:>6} confirmadas, {locked:>5} "database is locked", '
+          f'{elapsed:6.2f} s, {committed / elapsed:8,.0f} tx/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--transactions', type=int, default=200, help='Transacciones por proceso.')
+    parser.add_argument('--products', default='20', help='Productos a crear (o lista JSON de IDs en --worker).')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--seed', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        return seed(args.seed)
+    if args.worker:
+        return run_worker(args.transactions, json.loads(args.products))
+
+    args.products = int(args.products)
+    print(f'{args.workers} procesos x {args.transactions} transacciones (leer + escribir)')
+    for name, env_overrides in PROFILES.items():
+        run_profile(name, env_overrides, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# En: gunicorn.conf.py
+
+"""
+Gunicorn lee este archivo si se arranca desde la raíz del proyecto:
+
+    METRICS_DIR=/dev/shm/markettec-metrics gunicorn markettec.wsgi
+
+Métricas multi-proceso (markettec/metrics.py): cada worker escribe su
+archivo en METRICS_DIR. Al arrancar el master se borran los de la
+ejecución anterior para empezar los contadores en cero.
+
+Chat en tiempo real (apps/chat/layers.py): la capa en memoria solo entrega
+eventos dentro de un proceso, así que con más de un worker hay que configurar
+una capa compartida en CHAT_CHANNEL_LAYER; si no, no arrancamos.
+
+Bitácora (apps/audits/pipeline.py): cada worker escribe lo que le quede en
+el búfer al salir (worker_exit).
+"""
+
+import os
+
+from django.utils.module_loading import import_string
+
+
+def check_channel_layer(server):
+    backend = import_string(os.getenv('CHAT_CHANNEL_LAYER', 'apps.chat.layers.InMemoryChannelLayer'))
+    if server.cfg.workers > 1 and not getattr(backend, 'shared', False):
+        raise RuntimeError(
+            f'{backend.__name__} solo entrega eventos del chat dentro de un proceso y hay '
+            f'{server.cfg.workers} workers. Usa --workers 1 o configura en CHAT_CHANNEL_LAYER '
+            'una capa compartida (shared = True).'
+        )
+
+
+def worker_exit(server, worker):
+    # Al salir el worker no siempre corre atexit: vaciamos aquí el búfer de la bitácora
+    from apps.audits import pipeline
+    pipeline.shutdown()
+
+
+def on_starting(server):
+    check_channel_layer(server)
+    directory = os.getenv('METRICS_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith('.db'):
+            os.remove(os.path.join(directory, name))
@@ -3,6 +3,12 @@ ASGI config for markettec project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Además de Django (HTTP), aquí se montan los WebSockets del chat:
+    ws://<host>/ws/chat/?token=<access_token>   (ver apps/chat/consumers.py)
+
+Para servirlo: uvicorn markettec.asgi:application
+(o gunicorn con workers de uvicorn).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +19,24 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'markettec.settings')
 
-application = get_asgi_application()
+# Primero inicializamos Django; después ya podemos importar código de las apps
+django_application = get_asgi_application()
+
+from apps.chat.consumers import ChatConsumer  # noqa: E402
+
+websocket_routes = {
+    '/ws/chat/': ChatConsumer(),
+}
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        path = scope['path'] if scope['path'].endswith('/') else scope['path'] + '/'
+        consumer = websocket_routes.get(path)
+        if consumer is None:
+            await receive()
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        return await consumer(scope, receive, send)
+
+    return await django_application(scope, receive, send)
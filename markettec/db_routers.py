@@ -0,0 +1,138 @@
+# En: markettec/db_routers.py
+
+"""
+Lecturas del catálogo y del chat en una réplica; todo lo demás en la primaria.
+
+- Por default TODO va a la primaria ('default'). Solo las acciones que lo
+  piden (ReplicaReadsMixin.replica_actions) leen de la réplica.
+- Leer lo que acabas de escribir: si un usuario escribió algo, sus lecturas
+  van a la primaria durante DATABASE_READ_YOUR_WRITES_SECONDS (la réplica
+  puede venir unos segundos atrasada). Se guarda en el caché compartido
+  por ID de usuario, así aplica en todos los workers.
+- Dentro de la misma petición, después de la primera escritura todas las
+  lecturas van a la primaria.
+- Forzar la primaria en una vista o bloque: @primary_db() / with primary_db():
+
+Configuración (settings.py):
+    DATABASES['replica'] = {...}
+    DATABASE_READ_REPLICA = 'replica'        # None = sin réplica
+    DATABASE_READ_YOUR_WRITES_SECONDS = 5
+"""
+
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+
+# Estado de la petición en curso (cada hilo / tarea async tiene el suyo)
+_routing = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('use_replica', 'wrote', 'forced')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+        self.forced = 0
+
+
+def replica_alias():
+    alias = getattr(settings, 'DATABASE_READ_REPLICA', None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def sticky_key(user_id):
+    return f'db:primary-until-write:{user_id}'
+
+
+def is_sticky(user):
+    return bool(user and user.is_authenticated and cache.get(sticky_key(user.pk)))
+
+
+def mark_sticky(user):
+    seconds = getattr(settings, 'DATABASE_READ_YOUR_WRITES_SECONDS', 5)
+    if seconds and user and user.is_authenticated:
+        cache.set(sticky_key(user.pk), True, timeout=seconds)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state and state.use_replica and not state.wrote and not state.forced:
+            return replica_alias()
+        # None: Django usa la BD de la instancia relacionada (si la hay) o 'default'
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica tiene los mismos datos: las relaciones entre ambas son válidas
+        aliases = {PRIMARY, replica_alias()}
+        return obj1._state.db in aliases and obj2._state.db in aliases or None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return None
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Abre el estado de ruteo de cada petición y, si hubo escrituras, manda
+    las lecturas del usuario a la primaria por unos segundos.
+    (Va DESPUÉS de SessionMiddleware: guardar la sesión no cuenta como escritura.)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if state.wrote and replica_alias():
+            # DRF pasa el usuario autenticado (JWT) al request de Django
+            mark_sticky(getattr(request, 'user', None))
+        return response
+
+
+class ReplicaReadsMixin:
+    """
+    Para ViewSets: las acciones de lectura en replica_actions leen de la
+    réplica (después de autenticar y revisar permisos, que van a la primaria).
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = _routing.get()
+        if (state is not None and replica_alias() and request.method in SAFE_METHODS
+                and self.action in self.replica_actions and not is_sticky(request.user)):
+            state.use_replica = True
+
+
+class primary_db(ContextDecorator):
+    """ Fuerza la primaria para las lecturas de una vista o de un bloque. """
+
+    def __enter__(self):
+        self.state = _routing.get()
+        if self.state is not None:
+            self.state.forced += 1
+        return self
+
+    def __exit__(self, *exc):
+        if self.state is not None:
+            self.state.forced -= 1
+        return False
@@ -0,0 +1,121 @@
+# En: markettec/exports.py
+
+"""
+Exportaciones en streaming (CSV o NDJSON) para los admins.
+
+    GET /api/orders/export/?status=paid&since=2025-11-01      -> CSV
+    GET /api/audits/export/?format=ndjson                     -> NDJSON
+    (o con el header Accept: text/csv / application/x-ndjson)
+
+- La consulta sale con values_list() (tuplas, sin modelos ni serializers)
+  y .iterator(chunk_size=...): la BD entrega los renglones por bloques.
+- StreamingHttpResponse manda cada bloque en cuanto está listo, así la
+  memoria es la misma para 1,000 que para 10 millones de renglones.
+- Los filtros se aplican al queryset ANTES (terminan en el WHERE).
+
+Uso en un ViewSet:
+
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        return stream_export(request, queryset, [('id', 'id'), ('cliente', 'client__user__username')], 'pedidos')
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+CHUNK_SIZE = 2000   # Renglones por viaje a la BD
+LINES_PER_WRITE = 500  # Renglones por pedazo de respuesta
+
+# Celdas que Excel interpretaría como fórmula (inyección CSV)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class StreamingExportRenderer(BaseRenderer):
+    """
+    Solo sirve para la negociación de formato (?format= / Accept): la vista
+    regresa un StreamingHttpResponse. Los errores (400/403) sí pasan por
+    aquí y se mandan como JSON.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+
+class CSVRenderer(StreamingExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(StreamingExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+# El primero es el default (navegador / sin Accept)
+EXPORT_RENDERERS = [CSVRenderer, NDJSONRenderer]
+
+
+class _LineBuffer:
+    """ 'Archivo' para csv.writer que regresa la línea en lugar de guardarla. """
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(headers, rows):
+    writer = csv.writer(_LineBuffer())
+    yield '\ufeff' + writer.writerow(headers)  # BOM: Excel abre bien los acentos
+    block = []
+    for row in rows:
+        block.append(writer.writerow([csv_cell(value) for value in row]))
+        if len(block) >= LINES_PER_WRITE:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+
+def ndjson_lines(headers, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    block = []
+    for row in rows:
+        block.append(encoder.encode(dict(zip(headers, row))) + '\n')
+        if len(block) >= LINES_PER_WRITE:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+
+def stream_export(request, queryset, columns, filename):
+    """
+    columns: [(encabezado, lookup de values_list), ...]
+    El formato sale de la negociación de DRF (request.accepted_renderer).
+    """
+    headers = [header for header, _ in columns]
+    rows = queryset.values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=CHUNK_SIZE)
+
+    renderer = request.accepted_renderer
+    lines = ndjson_lines(headers, rows) if renderer.format == 'ndjson' else csv_lines(headers, rows)
+
+    response = StreamingHttpResponse(lines, content_type=f'{renderer.media_type}; charset=utf-8')
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{renderer.format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
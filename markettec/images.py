@@ -0,0 +1,230 @@
+# En: markettec/images.py
+
+"""
+Variantes de imagen (miniaturas) para productos, categorías y perfiles.
+
+Las fotos llegan del celular a resolución completa (varios MB). Al subirlas
+generamos copias chicas en WebP (o JPEG si Pillow no trae WebP):
+
+    products/foto.jpg  ->  products/variants/foto.jpg.thumb.webp   (máx. 200x200)
+                           products/variants/foto.jpg.medium.webp  (máx. 800x800)
+
+- Se generan en un pool de hilos DESPUÉS del commit: la petición de subida
+  no espera a Pillow.
+- El nombre de cada variante sale del nombre original COMPLETO (con su
+  extensión: foto.jpg y foto.png no comparten variantes), así que el
+  serializer arma las URLs sin consultar la BD (ImageVariantsField).
+- Mientras una variante no exista (todavía se genera, o falló) el serializer
+  regresa la URL de la original. Lo que se le pregunta al storage se recuerda
+  en memoria del proceso (LRU acotado): las que existen hasta que se
+  desalojen, las que faltan solo MISSING_TTL segundos.
+- Al terminar se manda la señal variants_ready (ej. para invalidar cachés).
+- Para imágenes que ya existían: 'python manage.py generate_image_variants'.
+
+Configuración (settings.IMAGE_VARIANTS):
+    'SIZES': {'thumb': (200, 200), 'medium': (800, 800)},
+    'QUALITY': 80, 'WORKERS': 2, 'ASYNC': True, 'MISSING_TTL': 30
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SIZES': {'thumb': (200, 200), 'medium': (800, 800)},
+    'QUALITY': 80,
+    'WORKERS': 2,
+    'ASYNC': True,
+    'MISSING_TTL': 30,  # Segundos que se recuerda que una variante NO existe
+}
+
+# Modelos con imágenes que generan variantes: {modelo: (campos,)}
+registry = {}
+
+# Se manda al terminar de escribir variantes: sender=modelo, fieldfile=archivo original
+variants_ready = Signal()
+
+# Lo que sabemos del storage: {(original, variante): (nombre guardado o None, vence)}.
+# LRU: al llenarse se desalojan las menos usadas. 'vence' es None para las que
+# existen; las que faltan se vuelven a revisar al pasar MISSING_TTL.
+_stored = OrderedDict()
+_stored_lock = threading.Lock()
+STORED_MAX = 50000
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'IMAGE_VARIANTS', {})}
+
+
+def output_format():
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def variant_name(name, variant):
+    """ 'products/foto.jpg' -> 'products/variants/foto.jpg.thumb.webp' """
+    directory, filename = os.path.split(name)
+    return os.path.join(directory, 'variants', f'{filename}.{variant}.{output_format()[1]}')
+
+
+def remember_variant(name, variant, stored_name):
+    """ stored_name=None: la variante no existe (se recuerda solo MISSING_TTL). """
+    expires_at = None if stored_name else time.monotonic() + get_config()['MISSING_TTL']
+    with _stored_lock:
+        _stored[(name, variant)] = (stored_name, expires_at)
+        _stored.move_to_end((name, variant))
+        while len(_stored) > STORED_MAX:
+            _stored.popitem(last=False)
+
+
+def forget_variants(name):
+    """ Un archivo nuevo puede reusar el nombre de uno borrado: sus variantes viejas no cuentan. """
+    with _stored_lock:
+        for variant in get_config()['SIZES']:
+            _stored.pop((name, variant), None)
+
+
+def stored_variant(fieldfile, variant):
+    """ Nombre con el que quedó guardada la variante, o None si (todavía) no existe. """
+    key = (fieldfile.name, variant)
+    with _stored_lock:
+        known = _stored.get(key)
+        if known is not None:
+            _stored.move_to_end(key)
+    if known is not None and (known[1] is None or known[1] > time.monotonic()):
+        return known[0]
+
+    target = variant_name(fieldfile.name, variant)
+    stored_name = target if fieldfile.storage.exists(target) else None
+    remember_variant(fieldfile.name, variant, stored_name)
+    return stored_name
+
+
+def generate_variants(fieldfile, overwrite=True):
+    """ Crea (o reemplaza) todas las variantes de un archivo. Regresa cuántas escribió. """
+    config = get_config()
+    storage, name = fieldfile.storage, fieldfile.name
+    pil_format = output_format()[0]
+
+    pending = {
+        variant: variant_name(name, variant) for variant in config['SIZES']
+        if overwrite or not storage.exists(variant_name(name, variant))
+    }
+    if not pending:
+        return 0
+
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)  # Fotos de celular "acostadas"
+        image.load()
+
+    if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if pil_format == 'WEBP' and 'A' in image.getbands() else 'RGB')
+
+    for variant, target in pending.items():
+        copy = image.copy()
+        copy.thumbnail(config['SIZES'][variant], Image.Resampling.LANCZOS)  # Mantiene proporción
+        buffer = io.BytesIO()
+        copy.save(buffer, pil_format, quality=config['QUALITY'], optimize=True)
+        if storage.exists(target):
+            storage.delete(target)
+        # El storage puede guardar con otro nombre (ej. si alguien más lo creó mientras tanto)
+        remember_variant(name, variant, storage.save(target, ContentFile(buffer.getvalue())))
+
+    instance = getattr(fieldfile, 'instance', None)
+    if instance is not None:
+        variants_ready.send(sender=type(instance), fieldfile=fieldfile)
+    return len(pending)
+
+
+def _safe_generate(fieldfile):
+    try:
+        generate_variants(fieldfile)
+    except Exception:
+        logger.exception("No se pudieron generar las variantes de '%s'.", fieldfile.name)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=get_config()['WORKERS'], thread_name_prefix='image-variants')
+    return _executor
+
+
+def schedule_variants(fieldfile):
+    if get_config()['ASYNC']:
+        get_executor().submit(_safe_generate, fieldfile)
+    else:
+        _safe_generate(fieldfile)
+
+
+# --- Señales ---
+
+def _remember_new_uploads(sender, instance, raw=False, **kwargs):
+    """ Antes de guardar: ¿qué campos traen un archivo recién subido? """
+    if raw:
+        return
+    instance._new_images = [
+        field for field in registry[sender]
+        if getattr(instance, field) and not getattr(instance, field)._committed
+    ]
+
+
+def _process_new_uploads(sender, instance, raw=False, **kwargs):
+    for field in getattr(instance, '_new_images', ()):
+        fieldfile = getattr(instance, field)
+        forget_variants(fieldfile.name)
+        transaction.on_commit(lambda fieldfile=fieldfile: schedule_variants(fieldfile))
+    instance._new_images = []
+
+
+def track(model, *fields):
+    """ Genera variantes cada vez que se sube una imagen a esos campos del modelo. """
+    registry[model] = fields
+    pre_save.connect(_remember_new_uploads, sender=model, dispatch_uid=f'images-pre-{model._meta.label}')
+    post_save.connect(_process_new_uploads, sender=model, dispatch_uid=f'images-post-{model._meta.label}')
+
+
+# --- Serializer ---
+
+class ImageVariantsField(serializers.Field):
+    """
+    URLs de las variantes de una imagen:
+        {"thumb": "http://.../foto.jpg.thumb.webp", "medium": "http://.../foto.jpg.medium.webp"}
+    o null si no hay imagen. Una variante que todavía no existe apunta a la
+    original. Uso: ImageVariantsField(source='product_image')
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, fieldfile):
+        if not fieldfile:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant in get_config()['SIZES']:
+            stored = stored_variant(fieldfile, variant)
+            url = fieldfile.storage.url(stored) if stored else fieldfile.url
+            urls[variant] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -0,0 +1,76 @@
+# En: markettec/management/commands/seed_marketplace.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.dateparse import parse_date
+
+from markettec import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Llena la BD con datos sintéticos (usuarios, catálogo, pedidos, reseñas, favoritos, '
+        'reportes, chats y bitácora) para pruebas de carga. Ver markettec/seeding.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Semilla: la misma semilla genera los mismos datos (default: 1).'
+        )
+        parser.add_argument(
+            '--scale', type=float, default=1,
+            help='Multiplica todos los volúmenes (default: 1 = 10,000 productos; 100 = 1M productos y 10M mensajes).'
+        )
+        for name, count in seeding.VOLUMES.items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}', dest=name, type=int,
+                help=f'Número de {name} (default: {count:,} x --scale).'
+            )
+        parser.add_argument(
+            '--chunk-size', type=int, default=seeding.CHUNK_SIZE,
+            help=f'Filas por bulk_create / transacción (default: {seeding.CHUNK_SIZE}).'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Días de historia (fechas de pedidos, mensajes, etc.; default: 365).'
+        )
+        parser.add_argument(
+            '--end-date',
+            help='Último día de la historia (AAAA-MM-DD). Default: hoy; fíjalo para datos idénticos entre días.'
+        )
+        parser.add_argument(
+            '--password', default='marketplace',
+            help='Contraseña de todos los usuarios generados (default: "marketplace").'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias de la base de datos (default: "default").'
+        )
+
+    def handle(self, *args, **options):
+        volumes = seeding.scaled_volumes(options['scale'], **{name: options[name] for name in seeding.VOLUMES})
+        errors = seeding.volume_errors(volumes)
+        if errors:
+            raise CommandError(' '.join(errors))
+
+        end = None
+        if options['end_date']:
+            end = parse_date(options['end_date'])
+            if end is None:
+                raise CommandError('--end-date: fecha inválida, usa AAAA-MM-DD.')
+
+        seeder = seeding.MarketplaceSeeder(
+            volumes, seed=options['seed'], chunk_size=max(options['chunk_size'], 1), days=options['days'],
+            end=end, password=options['password'], using=options['database'], log=self.stdout.write,
+        )
+        if seeder.already_seeded():
+            raise CommandError(
+                f'Ya hay datos de la semilla {options["seed"]} (usuarios "{seeder.prefix}-..."). '
+                'Usa otra --seed o vacía la BD con "manage.py flush".'
+            )
+
+        self.stdout.write(f'Generando datos con la semilla {options["seed"]}...')
+        counts = seeder.run()
+        summary = ', '.join(f'{name}: {count:,}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Listo. {summary}'))
@@ -0,0 +1,376 @@
+# En: markettec/metrics.py
+
+"""
+Métricas de la API en formato de texto de Prometheus, sin servicios externos.
+
+    GET /api/metrics/        (solo Admin)
+
+Por vista de DRF (ViewSet + acción) se registra:
+    markettec_http_requests_total{view,action,method,status}       contador
+    markettec_http_request_duration_seconds{view,action}           histograma
+    markettec_http_request_db_queries{view,action}                 histograma
+    markettec_http_request_duration_quantile_seconds{...,quantile} p50/p95/p99
+        (estimados desde el histograma, para leerlos sin un Prometheus;
+         con Prometheus: histogram_quantile(0.95, rate(..._bucket[5m])))
+
+Varios procesos (gunicorn): con METRICS_DIR cada worker escribe en SU archivo
+(<pid>.db) mapeado en memoria (mmap), sin candados entre procesos; el
+endpoint suma los archivos de todos. Los archivos de workers que ya murieron
+se siguen sumando (los contadores no deben bajar); gunicorn.conf.py limpia la
+carpeta al arrancar el master. Sin METRICS_DIR se guarda en la memoria del
+proceso (runserver, pruebas).
+
+Formato de cada archivo:
+    [bytes usados: uint32][relleno: 4 bytes]
+    entradas: [largo de la llave: uint32][llave JSON, rellenada a 8][valor: double]
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.users.permissions import IsAdminUser
+
+REQUESTS = 'markettec_http_requests_total'
+LATENCY = 'markettec_http_request_duration_seconds'
+QUERIES = 'markettec_http_request_db_queries'
+LATENCY_QUANTILES = 'markettec_http_request_duration_quantile_seconds'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+QUANTILES = (0.5, 0.95, 0.99)
+
+FAMILIES = {
+    REQUESTS: ('counter', 'Peticiones HTTP por vista, acción, método y estatus.', None),
+    LATENCY: ('histogram', 'Duración de la petición en segundos.', LATENCY_BUCKETS),
+    QUERIES: ('histogram', 'Consultas SQL por petición.', QUERY_BUCKETS),
+}
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DIRECTORY': '',  # Vacío = memoria del proceso
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+def sample_key(name, labels):
+    return json.dumps([name, sorted(labels.items())], separators=(',', ':'))
+
+
+# --- Almacenamiento ---
+
+class MemoryStore:
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def items(self):
+        with self.lock:
+            return list(self.values.items())
+
+
+class MmapStore:
+    """ Archivo de métricas de UN proceso. Solo este proceso escribe en él. """
+    INITIAL_SIZE = 64 * 1024
+    HEADER = 8
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(self.INITIAL_SIZE)
+        self.capacity = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used = struct.unpack_from('I', self.map, 0)[0] or self.HEADER
+        self.positions = {key: position for key, _, position in read_entries(self.map, self.used)}
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self.add(key)
+            value = struct.unpack_from('d', self.map, position)[0]
+            struct.pack_into('d', self.map, position, value + amount)
+
+    def add(self, key):
+        encoded = key.encode()
+        padding = 8 - (len(encoded) + 4) % 8
+        entry = struct.pack(f'I{len(encoded) + padding}sd', len(encoded), encoded + b' ' * padding, 0.0)
+        while self.used + len(entry) > self.capacity:
+            self.grow()
+        self.map[self.used:self.used + len(entry)] = entry
+        self.used += len(entry)
+        # Los lectores solo leen hasta 'used': se actualiza después de escribir la entrada
+        struct.pack_into('I', self.map, 0, self.used)
+        self.positions[key] = self.used - 8
+        return self.used - 8
+
+    def grow(self):
+        self.map.close()
+        self.capacity *= 2
+        self.file.truncate(self.capacity)
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+
+    def items(self):
+        with self.lock:
+            return [(key, value) for key, value, _ in read_entries(self.map, self.used)]
+
+
+def read_entries(data, used):
+    """ (llave, valor, posición del valor) de cada entrada hasta 'used'. """
+    position = MmapStore.HEADER
+    while position < used:
+        length = struct.unpack_from('I', data, position)[0]
+        key_end = position + 4 + length
+        value_position = key_end + 8 - (length + 4) % 8
+        key = bytes(data[position + 4:key_end]).decode()
+        yield key, struct.unpack_from('d', data, value_position)[0], value_position
+        position = value_position + 8
+
+
+def read_file(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < MmapStore.HEADER:
+        return []
+    used = struct.unpack_from('I', data, 0)[0]
+    return [(key, value) for key, value, _ in read_entries(data, min(used, len(data)))]
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """ Un almacén por proceso (después de un fork, el worker abre el suyo). """
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store_pid != os.getpid():
+                directory = get_config()['DIRECTORY']
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                    _store = MmapStore(os.path.join(directory, f'{os.getpid()}.db'))
+                else:
+                    _store = MemoryStore()
+                _store_pid = os.getpid()
+    return _store
+
+
+def reset():
+    """ Olvida el almacén de este proceso (pruebas). """
+    global _store
+    _store = None
+
+
+def collect():
+    """ {llave: valor} sumando los archivos de todos los procesos. """
+    directory = get_config()['DIRECTORY']
+    if not directory:
+        return dict(get_store().items())
+    get_store()  # Que exista el archivo de este proceso aunque aún no tenga datos
+    totals = {}
+    for name in os.listdir(directory):
+        if name.endswith('.db'):
+            for key, value in read_file(os.path.join(directory, name)):
+                totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+# --- Registro ---
+
+def observe(name, labels, value):
+    """ Histograma: un bucket (no acumulado; se acumula al exponer), _sum y _count. """
+    store = get_store()
+    buckets = FAMILIES[name][2]
+    le = next((bound for bound in buckets if value <= bound), '+Inf')
+    store.inc(sample_key(f'{name}_bucket', {**labels, 'le': str(le)}))
+    store.inc(sample_key(f'{name}_sum', labels), value)
+    store.inc(sample_key(f'{name}_count', labels))
+
+
+def observe_request(view, action, method, status, seconds, queries):
+    labels = {'view': view, 'action': action}
+    get_store().inc(sample_key(REQUESTS, {**labels, 'method': method, 'status': str(status)}))
+    observe(LATENCY, labels, seconds)
+    observe(QUERIES, labels, queries)
+
+
+# --- Exposición (text/plain; version=0.0.4) ---
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_sample(name, labels, value):
+    if labels:
+        rendered = ','.join(f'{label}="{escape(text)}"' for label, text in labels)
+        name = f'{name}{{{rendered}}}'
+    return f'{name} {int(value) if value.is_integer() else repr(value)}'
+
+
+def quantile(q, cumulative, count):
+    """ Interpolación lineal dentro del bucket (igual que histogram_quantile de Prometheus). """
+    rank = q * count
+    lower, below = 0.0, 0.0
+    for bound, total in cumulative:
+        if total >= rank:
+            if bound == float('inf'):
+                return lower
+            return lower + (bound - lower) * ((rank - below) / (total - below) if total > below else 0)
+        lower, below = bound, total
+    return lower
+
+
+def render_exposition(samples):
+    """ samples: {llave: valor} de collect(). """
+    parsed = {}
+    for key, value in samples.items():
+        name, labels = json.loads(key)
+        parsed.setdefault(name, []).append((tuple(tuple(pair) for pair in labels), value))
+
+    lines = []
+    quantile_lines = []
+    for family, (kind, help_text, buckets) in FAMILIES.items():
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {kind}')
+        if kind == 'counter':
+            for labels, value in sorted(parsed.get(family, [])):
+                lines.append(format_sample(family, labels, value))
+            continue
+
+        by_series = {}
+        for labels, value in parsed.get(f'{family}_bucket', []):
+            series = tuple(pair for pair in labels if pair[0] != 'le')
+            le = dict(labels)['le']
+            by_series.setdefault(series, {})[float(le)] = value
+        sums = dict(parsed.get(f'{family}_sum', []))
+        counts = dict(parsed.get(f'{family}_count', []))
+
+        for series in sorted(by_series):
+            observed = by_series[series]
+            cumulative, running = [], 0.0
+            for bound in list(buckets) + [float('inf')]:
+                running += observed.get(float(bound), 0.0)
+                cumulative.append((float(bound), running))
+                le = '+Inf' if bound == float('inf') else str(bound)
+                lines.append(format_sample(f'{family}_bucket', series + (('le', le),), running))
+            lines.append(format_sample(f'{family}_sum', series, sums.get(series, 0.0)))
+            lines.append(format_sample(f'{family}_count', series, counts.get(series, 0.0)))
+
+            if family == LATENCY and running:
+                for q in QUANTILES:
+                    quantile_lines.append(
+                        format_sample(LATENCY_QUANTILES, series + (('quantile', str(q)),), quantile(q, cumulative, running))
+                    )
+
+    lines.append(f'# HELP {LATENCY_QUANTILES} Percentiles estimados desde el histograma de duración.')
+    lines.append(f'# TYPE {LATENCY_QUANTILES} gauge')
+    lines.extend(quantile_lines)
+    return '\n'.join(lines) + '\n'
+
+
+# --- Middleware ---
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def view_labels(view_func):
+    """
+    (vista, acción) de la ruta. Los ViewSets de DRF traen la clase y el mapa
+    método -> acción que les dio el router (as_view(actions)).
+    """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown'), ''
+    return view_class.__name__, getattr(view_func, 'actions', None) or {}
+
+
+class MetricsMiddleware:
+    """ Alimenta el registro; va al principio de MIDDLEWARE (después del perfilado). """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_config()['ENABLED']:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        start = perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        elapsed = perf_counter() - start
+
+        view, actions = getattr(request, '_metrics_view', ('<unmatched>', ''))
+        action = actions.get(request.method.lower(), '') if isinstance(actions, dict) else actions
+        observe_request(view, action, request.method, response.status_code, elapsed, counter.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_labels(view_func)
+
+
+# --- Endpoint ---
+
+class PrometheusTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode()
+        # Errores (401/403) como JSON
+        return json.dumps(data, ensure_ascii=False).encode()
+
+
+class MetricsView(APIView):
+    """
+    GET /api/metrics/  -> formato de texto de Prometheus (version=0.0.4).
+    Para Prometheus: bearer_token de un Admin en la configuración del scrape.
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusTextRenderer]
+
+    @extend_schema(
+        tags=['11. Monitoreo (Admin)'],
+        summary="Métricas (Prometheus)",
+        description="Latencia (histogramas y p50/p95/p99), peticiones por estatus y consultas SQL "
+                    "por vista y acción, sumando todos los workers.",
+        responses={(200, 'text/plain'): OpenApiTypes.STR},
+    )
+    def get(self, request):
+        response = Response(render_exposition(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+        response['Cache-Control'] = 'no-store'
+        return response
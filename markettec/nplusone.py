@@ -0,0 +1,113 @@
+# En: markettec/nplusone.py
+
+"""
+Detector de N+1 para desarrollo.
+
+Cuenta, por petición, cuántas veces se ejecuta la misma FORMA de SQL
+(mismo texto con los parámetros fuera y los IN (...) colapsados). Si una
+forma se repite más de THRESHOLD veces casi siempre es un N+1: un
+serializer anidado o un .related que no venía en select_related /
+prefetch_related. Se avisa en el log 'markettec.nplusone' con la consulta
+y el renglón del código de la app que la disparó.
+
+    WARNING N+1: 20 consultas iguales en GET /api/reports/ (ReportSerializer...)
+
+Configuración (settings.NPLUSONE):
+    ENABLED    por default solo con DEBUG
+    THRESHOLD  repeticiones permitidas de una misma consulta
+    RAISE      lanzar NPlusOneError en lugar de avisar (útil en pruebas)
+"""
+
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'THRESHOLD': 5,
+    'RAISE': False,
+}
+
+# IN (%s, %s, %s) -> IN (%s...)  para que el tamaño de la lista no cambie la forma
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+# Literales que quedan en el SQL (LIMIT 20, OFFSET 40, 'texto')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'NPLUSONE', {})}
+
+
+def sql_shape(sql):
+    return _LITERALS.sub('?', _PLACEHOLDER_LIST.sub('(%s...)', sql))
+
+
+def app_frame():
+    """ El último renglón de NUESTRO código (apps/ o markettec/) en la pila. """
+    base = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        if frame.filename.startswith(base) and 'site-packages' not in frame.filename \
+                and frame.filename != __file__:
+            return f'{frame.filename[len(base) + 1:]}:{frame.lineno} ({frame.name})'
+    return None
+
+
+class QueryShapes:
+    """ execute_wrapper: cuenta consultas por forma y guarda dónde se repitió. """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = sql_shape(sql)
+        self.counts[shape] += 1
+        if self.counts[shape] == self.threshold + 1:
+            # Solo sacamos la pila cuando ya se pasó del umbral
+            self.origins[shape] = app_frame()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        return [(shape, count, self.origins.get(shape)) for shape, count in self.counts.items()
+                if count > self.threshold]
+
+
+class NPlusOneMiddleware:
+    """ Solo para desarrollo / pruebas: con ENABLED=False no mide nada. """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        shapes = QueryShapes(config['THRESHOLD'])
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(shapes))
+            response = self.get_response(request)
+
+        repeated = shapes.repeated()
+        for shape, count, origin in repeated:
+            logger.warning(
+                'N+1: %s consultas iguales en %s %s (desde %s): %s',
+                count, request.method, request.path, origin or '?', shape,
+            )
+        if repeated and config['RAISE']:
+            shape, count, origin = repeated[0]
+            raise NPlusOneError(f'{count} consultas iguales en {request.method} {request.path} (desde {origin}): {shape}')
+        return response
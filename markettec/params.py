@@ -0,0 +1,40 @@
+# En: markettec/params.py
+
+"""
+Lectura de parámetros de consulta (?since=, ?until=...) compartida por las
+vistas de varias apps. Un valor inválido es un 400 con el nombre del
+parámetro, nunca un 500.
+"""
+
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_day(param, value):
+    """ Acepta '2025-11-06'. """
+    try:
+        day = parse_date(value)
+    except ValueError:  # Bien formada pero imposible: '2025-02-30'
+        day = None
+    if day is None:
+        raise ValidationError({param: 'Fecha inválida. Usa AAAA-MM-DD.'})
+    return day
+
+
+def parse_moment(param, value, end_of_day=False):
+    """ Acepta '2025-11-06' o '2025-11-06T10:30:00'. """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.combine(day, time.max if end_of_day else time.min)
+    except ValueError:  # Bien formada pero imposible: '2025-02-30', mes 13...
+        moment = None
+    if moment is None:
+        raise ValidationError({param: 'Fecha inválida. Usa AAAA-MM-DD o AAAA-MM-DDTHH:MM:SS.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
@@ -0,0 +1,193 @@
+# En: markettec/profiling.py
+
+"""
+Perfilado por petición (opcional): cuánto cuesta cada endpoint.
+
+Por cada petición muestreada se mide:
+    - tiempo total (de este middleware hacia adentro)
+    - número de consultas SQL y su tiempo (connection.execute_wrapper, todas las BDs)
+    - tiempo del serializer raíz (.data; incluye las consultas perezosas que dispare)
+    - tiempo del render (JSON) y tamaño de la respuesta
+
+y se reporta de dos formas:
+    Server-Timing: db;dur=12.4;desc="9 queries", serialize;dur=30.1, render;dur=2.2, total;dur=51.0
+    log 'markettec.profiling' (una línea JSON por petición)
+
+Si la petición pasa de SLOW_REQUEST_MS se registra como WARNING con la lista
+completa de consultas (SQL y duración), para ver de dónde salió el tiempo.
+
+Configuración (settings.REQUEST_PROFILING):
+    ENABLED          apagado por default (variable REQUEST_PROFILING=True)
+    SAMPLE_RATE      fracción de peticiones que se miden (0.0 a 1.0)
+    SLOW_REQUEST_MS  umbral de petición lenta
+    SERVER_TIMING    mandar el header (los navegadores lo muestran en DevTools)
+    MAX_QUERIES      consultas que se guardan por petición para el log de lentas
+"""
+
+import json
+import logging
+import random
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,
+    'SLOW_REQUEST_MS': 500,
+    'SERVER_TIMING': True,
+    'MAX_QUERIES': 200,
+}
+
+# Perfil de la petición en curso (None = no se está midiendo)
+_profile = ContextVar('request_profile', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+def current_profile():
+    return _profile.get()
+
+
+class RequestProfile:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'render_time', 'render_started',
+                 'statements', 'max_statements')
+
+    def __init__(self, max_statements):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.render_started = None
+        self.statements = []
+        self.max_statements = max_statements
+
+    def __call__(self, execute, sql, params, many, context):
+        """ execute_wrapper: mide cada consulta. """
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            if len(self.statements) < self.max_statements:
+                self.statements.append((context['connection'].alias, sql, elapsed))
+
+
+# --- Tiempo del serializer ---
+
+_original_data = BaseSerializer.data
+
+
+def _timed_data(self):
+    """ BaseSerializer.data, midiendo solo el serializer raíz y solo la primera vez. """
+    profile = _profile.get()
+    if profile is None or self.parent is not None or hasattr(self, '_data'):
+        return _original_data.fget(self)
+    start = perf_counter()
+    try:
+        return _original_data.fget(self)
+    finally:
+        profile.serializer_time += perf_counter() - start
+
+
+def instrument_serializers():
+    """
+    Se instala la primera vez que se mide una petición: con el perfilado
+    apagado, DRF se queda intacto. Ya instalado, sin perfil activo solo pasa de largo.
+    """
+    if BaseSerializer.data is _original_data:
+        BaseSerializer.data = property(_timed_data)
+
+
+# --- Middleware ---
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestProfilingMiddleware:
+    """
+    Va PRIMERO en MIDDLEWARE para que el total incluya a los demás middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        instrument_serializers()
+        profile = RequestProfile(config['MAX_QUERIES'])
+        token = _profile.set(profile)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        total = perf_counter() - start
+
+        record = self.build_record(request, response, profile, total)
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(record)
+        if record['total_ms'] >= config['SLOW_REQUEST_MS']:
+            record['slow'] = True
+            record['sql'] = [
+                {'db': alias, 'ms': milliseconds(elapsed), 'sql': sql}
+                for alias, sql, elapsed in profile.statements
+            ]
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
+        return response
+
+    def process_template_response(self, request, response):
+        """ Respuestas de DRF: se renderizan después de la vista; medimos ese render. """
+        profile = _profile.get()
+        if profile is not None:
+            profile.render_started = perf_counter()
+
+            def render_finished(rendered):
+                profile.render_time += perf_counter() - profile.render_started
+                return rendered
+
+            response.add_post_render_callback(render_finished)
+        return response
+
+    def build_record(self, request, response, profile, total):
+        match = request.resolver_match
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': milliseconds(total),
+            'db_ms': milliseconds(profile.db_time),
+            'queries': profile.queries,
+            'serializer_ms': milliseconds(profile.serializer_time),
+            'render_ms': milliseconds(profile.render_time),
+            'bytes': None if response.streaming else len(response.content),
+        }
+
+
+def server_timing(record):
+    return ', '.join([
+        f'db;dur={record["db_ms"]};desc="{record["queries"]} queries"',
+        f'serialize;dur={record["serializer_ms"]}',
+        f'render;dur={record["render_ms"]}',
+        f'total;dur={record["total_ms"]}',
+    ])
@@ -0,0 +1,101 @@
+# En: markettec/renderers.py
+
+"""
+JSON rápido (orjson) para toda la API, y MessagePack opcional para la app Android.
+
+- FastJSONRenderer / FastJSONParser: orjson si está instalado; si no, el
+  json de la librería estándar (lo mismo que hacía DRF). La salida es la
+  misma byte por byte en ambos casos:
+    * Decimal -> número, igual que el encoder de DRF (los DecimalField de
+      los serializers ya llegan como texto: "199.00").
+    * datetime con zona -> ISO 8601 con 'Z' para UTC, igual que DRF.
+    * Accept: application/json; indent=4 (o la API navegable) -> json estándar.
+- MessagePack (pip install msgpack): la app pide
+      Accept: application/msgpack      (o ?format=msgpack)
+  y puede mandar cuerpos con Content-Type: application/msgpack.
+  Sin msgpack instalado el tipo simplemente no se ofrece (406 si lo piden).
+- El BrowsableAPIRenderer solo se registra con DEBUG (ver settings.py).
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - respaldo sin orjson
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Lo que orjson / msgpack no conocen lo convierte el encoder de DRF
+# (Decimal, fechas, UUID, textos traducibles, QuerySets...)
+_drf_default = JSONEncoder().default
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+# Separadores de línea de JavaScript: DRF los escapa (JSON dentro de <script>)
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """ Mismo media type y formato que JSONRenderer ('json'), con orjson. """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in content:
+                content = content.replace(raw, escaped)
+        return content
+
+
+class FastJSONParser(JSONParser):
+    """ JSON del cuerpo con orjson (UTF-8). Otros charsets usan el parser de DRF. """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % exc)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_drf_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % exc)
+
+
+def msgpack_available():
+    return msgpack is not None
@@ -0,0 +1,542 @@
+# En: markettec/seeding.py
+
+"""
+Generador de datos sintéticos para pruebas de carga y de escala.
+
+    python manage.py seed_marketplace                     # ~10k productos, 100k mensajes
+    python manage.py seed_marketplace --scale 100         # 1M productos, 10M mensajes
+    python manage.py seed_marketplace --seed 7 --products 50000 --messages 0
+
+Llena todas las apps (usuarios y perfiles, categorías y productos, pedidos
+y artículos, reseñas, favoritos, reportes, chats y mensajes, bitácora) con
+volúmenes configurables. Para que escale:
+    - INSERT por bloques (CHUNK_SIZE filas por transacción, un executemany
+      por tabla) con tuplas, sin Model() ni save() por fila y sin señales.
+      bulk_create se queda en ~10k filas/s porque casi todo el tiempo se
+      va en armar y preparar cada instancia; así pasa de 100k filas/s.
+    - Los IDs de usuarios, perfiles, productos, pedidos y chats se asignan
+      aquí (a partir del máximo actual), así las relaciones se calculan sin
+      volver a leer lo insertado.
+    - Lo que las señales mantienen (calificaciones, índice de búsqueda,
+      acumulados de ventas, caché del catálogo) se reconstruye al final
+      con las mismas funciones que los comandos rebuild_* / reconcile_*.
+
+Determinista: con la misma --seed, la misma --end-date y una BD vacía
+salen exactamente las mismas filas (cada tabla usa su propio
+random.Random, así que cambiar el volumen de una no cambia las demás).
+"""
+
+import random
+from array import array
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import partial
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import DateTimeField, DecimalField, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from apps.analytics import rollups
+from apps.audits.models import AuditLog
+from apps.chat.models import PREVIEW_LENGTH, Conversation, Message
+from apps.favorites.models import Favorite
+from apps.orders.models import Order, OrderItem
+from apps.products import cache as catalog_cache
+from apps.products import search
+from apps.products.models import Category, Product
+from apps.reports.models import Report
+from apps.reviews import ratings
+from apps.reviews.models import Review
+from apps.users.models import Profile
+
+CHUNK_SIZE = 5000
+
+# Volúmenes con --scale 1 (los admins y las categorías no escalan)
+VOLUMES = {
+    'vendors': 200,
+    'clients': 2_000,
+    'products': 10_000,
+    'orders': 5_000,
+    'reviews': 20_000,
+    'favorites': 10_000,
+    'reports': 500,
+    'conversations': 2_000,
+    'messages': 100_000,
+    'audit_logs': 20_000,
+}
+ADMINS = 2
+
+CATEGORIES = [
+    'Electrónica', 'Libros', 'Ropa', 'Útiles Escolares', 'Deportes', 'Hogar',
+    'Comida', 'Accesorios', 'Videojuegos', 'Instrumentos', 'Laboratorio', 'Servicios',
+]
+PRODUCT_NAMES = [
+    'Calculadora científica', 'Laptop', 'Audífonos', 'Libro de Cálculo', 'Bata de laboratorio',
+    'Mochila', 'Tenis', 'Sudadera', 'Memoria USB', 'Mouse inalámbrico', 'Cargador', 'Lámpara',
+    'Termo', 'Cuaderno', 'Juego de geometría', 'Guitarra', 'Control de consola', 'Tablet',
+    'Galletas caseras', 'Asesoría de Física', 'Bicicleta', 'Monitor', 'Teclado mecánico', 'Chamarra',
+]
+CONDITIONS = ['nuevo', 'como nuevo', 'poco uso', 'usado', 'en caja', 'con detalles']
+FIRST_NAMES = ['Ana', 'Luis', 'María', 'José', 'Fernanda', 'Carlos', 'Sofía', 'Diego', 'Valeria', 'Javier',
+               'Camila', 'Miguel', 'Daniela', 'Jorge', 'Lucía', 'Ricardo', 'Paola', 'Andrés']
+LAST_NAMES = ['García', 'Hernández', 'López', 'Martínez', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+              'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez']
+CAREERS = ['Ing. en Sistemas', 'Ing. Industrial', 'Ing. Mecatrónica', 'Ing. Civil', 'Arquitectura',
+           'Lic. en Administración', 'Ing. Química', 'Ing. Electrónica']
+REVIEW_COMMENTS = ['Excelente, tal como se describe.', 'Buen producto, llegó a tiempo.', 'Regular.',
+                   'No era lo que esperaba.', 'Muy buen vendedor, recomendado.', '', 'Le faltaba una pieza.']
+REPORT_REASONS = ['Producto falso', 'Precio engañoso', 'Contenido ofensivo', 'El vendedor no responde',
+                  'Producto prohibido']
+MESSAGES = ['Hola, ¿sigue disponible?', 'Sí, todavía lo tengo.', '¿Lo dejas en menos?', '¿Dónde lo entregas?',
+            'En la cafetería a las 2.', 'Va, ahí nos vemos.', '¿Aceptas transferencia?', 'Gracias!',
+            '¿Tiene garantía?', 'Te mando foto en un rato.']
+
+# Pesos (valor, peso)
+ORDER_STATUSES = [('delivered', 55), ('paid', 15), ('sent', 10), ('pending_payment', 10), ('canceled', 10)]
+PRODUCT_STATUSES = [('active', 90), ('pending', 7), ('rejected', 3)]
+STARS = [(1, 5), (2, 7), (3, 15), (4, 33), (5, 40)]
+AUDIT_ACTIONS = [('USER_LOGIN', 60), ('ORDER_CREATED', 15), ('PRODUCT_CREATED', 10), ('ORDER_STATUS_CHANGED', 8),
+                 ('USER_REGISTERED', 4), ('PRODUCT_APPROVED', 2), ('VENDOR_APPROVED', 1)]
+
+
+def scaled_volumes(scale=1, **overrides):
+    """ VOLUMES * scale; los valores en overrides (no None) ganan. """
+    volumes = {name: int(count * scale) for name, count in VOLUMES.items()}
+    volumes.update({name: count for name, count in overrides.items() if count is not None})
+    return volumes
+
+
+def volume_errors(volumes):
+    """ Combinaciones imposibles (ej. productos sin vendedores). """
+    requirements = {
+        'products': ['vendors'],
+        'orders': ['clients', 'products'],
+        'reviews': ['clients', 'products'],
+        'favorites': ['clients', 'products'],
+        'reports': ['clients', 'products'],
+        'conversations': ['clients', 'vendors'],
+    }
+    return [
+        f'--{name} necesita al menos un registro en ' + ' y '.join(f'--{need}' for need in needs) + '.'
+        for name, needs in requirements.items()
+        if volumes[name] and not all(volumes[need] for need in needs)
+    ]
+
+
+def weighted(choices):
+    values = [value for value, _ in choices]
+    weights = [weight for _, weight in choices]
+    return lambda rng: rng.choices(values, weights)[0]
+
+
+class TableWriter:
+    """
+    El INSERT de un modelo, armado una sola vez. Cada fila es una tupla con
+    los valores de 'fields' (en ese orden); las demás columnas llevan su
+    default. Como no pasa por el modelo, auto_now / auto_now_add no pisan
+    las fechas que le demos.
+    """
+
+    def __init__(self, model, fields, using=DEFAULT_DB_ALIAS):
+        connection = connections[using]
+        meta = model._meta
+        given = [meta.get_field(name) for name in fields]
+        rest = [field for field in meta.concrete_fields if field not in given and not field.primary_key]
+        self.defaults = tuple(field.get_db_prep_save(field.get_default(), connection) for field in rest)
+        # Solo fechas (a UTC / texto en SQLite) y decimales necesitan conversión;
+        # directo con el backend: aquí siempre llegan con zona horaria / Decimal
+        self.adapters = []
+        for index, field in enumerate(given):
+            if isinstance(field, DateTimeField):
+                self.adapters.append((index, connection.ops.adapt_datetimefield_value))
+            elif isinstance(field, DecimalField):
+                self.adapters.append((index, partial(connection.ops.adapt_decimalfield_value,
+                                                     max_digits=field.max_digits,
+                                                     decimal_places=field.decimal_places)))
+        quote = connection.ops.quote_name
+        columns = [quote(field.column) for field in given + rest]
+        self.sql = (f'INSERT INTO {quote(meta.db_table)} ({", ".join(columns)}) '
+                    f'VALUES ({", ".join(["%s"] * len(columns))})')
+        self.rows = []
+
+    def add(self, values):
+        if self.adapters:
+            values = list(values)
+            for index, adapt in self.adapters:
+                values[index] = adapt(values[index])
+        self.rows.append(tuple(values) + self.defaults)
+
+    def flush(self, cursor):
+        if self.rows:
+            cursor.executemany(self.sql, self.rows)
+            self.rows = []
+
+
+class MarketplaceSeeder:
+    """
+    seeder = MarketplaceSeeder(scaled_volumes(10), seed=1, log=print)
+    seeder.run()   # -> {'users': 2202, 'products': 100000, ...}
+    """
+
+    def __init__(self, volumes, seed=1, chunk_size=CHUNK_SIZE, days=365, end=None,
+                 password='marketplace', using=DEFAULT_DB_ALIAS, log=None):
+        self.volumes = volumes
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.using = using
+        self.log = log or (lambda message: None)
+        self.password_hash = make_password(password)  # Un solo hash para todos (hashear 1M tarda horas)
+        self.prefix = f'seed{seed}'
+
+        end = end or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(end, time.min))
+        self.start = self.end - timedelta(days=days)
+        self.span = (self.end - self.start).total_seconds()
+
+    # --- Utilidades ---
+
+    def rng(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def moment(self, rng):
+        """ Una fecha al azar dentro de la ventana. """
+        return self.start + timedelta(seconds=rng.random() * self.span)
+
+    def next_id(self, model):
+        return (model.objects.using(self.using).aggregate(top=Max('pk'))['top'] or 0) + 1
+
+    def already_seeded(self):
+        return User.objects.using(self.using).filter(username__startswith=f'{self.prefix}-').exists()
+
+    def writer(self, model, *fields):
+        return TableWriter(model, fields, using=self.using)
+
+    def insert(self, label, rows, *writers):
+        """
+        Con un writer, rows da tuplas (una fila). Con varios, da por cada
+        fila principal una lista de tuplas por writer, ej. ([pedido],
+        [artículo, artículo]). Cada chunk_size filas principales se escriben
+        en una transacción.
+        """
+        started = perf_counter()
+        total = 0
+        connection = connections[self.using]
+
+        def flush():
+            with transaction.atomic(using=self.using), connection.cursor() as cursor:
+                for writer in writers:
+                    writer.flush(cursor)
+
+        for row in rows:
+            if len(writers) == 1:
+                writers[0].add(row)
+            else:
+                for writer, values in zip(writers, row):
+                    for value in values:
+                        writer.add(value)
+            total += 1
+            if total % self.chunk_size == 0:
+                flush()
+        flush()
+
+        elapsed = perf_counter() - started
+        rate = f' ({total / elapsed:,.0f}/s)' if total and elapsed else ''
+        self.log(f'  {label}: {total:,} en {elapsed:.1f} s{rate}')
+        return total
+
+    # --- Tablas ---
+
+    def seed_users(self):
+        """ Admins, vendedores y clientes (con perfil), en rangos de IDs contiguos. """
+        rng = self.rng('users')
+        counts = [('admin', ADMINS), ('vendor', self.volumes['vendors']), ('client', self.volumes['clients'])]
+        user_start, profile_start = self.next_id(User), self.next_id(Profile)
+
+        self.user_ids = range(user_start, user_start + sum(count for _, count in counts))
+        self.profile_ids, offset = {}, 0
+        for role, count in counts:
+            self.profile_ids[role] = range(profile_start + offset, profile_start + offset + count)
+            offset += count
+
+        def rows():
+            n = 0
+            for role, count in counts:
+                for i in range(count):
+                    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                    username = f'{self.prefix}-{role}-{i:07d}'
+                    vendor_status = store_name = control_number = career = None
+                    if role == 'vendor':
+                        vendor_status = 'approved' if rng.random() < 0.95 else 'pending'
+                        store_name = f'Tienda {last} {i}'
+                    elif role == 'client':
+                        control_number = f'{19000000 + n}'
+                        career = rng.choice(CAREERS)
+                    user_id = user_start + n
+                    yield (
+                        [(user_id, username, self.password_hash, first, last, f'{username}@example.com',
+                          role == 'admin', self.moment(rng))],
+                        [(profile_start + n, user_id, role, vendor_status, store_name, control_number, career)],
+                    )
+                    n += 1
+
+        return self.insert(
+            'usuarios y perfiles', rows(),
+            self.writer(User, 'id', 'username', 'password', 'first_name', 'last_name', 'email', 'is_staff',
+                        'date_joined'),
+            self.writer(Profile, 'id', 'user', 'role', 'vendor_status', 'store_name', 'control_number', 'career'),
+        )
+
+    def seed_categories(self):
+        existing = set(Category.objects.using(self.using).filter(name__in=CATEGORIES).values_list('name', flat=True))
+        missing = [Category(name=name, description=f'Todo en {name.lower()}') for name in CATEGORIES
+                   if name not in existing]
+        Category.objects.using(self.using).bulk_create(missing)
+        self.category_ids = list(
+            Category.objects.using(self.using).filter(name__in=CATEGORIES).order_by('name').values_list('id', flat=True)
+        )
+        self.log(f'  categorías: {len(missing)} nuevas, {len(self.category_ids)} en total')
+        return len(missing)
+
+    def seed_products(self):
+        """
+        Guarda en arreglos compactos (8 bytes por producto) el vendedor y el
+        precio de cada producto: los pedidos los necesitan.
+        """
+        rng = self.rng('products')
+        vendors = self.profile_ids['vendor']
+        status = weighted(PRODUCT_STATUSES)
+        start = self.product_start = self.next_id(Product)
+        self.product_vendor = array('q')
+        self.product_cents = array('q')
+
+        def rows():
+            for i in range(self.volumes['products']):
+                # Un 30% se lo llevan unos pocos vendedores (como en la realidad)
+                if rng.random() < 0.3:
+                    vendor = vendors[min(int(rng.paretovariate(1.2)) - 1, len(vendors) - 1)]
+                else:
+                    vendor = rng.choice(vendors)
+                cents = rng.randrange(2_000, 2_500_000, 10)
+                created = self.moment(rng)
+                name = rng.choice(PRODUCT_NAMES)
+                self.product_vendor.append(vendor)
+                self.product_cents.append(cents)
+                yield (
+                    start + i, f'{name} {rng.choice(CONDITIONS)}',
+                    f'{name} en buen estado. Entrega en el campus. Ref {i}.', Decimal(cents).scaleb(-2),
+                    rng.randrange(0, 50), f'{self.prefix}-{i:08d}', status(rng), vendor,
+                    rng.choice(self.category_ids), created, created,
+                )
+
+        return self.insert('productos', rows(), self.writer(
+            Product, 'id', 'name', 'description', 'price', 'inventory', 'sku', 'status', 'vendor', 'category',
+            'created_at', 'updated_at',
+        ))
+
+    def random_product(self, rng):
+        return rng.randrange(len(self.product_vendor))
+
+    def seed_orders(self):
+        rng = self.rng('orders')
+        clients = self.profile_ids['client']
+        status = weighted(ORDER_STATUSES)
+        start = self.next_id(Order)
+        items_total = 0
+
+        def rows():
+            nonlocal items_total
+            for i in range(self.volumes['orders']):
+                created = self.moment(rng)
+                items, total = [], 0
+                for _ in range(rng.choice((1, 1, 1, 2, 2, 3, 4))):
+                    index = self.random_product(rng)
+                    quantity = rng.choice((1, 1, 1, 2, 3))
+                    cents = self.product_cents[index]
+                    total += cents * quantity
+                    # vendor y order_created_at van desnormalizados (ver OrderItem.save)
+                    items.append((start + i, self.product_start + index, self.product_vendor[index], created,
+                                  quantity, Decimal(cents).scaleb(-2)))
+                items_total += len(items)
+                yield [(start + i, rng.choice(clients), status(rng), Decimal(total).scaleb(-2), created, created)], items
+
+        total = self.insert(
+            'pedidos', rows(),
+            self.writer(Order, 'id', 'client', 'status', 'total_price', 'created_at', 'updated_at'),
+            self.writer(OrderItem, 'order', 'product', 'vendor', 'order_created_at', 'quantity', 'price_at_purchase'),
+        )
+        self.log(f'  artículos de pedido: {items_total:,}')
+        return total
+
+    def seed_reviews(self):
+        rng = self.rng('reviews')
+        clients = self.profile_ids['client']
+        stars = weighted(STARS)
+
+        def rows():
+            for _ in range(self.volumes['reviews']):
+                yield (self.product_start + self.random_product(rng), rng.choice(clients), stars(rng),
+                       rng.choice(REVIEW_COMMENTS), self.moment(rng))
+
+        return self.insert('reseñas', rows(), self.writer(
+            Review, 'product', 'reviewer', 'rating', 'comment', 'created_at',
+        ))
+
+    def seed_favorites(self):
+        """
+        (perfil, producto) es único: el favorito i es del cliente i % C y
+        apunta al producto (salto del cliente + i // C) % P, que no se repite
+        para el mismo cliente mientras i < C * P.
+        """
+        rng = self.rng('favorites')
+        clients = self.profile_ids['client']
+        products = len(self.product_vendor)
+        count = min(self.volumes['favorites'], len(clients) * products)
+
+        def rows():
+            for i in range(count):
+                client, k = i % len(clients), i // len(clients)
+                offset = (client * 7919) % products
+                yield clients[client], self.product_start + (offset + k) % products, self.moment(rng)
+
+        return self.insert('favoritos', rows(), self.writer(Favorite, 'profile', 'product', 'created_at'))
+
+    def seed_reports(self):
+        rng = self.rng('reports')
+        clients = self.profile_ids['client']
+
+        def rows():
+            for _ in range(self.volumes['reports']):
+                yield (rng.choice(clients), self.product_start + self.random_product(rng), rng.choice(REPORT_REASONS),
+                       'pending' if rng.random() < 0.8 else 'resolved', self.moment(rng))
+
+        return self.insert('reportes', rows(), self.writer(
+            Report, 'reporter', 'product', 'reason', 'status', 'created_at',
+        ))
+
+    def message_text(self, n):
+        return MESSAGES[(n * 7 + self.seed) % len(MESSAGES)]
+
+    def message_moment(self, n, total):
+        """ Los mensajes avanzan en el tiempo con su número (el último, al final de la ventana). """
+        return self.start + timedelta(seconds=self.span * (n + 1) / total)
+
+    def seed_conversations(self):
+        """
+        Chats cliente <-> vendedor; (user_a, user_b) es único: el chat i es
+        del cliente i % C con el vendedor (cliente + i // C) % V.
+
+        El mensaje n va al chat n % N y lo manda user_a o user_b por turnos,
+        así los datos desnormalizados del chat (vista previa, fecha y
+        no-leídos) salen de una fórmula sin leer los mensajes. Solo el último
+        mensaje de cada chat queda sin leer.
+        """
+        rng = self.rng('conversations')
+        clients, vendors = self.profile_ids['client'], self.profile_ids['vendor']
+        count = min(self.volumes['conversations'], len(clients) * len(vendors))
+        messages = self.volumes['messages'] if count else 0
+        conversation_start = self.next_id(Conversation)
+
+        def participants(index):
+            client, k = index % len(clients), index // len(clients)
+            return clients[client], vendors[(client + k) % len(vendors)]
+
+        def conversation_rows():
+            for index in range(count):
+                user_a, user_b = participants(index)
+                updated, preview, last_at, unread_a, unread_b = self.moment(rng), '', None, 0, 0
+                if index < messages:
+                    last = index + count * ((messages - 1 - index) // count)
+                    preview = self.message_text(last)[:PREVIEW_LENGTH]
+                    last_at = updated = self.message_moment(last, messages)
+                    if (last // count) % 2 == 0:
+                        unread_b = 1  # Lo mandó user_a
+                    else:
+                        unread_a = 1
+                yield conversation_start + index, user_a, user_b, updated, preview, last_at, unread_a, unread_b
+
+        def message_rows():
+            # Chat por chat (n = chat + k * N): el índice (chat, fecha, id) crece
+            # al final en lugar de insertar en medio, que con millones es lo lento
+            for index in range(min(count, messages)):
+                user_a, user_b = participants(index)
+                for n in range(index, messages, count):
+                    sender = user_a if (n // count) % 2 == 0 else user_b
+                    yield (conversation_start + index, sender, self.message_text(n),
+                           self.message_moment(n, messages), n < messages - count)
+
+        total = self.insert('chats', conversation_rows(), self.writer(
+            Conversation, 'id', 'user_a', 'user_b', 'updated_at', 'last_message_preview', 'last_message_at',
+            'unread_count_a', 'unread_count_b',
+        ))
+        self.insert('mensajes', message_rows(), self.writer(
+            Message, 'conversation', 'sender', 'text', 'created_at', 'is_read',
+        ))
+        self.link_last_messages(conversation_start, conversation_start + count)
+        return total
+
+    def link_last_messages(self, first_id, end_id):
+        """ last_message apunta a un mensaje que no existía al crear el chat: se llena al final. """
+        latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+        for start in range(first_id, end_id, self.chunk_size):
+            with transaction.atomic(using=self.using):
+                Conversation.objects.using(self.using).filter(
+                    id__gte=start, id__lt=min(start + self.chunk_size, end_id), last_message_at__isnull=False
+                ).update(last_message=Subquery(latest))
+
+    def seed_audit_logs(self):
+        rng = self.rng('audit_logs')
+        action = weighted(AUDIT_ACTIONS)
+
+        count = self.volumes['audit_logs']
+
+        def rows():
+            for i in range(count):
+                kind = action(rng)
+                # En orden de fecha, como llegan de verdad (los índices por fecha crecen al final)
+                moment = self.start + timedelta(seconds=self.span * (i + rng.random()) / count)
+                yield rng.choice(self.user_ids), kind, f'{kind} (datos sintéticos)', moment
+
+        return self.insert('bitácora', rows(), self.writer(AuditLog, 'user', 'action', 'details', 'timestamp'))
+
+    # --- Derivados (lo que normalmente mantienen las señales) ---
+
+    def rebuild_derived(self):
+        started = perf_counter()
+        with transaction.atomic(using=self.using):
+            rated = ratings.recompute(using=self.using)
+        with transaction.atomic(using=self.using):
+            indexed = search.rebuild(using=self.using)
+        # Una sola pasada: por tramos (como rebuild_sales_rollups) recorre todos los artículos en cada tramo
+        with transaction.atomic(using=self.using):
+            rollups.rebuild(self.start.date(), self.end.date(), using=self.using)
+        catalog_cache.invalidate(catalog_cache.PRODUCTS, catalog_cache.CATEGORIES)
+        self.reset_sequences()
+        self.log(f'  calificaciones ({rated:,}), índice de búsqueda ({indexed or 0:,}) '
+                 f'y acumulados de ventas: {perf_counter() - started:.1f} s')
+
+    def reset_sequences(self):
+        """ Postgres: las secuencias no avanzan con IDs explícitos (en SQLite no hace falta). """
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Profile, Product, Order, Conversation])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def run(self):
+        counts = {
+            'users': self.seed_users(),
+            'categories': self.seed_categories(),
+            'products': self.seed_products(),
+            'orders': self.seed_orders(),
+            'reviews': self.seed_reviews(),
+            'favorites': self.seed_favorites(),
+            'reports': self.seed_reports(),
+            'conversations': self.seed_conversations(),
+            'audit_logs': self.seed_audit_logs(),
+        }
+        self.rebuild_derived()
+        return counts
@@ -0,0 +1,243 @@
+# En: markettec/serializers.py
+
+"""
+Respuestas a la medida con ?fields= y ?expand=, y el queryset que les corresponde.
+
+    GET /api/products/?fields=id,name,price,product_image_variants
+    GET /api/products/?fields=id,name,vendor                  -> vendor = su ID (sin JOIN)
+    GET /api/products/?fields=id,name,vendor&expand=vendor    -> vendor anidado completo
+    GET /api/products/?fields=id,vendor.username              -> vendor solo con username
+    GET /api/products/?expand=category                        -> agrega la categoría completa
+    GET /api/favorites/?fields=id,product.id,product.name,product.price,product.product_image_variants
+
+- Sin parámetros la respuesta es la de siempre.
+- ?fields= deja solo los campos pedidos; con punto se llega a los anidados.
+  Una relación pedida sin subcampos sale como su ID, salvo que venga en ?expand=.
+- Meta.expandable_fields: relaciones que NO salen por default y se piden con ?expand=.
+- Solo aplica a lecturas (GET): al crear o editar se validan todos los campos.
+- shape_queryset() arma select_related / prefetch_related (y only() cuando
+  hay ?fields=) con los campos que quedaron: lo que no se pidió no se
+  consulta ni se serializa.
+
+Uso:
+    class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer): ...
+    class ProductViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet): ...
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        name=FIELDS_PARAM, type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+        description='Campos a regresar, separados por coma; con punto para los anidados '
+                    '(ej. ?fields=id,name,price,vendor.username).'
+    ),
+    OpenApiParameter(
+        name=EXPAND_PARAM, type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+        description='Relaciones a anidar completas (ej. ?expand=vendor,category).'
+    ),
+]
+
+
+def parse_paths(value):
+    """ 'id,product.name,product.vendor' -> {'id': {}, 'product': {'name': {}, 'vendor': {}}} """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def requested_shape(request):
+    """ (campos, expandir) pedidos en la URL. campos=None = todos. """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, {}
+    params = getattr(request, 'query_params', request.GET)
+    fields = parse_paths(params[FIELDS_PARAM]) if params.get(FIELDS_PARAM) else None
+    return fields, parse_paths(params.get(EXPAND_PARAM))
+
+
+class SparseFieldsMixin:
+    """
+    Para serializers de lectura. El serializer raíz lee ?fields= / ?expand=
+    del request del contexto; a los anidados se los pasa su padre.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields_tree, expand_tree = self.sparse_shape()
+        if fields_tree is None and not expand_tree:
+            return fields
+
+        expandable = getattr(getattr(self, 'Meta', None), 'expandable_fields', {})
+        for name in expand_tree:
+            if name in expandable:
+                serializer_class, kwargs = expandable[name]
+                fields[name] = serializer_class(read_only=True, **kwargs)
+
+        if fields_tree is not None:
+            fields = {name: field for name, field in fields.items() if name in fields_tree or name in expand_tree}
+
+        for name, field in fields.items():
+            nested = getattr(field, 'child', field)
+            if not isinstance(nested, SparseFieldsMixin):
+                continue
+            subfields = fields_tree.get(name) if fields_tree is not None else None
+            if subfields == {} and name not in expand_tree:
+                collapsed = self.collapse_field(name, field)
+                if collapsed is not None:
+                    fields[name] = collapsed
+                    continue
+            nested._sparse_shape = (subfields or None, expand_tree.get(name, {}))
+        return fields
+
+    def sparse_shape(self):
+        if hasattr(self, '_sparse_shape'):
+            return self._sparse_shape
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            # Anidado en un serializer que no reparte la forma: va completo
+            return None, {}
+        return requested_shape(self.context.get('request'))
+
+    def collapse_field(self, name, field):
+        """ Relación pedida sin subcampos -> su ID (solo llaves foráneas; si no, None). """
+        model = getattr(getattr(self, 'Meta', None), 'model', None)
+        source = field.source or name
+        if model is None or '.' in source:
+            return None
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+        if not (model_field.concrete and (model_field.many_to_one or model_field.one_to_one)):
+            return None
+        kwargs = {'source': source} if source != name else {}
+        return serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
+
+
+# --- Queryset ---
+
+def _new_plan():
+    return {'select': set(), 'prefetch': [], 'columns': set()}
+
+
+def _all_columns(model, prefix, plan):
+    """ Un campo que no sabemos de qué columnas depende (propiedad, método): todas. """
+    plan['columns'].update(prefix + field.name for field in model._meta.concrete_fields)
+
+
+def _select(model_field, path, plan):
+    plan['select'].add(path)
+    if model_field.concrete:
+        plan['columns'].add(path)
+
+
+def _follow(model, prefix, attrs, plan):
+    """
+    Recorre los source_attrs de un campo hasta el último atributo.
+    Regresa (modelo, prefijo, campo del modelo) o None si no es algo de la BD.
+    """
+    for position, attr in enumerate(attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            _all_columns(model, prefix, plan)
+            return None
+        if position == len(attrs) - 1:
+            return model, prefix, model_field
+        if not model_field.is_relation or model_field.many_to_many or model_field.one_to_many:
+            _all_columns(model, prefix, plan)
+            return None
+        _select(model_field, prefix + attr, plan)
+        model, prefix = model_field.related_model, f'{prefix}{attr}__'
+    return None
+
+
+def query_plan(serializer, model, prefix='', plan=None, related=None, restrict=False):
+    """ JOINs, prefetches y columnas que necesitan los campos del serializer. """
+    plan = plan if plan is not None else _new_plan()
+    related = related or {}
+    plan['columns'].add(prefix + model._meta.pk.name)
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            _all_columns(model, prefix, plan)
+            continue
+        target = _follow(model, prefix, field.source_attrs, plan)
+        if target is None:
+            continue
+        owner, owner_prefix, model_field = target
+        path = owner_prefix + field.source_attrs[-1]
+        nested = getattr(field, 'child', field)
+
+        if not (isinstance(nested, serializers.BaseSerializer) and model_field.is_relation):
+            if model_field.concrete:
+                plan['columns'].add(path)
+            continue
+
+        if model_field.many_to_many or model_field.one_to_many:
+            child_plan = query_plan(nested, model_field.related_model, restrict=restrict)
+            if model_field.one_to_many:
+                # La llave de regreso: el prefetch la usa para repartir los hijos
+                child_plan['columns'].add(model_field.field.name)
+            base = related.get(path, model_field.related_model._default_manager.all())
+            plan['prefetch'].append(Prefetch(path, queryset=apply_plan(base, child_plan, restrict)))
+        else:
+            _select(model_field, path, plan)
+            query_plan(nested, model_field.related_model, f'{path}__', plan, related, restrict)
+    return plan
+
+
+def apply_plan(queryset, plan, restrict):
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if plan['select']:
+        queryset = queryset.select_related(*sorted(plan['select']))
+    if plan['prefetch']:
+        queryset = queryset.prefetch_related(*plan['prefetch'])
+    if restrict:
+        queryset = queryset.only(*sorted(plan['columns']))
+    return queryset
+
+
+def shape_queryset(queryset, serializer, related=None):
+    """
+    Reemplaza los select_related / prefetch_related del queryset por los que
+    pide el serializer (ya recortado con ?fields= / ?expand=).
+    related: {ruta del prefetch: queryset base} para filtrar a los hijos,
+    ej. {'items': OrderItem.objects.filter(vendor=profile)}.
+    only() solo se aplica con ?fields=: sin él se cargan los modelos completos,
+    que es lo que esperan las vistas que los editan después.
+    """
+    serializer = getattr(serializer, 'child', serializer)
+    restrict = (
+        isinstance(serializer, SparseFieldsMixin)
+        and serializer.sparse_shape()[0] is not None
+    )
+    plan = query_plan(serializer, queryset.model, related=related, restrict=restrict)
+    return apply_plan(queryset, plan, restrict)
+
+
+class SparseFieldsViewMixin:
+    """
+    Para GenericViewSet: list / retrieve / get_object() salen con el queryset
+    que pide el serializer. Las acciones propias llaman self.shape_queryset().
+    """
+
+    def filter_queryset(self, queryset):
+        return self.shape_queryset(super().filter_queryset(queryset))
+
+    def shape_queryset(self, queryset, related=None):
+        return shape_queryset(queryset, self.get_serializer(), related=related)
@@ -4,7 +4,9 @@ Django settings for markettec project.
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 import os
+import sys
 from dotenv import load_dotenv # Para .env
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -14,6 +16,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / '.env')
 SECRET_KEY = os.getenv('SECRET_KEY')
 DEBUG = os.getenv('DEBUG', 'False').lower() in ['true', '1', 't']
+
+# ¿Estamos corriendo 'manage.py test'?
+TESTING = 'test' in sys.argv[1:2]
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1, 172.200.235.24').split(',')
 # ---------------------------------
 
@@ -44,9 +50,14 @@ INSTALLED_APPS = [
     'apps.reviews',
     'apps.favorites',
     'apps.chat',
+    'apps.analytics.apps.AnalyticsConfig', # Configuración de Signals
+    'markettec', # Comandos del proyecto completo (seed_marketplace)
 ]
 
 MIDDLEWARE = [
+    'markettec.profiling.RequestProfilingMiddleware', # Primero: mide a todos los demás (apagado por default)
+    'markettec.metrics.MetricsMiddleware', # Latencia / estatus / consultas por vista (GET /api/metrics/)
+    'markettec.nplusone.NPlusOneMiddleware', # Avisa de N+1 en desarrollo (solo con DEBUG)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # ¡Importante!
@@ -55,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'markettec.db_routers.DatabaseRoutingMiddleware', # Réplica de lectura / leer lo que escribiste
 ]
 
 ROOT_URLCONF = 'markettec.urls'
@@ -78,12 +90,102 @@ WSGI_APPLICATION = 'markettec.wsgi.application'
 
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# --- SQLite para producción (varios workers de gunicorn escribiendo a la vez) ---
+# - WAL: los lectores no bloquean al que escribe ni al revés.
+# - synchronous=NORMAL: con WAL solo una caída del SISTEMA (no del proceso)
+#   puede perder la última transacción confirmada.
+# - busy_timeout: esperar el candado en lugar de tronar con 'database is locked'.
+# - mmap / cache_size: las lecturas salen de memoria y no de read().
+# - transaction_mode IMMEDIATE: cada atomic() toma el candado de escritura
+#   al EMPEZAR. Con el modo por default (DEFERRED) una transacción que lee
+#   y luego escribe (crear pedido, cancelar, importar) falla al instante
+#   si otro escribió en medio, sin esperar el busy_timeout.
+#   Es global a propósito (Django lo configura por conexión, no por atomic()):
+#   hoy todos los atomic() del proyecto escriben y no hay ATOMIC_REQUESTS, así
+#   que las lecturas siguen en autocommit sin candado. Un atomic() de solo
+#   lectura también haría fila con los que escriben.
+# Apagar con SQLITE_TUNED=False (solo para comparar: benchmarks/sqlite_writes.py)
+SQLITE_TUNED = os.getenv('SQLITE_TUNED', 'True').lower() in ['true', '1', 't']
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '20')) # Segundos
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000}',
+    'PRAGMA mmap_size=268435456', # 256 MB
+    'PRAGMA cache_size=-32000', # ~32 MB por conexión
+    'PRAGMA temp_store=MEMORY',
+]
+
+# --- Motor de BD (variables de entorno, ver .env.example) ---
+# DB_ENGINE=sqlite (default, desarrollo) | postgresql (producción)
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite').lower()
+
+# Conexiones persistentes: se reusan entre peticiones del mismo worker en
+# lugar de abrir una nueva cada vez (segundos; 0 = cerrar al terminar).
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+if DB_ENGINE in ['postgres', 'postgresql']:
+    # Pool nativo de Django 5.1+ (psycopg_pool): N conexiones abiertas por
+    # proceso que se prestan a cada petición. El pool y CONN_MAX_AGE no se
+    # pueden combinar; con DB_POOL=False se usan conexiones persistentes.
+    DB_POOL = os.getenv('DB_POOL', 'True').lower() in ['true', '1', 't']
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'markettec'),
+            'USER': os.getenv('DB_USER', 'markettec'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')), # Espera por una conexión libre
+                },
+            } if DB_POOL else {},
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / os.getenv('SQLITE_PATH', 'db.sqlite3'), # (Relativa al proyecto o absoluta)
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE, # (Los PRAGMA se aplican una vez por conexión)
+            'OPTIONS': {
+                'init_command': '; '.join(SQLITE_PRAGMAS),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': SQLITE_BUSY_TIMEOUT,
+            } if SQLITE_TUNED else {},
+        }
+    }
+
+
+# --- Réplica de lectura (opcional, ver markettec/db_routers.py) ---
+# PostgreSQL: DB_REPLICA_HOST (y DB_REPLICA_PORT). SQLite: SQLITE_REPLICA_PATH.
+# El catálogo y el historial del chat leen de ahí; las escrituras, de la primaria.
+if os.getenv('DB_REPLICA_HOST') and DB_ENGINE in ['postgres', 'postgresql']:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+    }
+elif os.getenv('SQLITE_REPLICA_PATH') and DB_ENGINE == 'sqlite':
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': BASE_DIR / os.getenv('SQLITE_REPLICA_PATH')}
+
+if TESTING:
+    # Las pruebas del router leen de 'replica': el mismo motor y base que 'default'
+    # (SQLite o PostgreSQL) marcado como espejo, así Django no crea una segunda
+    # base de pruebas y la "réplica" ve los mismos datos, como en producción.
+    # Las demás pruebas no lo tocan: DATABASE_READ_REPLICA va apagado.
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['markettec.db_routers.PrimaryReplicaRouter']
+DATABASE_READ_REPLICA = 'replica' if 'replica' in DATABASES and not TESTING else None
+# Segundos que las lecturas de un usuario van a la primaria después de que escribe
+DATABASE_READ_YOUR_WRITES_SECONDS = int(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
 
 
 # Password validation
@@ -114,15 +216,27 @@ MEDIA_ROOT = BASE_DIR / 'media' # Para 'product_image' y 'profile_image'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # --- Configuración de DRF (API) ---
+# JSON con orjson (ver markettec/renderers.py); MessagePack si está instalado 'msgpack'
+API_RENDERERS = ['markettec.renderers.FastJSONRenderer']
+API_PARSERS = [
+    'markettec.renderers.FastJSONParser',
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+]
+if find_spec('msgpack'):
+    API_RENDERERS.append('markettec.renderers.MessagePackRenderer')
+    API_PARSERS.append('markettec.renderers.MessagePackParser')
+if DEBUG:
+    # La API navegable (la API "fea") solo en desarrollo: en producción es puro costo
+    API_RENDERERS.append('rest_framework.renderers.BrowsableAPIRenderer')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.ClaimsJWTAuthentication', # JWT con rol/baneo en el token (sin consultar la BD)
         'rest_framework.authentication.SessionAuthentication', # Para el login del navegador
     ),
-    'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer', # Para la API "fea"
-    ),
+    'DEFAULT_RENDERER_CLASSES': API_RENDERERS,
+    'DEFAULT_PARSER_CLASSES': API_PARSERS,
     # Configuración de OpenAPI/Swagger
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
@@ -142,7 +256,23 @@ SIMPLE_JWT = {
     # --- ¡ESTA ES LA LÍNEA NUEVA! ---
     # Le dice a simple_jwt que use nuestro serializer personalizado
     'TOKEN_OBTAIN_SERIALIZER': 'apps.users.serializers.MyTokenObtainPairSerializer',
+    # El refresh vuelve a leer rol/baneo de la BD (ver apps/users/authentication.py)
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.authentication.ClaimsTokenRefreshSerializer',
+}
+
+# --- Caché ---
+# Compartido entre workers del mismo servidor (archivos). Para varios servidores
+# usa Redis: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# y CACHE_LOCATION=redis://host:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
 }
+if TESTING:
+    # Cada corrida de pruebas empieza con el caché vacío
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
 
 # --- Configuración de OpenAPI/Swagger ---
 SPECTACULAR_SETTINGS = {
@@ -170,9 +300,87 @@ SPECTACULAR_SETTINGS = {
         {'name': '7. Reportes', 'description': 'Creación y gestión de reportes de usuarios.'},
         {'name': '8. Auditoría (Admin)', 'description': 'Consulta del historial de acciones (solo Admin).'},
         {'name': '9. Chat', 'description': 'Mensajería entre cliente y vendedor (Texto, Fotos, Audio y Ubicación).'},
+        {'name': '10. Estadísticas de Ventas', 'description': 'Ventas diarias por vendedor y producto, leídas de los acumulados (Vendedores y Admin).'},
+        {'name': '11. Monitoreo (Admin)', 'description': 'Métricas de latencia y consultas de la API (solo Admin).'},
     ],
 }
 
+# --- Chat en Tiempo Real (WebSockets en markettec/asgi.py) ---
+# La capa en memoria solo entrega eventos si HTTP y WebSockets corren en el
+# MISMO proceso (un solo worker ASGI). Con varios hay que apuntar a un backend
+# compartido que implemente apps.chat.layers.BaseChannelLayer; gunicorn.conf.py
+# se niega a arrancar más de un worker con la capa en memoria.
+CHAT_CHANNEL_LAYER = {
+    'BACKEND': os.getenv('CHAT_CHANNEL_LAYER', 'apps.chat.layers.InMemoryChannelLayer'),
+    'OPTIONS': {
+        'capacity': 100, # Eventos pendientes por socket antes de tirar los más viejos
+    },
+}
+
+# --- Caché del catálogo público (apps/products/cache.py) ---
+# Usa el caché 'default' de arriba + una copia pequeña en la memoria de cada proceso.
+CATALOG_CACHE = {
+    'ENABLED': os.getenv('CATALOG_CACHE', 'True').lower() in ['true', '1', 't'] and not TESTING,
+    'TIMEOUT': 300,       # Segundos en caché
+    'LOCAL_ENTRIES': 256, # Respuestas en memoria por proceso
+    'MAX_AGE': 30,        # Cache-Control para anónimos
+    'MAX_DEPS': 64,       # Productos/vendedores que se revisan uno por uno por respuesta
+}
+
+# --- Miniaturas de imágenes (markettec/images.py) ---
+IMAGE_VARIANTS = {
+    'SIZES': {'thumb': (200, 200), 'medium': (800, 800)}, # Caja máxima (se respeta la proporción)
+    'QUALITY': 80,
+    'WORKERS': 2,          # Hilos que procesan las subidas
+    'ASYNC': not TESTING,  # En pruebas se generan en línea
+    'MISSING_TTL': 30,     # Segundos que se recuerda que una variante falta (no se pregunta al storage)
+}
+
+# --- Bitácora de auditoría (apps/audits/pipeline.py) ---
+# En pruebas se escribe en línea para poder revisar los registros al instante.
+AUDIT_LOG = {
+    'ASYNC': os.getenv('AUDIT_ASYNC', 'True').lower() in ['true', '1', 't'] and not TESTING,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL': 2.0, # Segundos
+}
+
+# --- Perfilado por petición (markettec/profiling.py) ---
+# Server-Timing + una línea JSON por petición en el log 'markettec.profiling'.
+REQUEST_PROFILING = {
+    'ENABLED': os.getenv('REQUEST_PROFILING', 'False').lower() in ['true', '1', 't'] and not TESTING,
+    'SAMPLE_RATE': float(os.getenv('REQUEST_PROFILING_SAMPLE_RATE', '1.0')), # 0.05 = 1 de cada 20
+    'SLOW_REQUEST_MS': int(os.getenv('SLOW_REQUEST_MS', '500')), # Lentas: se loguean con todo su SQL
+    'SERVER_TIMING': True,
+    'MAX_QUERIES': 200,
+}
+
+# --- Métricas (markettec/metrics.py) ---
+# Con varios workers de gunicorn, METRICS_DIR es una carpeta compartida
+# (cada worker escribe su archivo y /api/metrics/ los suma).
+METRICS = {
+    'ENABLED': os.getenv('METRICS', 'True').lower() in ['true', '1', 't'],
+    'DIRECTORY': os.getenv('METRICS_DIR', ''),
+}
+
+# --- Detector de N+1 (markettec/nplusone.py) ---
+NPLUSONE = {
+    'ENABLED': DEBUG or os.getenv('NPLUSONE', 'False').lower() in ['true', '1', 't'],
+    'THRESHOLD': int(os.getenv('NPLUSONE_THRESHOLD', '5')), # Repeticiones permitidas de una misma consulta
+    'RAISE': False,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'markettec.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'markettec.nplusone': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 # --- Configuración de Email (para Reseteo de Contraseña) ---
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
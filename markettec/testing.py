@@ -0,0 +1,157 @@
+# En: markettec/testing.py
+
+"""
+Utilidades para las pruebas: un marketplace con datos realistas y
+presupuestos de consultas por endpoint.
+
+    class FavoriteQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+        def test_list(self):
+            market = Marketplace()
+            self.assertQueryBudget(
+                lambda: self.api_for(market.client).get('/api/favorites/'),
+                grow=market.add_favorites, budget=2,
+            )
+
+assertQueryBudget() llama al endpoint con pocos datos y luego con muchos
+(grow() agrega los que falten). Falla si:
+    - el número de consultas cambia con el tamaño (N+1), mostrando la
+      consulta que se repite;
+    - o se pasa del presupuesto.
+"""
+
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.chat.models import Conversation, Message
+from apps.favorites.models import Favorite
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product
+from apps.reports.models import Report
+from apps.reviews.models import Review
+from markettec.nplusone import sql_shape
+
+
+def make_user(username, role=None, first_name=''):
+    user = User.objects.create_user(username, password='x', first_name=first_name or username.title())
+    if role:
+        user.profile.role = role
+        user.profile.save()
+    return user
+
+
+class Marketplace:
+    """
+    Un vendedor, un cliente y un admin; cada add_*() agrega renglones con
+    todas sus relaciones llenas (categoría, calificaciones, vendedor...),
+    que es lo que hace aparecer los N+1.
+    """
+
+    def __init__(self):
+        self.vendor = make_user('vendedor', role='vendor', first_name='Vera')
+        self.client = make_user('cliente', first_name='Carlos')
+        self.admin = make_user('admin', role='admin')
+        self.categories = [Category.objects.create(name=name) for name in ('Libros', 'Electrónica', 'Ropa')]
+        self.products = []
+        self.conversation = Conversation.objects.create(user_a=self.client.profile, user_b=self.vendor.profile)
+        self.counter = 0
+
+    def next_number(self):
+        self.counter += 1
+        return self.counter
+
+    def add_products(self, count, vendor=None):
+        vendor = vendor or self.vendor
+        created = []
+        for _ in range(count):
+            n = self.next_number()
+            product = Product.objects.create(
+                name=f'Producto {n}', description='Buen estado, poco uso.', price=Decimal(f'{100 + n}.50'),
+                inventory=5, status='active', sku=f'SKU-{n}', vendor=vendor.profile,
+                category=self.categories[n % len(self.categories)],
+            )
+            # Una reseña: el producto queda con su renglón de calificación (reviews.ProductRating)
+            Review.objects.create(product=product, reviewer=self.client.profile, rating=1 + n % 5, comment='Bien')
+            created.append(product)
+        self.products.extend(created)
+        return created
+
+    def add_orders(self, count):
+        for product in self.add_products(count):
+            order = Order.objects.create(client=self.client.profile, total_price=product.price * 2)
+            OrderItem.objects.create(order=order, product=product, quantity=2, price_at_purchase=product.price)
+
+    def add_favorites(self, count):
+        for product in self.add_products(count):
+            Favorite.objects.create(profile=self.client.profile, product=product)
+
+    def add_reports(self, count):
+        for product in self.add_products(count):
+            Report.objects.create(reporter=self.client.profile, product=product, reason='Producto falso')
+
+    def add_reviews(self, count, product=None):
+        if product is None:
+            product = self.products[0] if self.products else self.add_products(1)[0]
+        for _ in range(count):
+            reviewer = make_user(f'resenador{self.next_number()}')
+            Review.objects.create(product=product, reviewer=reviewer.profile, rating=4, comment='Recomendado')
+        return product
+
+    def add_conversations(self, count):
+        for _ in range(count):
+            buyer = make_user(f'comprador{self.next_number()}')
+            conversation = Conversation.objects.create(user_a=buyer.profile, user_b=self.vendor.profile)
+            message = Message.objects.create(conversation=conversation, sender=buyer.profile, text='¿Sigue disponible?')
+            conversation.record_message(message)
+
+    def add_messages(self, count):
+        for _ in range(count):
+            message = Message.objects.create(
+                conversation=self.conversation, sender=self.client.profile, text=f'Mensaje {self.next_number()}'
+            )
+            self.conversation.record_message(message)
+
+    def add_users(self, count):
+        for _ in range(count):
+            make_user(f'usuario{self.next_number()}')
+
+
+class QueryBudgetMixin:
+    """ Para TestCase: presupuestos de consultas que no crecen con los datos. """
+
+    def api_for(self, user):
+        api = APIClient()
+        if user is not None:
+            api.force_authenticate(user)
+        return api
+
+    def count_queries(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+        return [query['sql'] for query in queries.captured_queries]
+
+    def assertQueryBudget(self, request, grow, budget, sizes=(2, 12)):
+        """
+        request(): hace la petición.  grow(n): agrega n renglones a lo que lista.
+        """
+        runs, current = [], 0
+        for size in sizes:
+            grow(size - current)
+            current = size
+            runs.append(self.count_queries(request))
+
+        small, large = runs[0], runs[-1]
+        if len(small) != len(large):
+            repeated = Counter(sql_shape(sql) for sql in large).most_common(1)[0]
+            self.fail(
+                f'El número de consultas crece con los datos ({len(small)} con {sizes[0]} renglones, '
+                f'{len(large)} con {sizes[-1]}). La que más se repite ({repeated[1]} veces):\n{repeated[0]}'
+            )
+        if len(large) > budget:
+            self.fail(f'{len(large)} consultas, el presupuesto es {budget}:\n' + '\n'.join(large))
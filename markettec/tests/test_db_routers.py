@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.products.models import Product
+from markettec import db_routers
+
+
+@override_settings(DATABASE_READ_REPLICA='replica')
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    La réplica es un espejo (TEST MIRROR) de 'default': trae los mismos datos,
+    así que la lectura se distingue por la conexión que la atendió.
+    (TransactionTestCase: la otra conexión solo ve lo ya confirmado.)
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.vendor = User.objects.create_user('vendedor', password='x')
+        Product.objects.create(name='Cálculo', description='...', price='10.00', status='active', vendor=self.vendor.profile)
+        self.api = APIClient()
+        self.api.force_authenticate(self.vendor)
+
+    def list_products(self, api):
+        """ (nombres, alias que leyó la tabla de productos) """
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            names = [product['name'] for product in api.get('/api/products/', HTTP_ACCEPT='application/json').json()]
+        aliases = {
+            alias for alias, queries in (('default', primary), ('replica', replica))
+            if any('"products_product"' in query['sql'] for query in queries)
+        }
+        return sorted(names), aliases
+
+    def test_catalog_reads_use_replica_until_the_user_writes(self):
+        self.assertEqual(self.list_products(self.api), (['Cálculo'], {'replica'}))
+
+        created = self.api.post('/api/products/', {'name': 'Álgebra', 'description': '...', 'price': '5.00'})
+        self.assertEqual(created.status_code, 201, created.data)
+
+        # Leer lo que acabas de escribir: la siguiente lectura va a la primaria
+        self.assertEqual(self.list_products(self.api), (['Cálculo', 'Álgebra'], {'default'}))
+        # Otros usuarios (anónimos) siguen leyendo de la réplica
+        self.assertEqual(self.list_products(APIClient()), (['Cálculo', 'Álgebra'], {'replica'}))
+
+    def test_primary_db_forces_the_primary(self):
+        state = db_routers.RoutingState()
+        state.use_replica = True
+        token = db_routers._routing.set(state)
+        try:
+            self.assertEqual(Product.objects.all().db, 'replica')
+            with db_routers.primary_db():
+                self.assertEqual(Product.objects.all().db, 'default')
+        finally:
+            db_routers._routing.reset(token)
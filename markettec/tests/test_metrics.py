@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from markettec import metrics
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.admin = User.objects.create_user('admin', password='x')
+        self.admin.profile.role = 'admin'
+        self.admin.profile.save()
+
+    def scrape(self, user):
+        api = APIClient()
+        api.force_authenticate(user)
+        return api.get('/api/metrics/')
+
+    def test_requests_are_counted_per_viewset_action(self):
+        api = APIClient()
+        api.get('/api/products/', HTTP_ACCEPT='application/json')
+        api.get('/api/products/featured/', HTTP_ACCEPT='application/json')
+        api.get('/api/products/999/', HTTP_ACCEPT='application/json')
+
+        response = self.scrape(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('markettec_http_requests_total{action="list",method="GET",status="200",view="ProductViewSet"} 1', text)
+        self.assertIn('markettec_http_requests_total{action="featured",method="GET",status="200",view="ProductViewSet"} 1', text)
+        self.assertIn('markettec_http_requests_total{action="retrieve",method="GET",status="404",view="ProductViewSet"} 1', text)
+        self.assertIn('markettec_http_request_duration_seconds_bucket{action="list",view="ProductViewSet",le="+Inf"} 1', text)
+        self.assertIn('markettec_http_request_duration_quantile_seconds{action="list",view="ProductViewSet",quantile="0.99"}', text)
+
+        self.assertEqual(self.scrape(User.objects.create_user('cliente', password='x')).status_code, 403)
+
+    def test_worker_files_are_added_together(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        key = metrics.sample_key(metrics.REQUESTS, {'view': 'ProductViewSet', 'action': 'list', 'method': 'GET', 'status': '200'})
+        # Dos "workers": cada uno con su archivo
+        first, second = (metrics.MmapStore(f'{directory}/{pid}.db') for pid in (101, 102))
+        for _ in range(3):
+            first.inc(key)
+        second.inc(key, 2)
+        for n in range(2000):  # Obliga a crecer el archivo
+            second.inc(metrics.sample_key('markettec_test', {'n': str(n)}))
+
+        with override_settings(METRICS={'DIRECTORY': directory}):
+            totals = metrics.collect()
+        metrics.reset()
+        self.assertEqual(totals[key], 5)
+        self.assertEqual(totals[metrics.sample_key('markettec_test', {'n': '1999'})], 1)
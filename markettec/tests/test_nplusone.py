@@ -0,0 +1,48 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.products.models import Product
+from markettec import nplusone
+from markettec.testing import Marketplace
+
+
+class NPlusOneMiddlewareTests(TestCase):
+
+    def setUp(self):
+        market = Marketplace()
+        self.products = market.add_products(8)
+
+    def n_plus_one_view(self, request):
+        # Lo que hace un serializer anidado sin select_related: una consulta por renglón
+        names = [product.category.name for product in Product.objects.all()]
+        return HttpResponse(', '.join(names))
+
+    def call(self):
+        middleware = nplusone.NPlusOneMiddleware(self.n_plus_one_view)
+        return middleware(RequestFactory().get('/api/products/'))
+
+    @override_settings(NPLUSONE={'ENABLED': True, 'THRESHOLD': 5})
+    def test_repeated_query_is_logged_with_its_origin(self):
+        with self.assertLogs('markettec.nplusone', level='WARNING') as logs:
+            response = self.call()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('8 consultas iguales en GET /api/products/', logs.output[0])
+        self.assertIn('markettec/tests/test_nplusone.py', logs.output[0])
+        self.assertIn('"products_category"', logs.output[0])
+
+    @override_settings(NPLUSONE={'ENABLED': True, 'THRESHOLD': 5, 'RAISE': True})
+    def test_raise_mode_fails_the_request(self):
+        with self.assertLogs('markettec.nplusone', level='WARNING'), self.assertRaises(nplusone.NPlusOneError):
+            self.call()
+
+    @override_settings(NPLUSONE={'ENABLED': True, 'THRESHOLD': 10})
+    def test_below_threshold_is_silent(self):
+        with self.assertNoLogs('markettec.nplusone', level='WARNING'):
+            self.call()
+
+    def test_sql_shape_ignores_values_and_list_sizes(self):
+        self.assertEqual(
+            nplusone.sql_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 20'),
+            nplusone.sql_shape('SELECT * FROM t WHERE id IN (%s, %s) AND name = \'y\' LIMIT 21'),
+        )
@@ -0,0 +1,48 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from apps.products.models import Product
+from markettec import profiling
+
+
+class RequestProfilingTests(TestCase):
+
+    def setUp(self):
+        vendor = User.objects.create_user('vendedor', password='x')
+        Product.objects.create(name='Cálculo', description='...', price='10.00', status='active', vendor=vendor.profile)
+
+    @override_settings(REQUEST_PROFILING={'ENABLED': True, 'SLOW_REQUEST_MS': 10_000})
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('markettec.profiling', 'INFO') as logs:
+            response = APIClient().get('/api/products/', HTTP_ACCEPT='application/json')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['view'], record['status'], record['bytes']), ('product-list', 200, len(response.content)))
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['serializer_ms'], 0)
+        self.assertNotIn('sql', record)
+
+    @override_settings(REQUEST_PROFILING={'ENABLED': True, 'SLOW_REQUEST_MS': 0})
+    def test_slow_requests_log_their_queries(self):
+        with self.assertLogs('markettec.profiling', 'WARNING') as logs:
+            APIClient().get('/api/products/', HTTP_ACCEPT='application/json')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record['slow'])
+        self.assertEqual(len(record['sql']), record['queries'])
+        self.assertIn('products_product', record['sql'][-1]['sql'])
+
+    @override_settings(REQUEST_PROFILING={'ENABLED': False})
+    def test_disabled_profiling_leaves_drf_untouched(self):
+        with mock.patch.object(BaseSerializer, 'data', profiling._original_data):
+            APIClient().get('/api/products/', HTTP_ACCEPT='application/json')
+            self.assertIs(BaseSerializer.data, profiling._original_data)
+
+    @override_settings(REQUEST_PROFILING={'ENABLED': True, 'SAMPLE_RATE': 0})
+    def test_unsampled_requests_are_not_measured(self):
+        response = APIClient().get('/api/products/', HTTP_ACCEPT='application/json')
+        self.assertNotIn('Server-Timing', response)
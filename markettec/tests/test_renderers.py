@@ -0,0 +1,34 @@
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from markettec import renderers
+
+
+class FastRendererTests(TestCase):
+
+    def test_output_matches_drf_json_renderer(self):
+        data = {
+            'price': Decimal('199.90'),
+            'created_at': datetime(2025, 11, 3, 17, 4, 5, 123456, tzinfo=dt_timezone.utc),
+            'day': datetime(2025, 11, 3).date(),
+            'name': 'Cálculo \u2028 "diferencial"',
+            'histogram': {1: 0, 5: 2},
+            'items': [None, True, 4.5],
+        }
+        fast = renderers.FastJSONRenderer().render(data)
+        self.assertEqual(fast, JSONRenderer().render(data))
+        self.assertIn(b'"2025-11-03T17:04:05.123456Z"', fast)
+        self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(fast)), json.loads(fast))
+
+    def test_api_uses_fast_json_and_no_browsable_renderer_without_debug(self):
+        self.assertEqual(api_settings.DEFAULT_RENDERER_CLASSES[0], renderers.FastJSONRenderer)
+        self.assertNotIn('api', [renderer.format for renderer in api_settings.DEFAULT_RENDERER_CLASSES])
+        response = APIClient().get('/api/products/', HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 406)
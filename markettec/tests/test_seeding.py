@@ -0,0 +1,75 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from apps.analytics.models import DailyMarketplaceSales
+from apps.audits.models import AuditLog
+from apps.chat.models import Conversation, Message
+from apps.favorites.models import Favorite
+from apps.orders.models import Order, OrderItem
+from apps.products import search
+from apps.products.models import Product
+from apps.reports.models import Report
+from apps.reviews.models import ProductRating, Review
+
+
+class SeedMarketplaceTests(TestCase):
+    VOLUMES = ['--vendors', '3', '--clients', '10', '--products', '40', '--orders', '15', '--reviews', '30',
+               '--favorites', '25', '--reports', '4', '--conversations', '6', '--messages', '32',
+               '--audit-logs', '20', '--end-date', '2026-01-31', '--chunk-size', '7']
+    SEEDED = [Message, Conversation, AuditLog, Report, Favorite, Review, OrderItem, Order, Product, User]
+
+    def seed(self, *args):
+        call_command('seed_marketplace', *self.VOLUMES, *args, stdout=io.StringIO())
+
+    def test_fills_every_app_with_consistent_data(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 2 + 3 + 10)
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(Order.objects.count(), 15)
+        self.assertEqual(Message.objects.count(), 32)
+        self.assertEqual([Favorite.objects.count(), Report.objects.count(), AuditLog.objects.count()], [25, 4, 20])
+        self.assertTrue(self.client.login(username='seed1-client-0000003', password='marketplace'))
+
+        # Lo que normalmente hacen las señales / save()
+        self.assertEqual(sum(ProductRating.objects.values_list('review_count', flat=True)), 30)
+        self.assertTrue(DailyMarketplaceSales.objects.exists())
+        self.assertEqual(search.rank_queryset(Product.objects.all(), 'Ref').count(), 40)
+        for item in OrderItem.objects.select_related('order', 'product'):
+            self.assertEqual(item.vendor_id, item.product.vendor_id)
+            self.assertEqual(item.order_created_at, item.order.created_at)
+        for order in Order.objects.prefetch_related('items'):
+            self.assertEqual(order.total_price, sum(i.quantity * i.price_at_purchase for i in order.items.all()))
+        for conversation in Conversation.objects.all():
+            last = conversation.messages.order_by('created_at', 'id').last()
+            self.assertEqual(conversation.last_message_id, last.id)
+            self.assertEqual(conversation.last_message_preview, last.preview())
+            unread = 'unread_count_b' if last.sender_id == conversation.user_a_id else 'unread_count_a'
+            self.assertEqual(getattr(conversation, unread), 1)
+
+    def test_same_seed_same_data(self):
+        def snapshot():
+            return [
+                list(Product.objects.order_by('id').values_list('id', 'name', 'price', 'vendor_id', 'created_at')),
+                list(OrderItem.objects.order_by('id').values_list('order_id', 'product_id', 'quantity')),
+                list(Message.objects.order_by('id').values_list('conversation_id', 'sender_id', 'text', 'created_at')),
+            ]
+
+        self.seed()
+        first = snapshot()
+        for model in self.SEEDED:
+            model.objects.all().delete()
+        self.seed()
+        self.assertEqual(snapshot(), first)
+
+        self.seed('--seed', '2')
+        self.assertEqual(Product.objects.count(), 80)
+
+    def test_rejects_a_repeated_seed_and_impossible_volumes(self):
+        self.seed()
+        with self.assertRaisesMessage(CommandError, 'Ya hay datos de la semilla 1'):
+            self.seed()
+        with self.assertRaisesMessage(CommandError, '--products necesita'):
+            self.seed('--seed', '3', '--vendors', '0')
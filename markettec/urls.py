@@ -13,8 +13,9 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 # --- ¡Importaciones para el LOGIN! ---
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from apps.users.authentication import ClaimsTokenRefreshSerializer
 from apps.users.serializers import MyTokenObtainPairSerializer 
+from markettec.metrics import MetricsView
 from drf_spectacular.utils import extend_schema
 
 # --- ¡Clases Decoradas (CORREGIDAS)! ---
@@ -35,13 +36,13 @@ class DecoratedTokenObtainPairView(TokenObtainPairView):
         return super().post(request, *args, **kwargs)
 
 class DecoratedTokenRefreshView(TokenRefreshView):
-    serializer_class = TokenRefreshSerializer # <--- Reafirmamos esta corrección
+    serializer_class = ClaimsTokenRefreshSerializer # Revisa baneo/rol en la BD y los pone en el nuevo token
     
     @extend_schema(
         tags=['1. Autenticación'],
         summary="2. Refrescar Token",
         description="Envía un 'refresh_token' válido para recibir un 'access_token' nuevo.",
-        responses={200: TokenRefreshView.serializer_class}, # <-- ¡COMA AÑADIDA!
+        responses={200: ClaimsTokenRefreshSerializer}, # <-- ¡COMA AÑADIDA!
         # --- ¡AÑADIDO PARA ORDEN 2! ---
         operation_id='2_token_refresh'
         # -----------------------------
@@ -70,6 +71,10 @@ urlpatterns = [
     path('api-auth/', include('rest_framework.urls')),
     path('api/password_reset/', include('apps.users.password_reset_urls')),
     path('api/', include('apps.chat.urls')),
+    path('api/', include('apps.analytics.urls')),
+
+    # --- Métricas de la API (Prometheus, solo Admin) ---
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
 
 
     # --- Rutas de SWAGGER (OpenAPI) ---